@@ -1,17 +1,26 @@
 import os
 import sys
-from flask import Flask, render_template, Response, jsonify, request
+from flask import Flask, render_template, Response, jsonify, request, send_file
 from flask_socketio import SocketIO, emit
 from datetime import datetime
 from threading import Thread
-from queue import Queue
 from utils.video import VideoStream
 from utils.detection import ObjectDetector
-from utils.production_tracker import ProductionTracker
 from utils.config import Config
 from utils.event_manager import EventManager
+from utils.dashboard_push import DashboardPublisher
 from utils.bom_reader import BOMReader
-import pandas as pd
+from utils.catalogue_watcher import CatalogueWatcher
+from utils.catalogue_responses import CatalogueResponseCache
+from utils.catalogue_search import CatalogueSearch
+from utils.broadcast import FrameBroadcaster
+from utils.offline_analysis import AnalysisJobManager
+from utils.scrap_journal import ScrapJournal
+from utils.persistence import WriteBehindQueue
+from utils.scrap_history import ScrapHistory
+from utils.crossing_log import CrossingLog, EXPORT_LAYOUTS
+from utils.history_store import HistoryStore, PARQUET_AVAILABLE, TIME_BUCKETS
+import tempfile
 from pathlib import Path
 
 app = Flask(__name__)
@@ -19,28 +28,46 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 config = Config()
 video_stream = VideoStream()
 detector = ObjectDetector()
-production_tracker = ProductionTracker()
-frame_queue = Queue(maxsize=10)  # Buffer for frames
+production_tracker = detector.production_tracker  # The tracker the detector and event manager update
+frame_broadcaster = FrameBroadcaster()  # Latest encoded frame shared by all viewers
 
-# Store scrap history in memory
-scrap_history = []
+# Scrap journal, its write-behind queue and the history served to the scrap page
+scrap_journal = ScrapJournal(config.scrap_journal_path)
+scrap_history = ScrapHistory(scrap_journal, cache_size=config.scrap_history_cache_size)
+# Single writer for the journal; entries join the live history once they have their journal id
+scrap_writer = WriteBehindQueue(scrap_journal, config.scrap_spool_path,
+                                on_persisted=scrap_history.record_persisted)
+scrap_writer.start()
 
-# Set up event manager with socket
+# Parquet history of crossings and scrap for cross-week reports (optional, needs pyarrow)
+history_store = None
+if PARQUET_AVAILABLE:
+    history_store = HistoryStore(config.history_dir, production_tracker.event_store, scrap_journal,
+                                 interval=config.history_compact_interval,
+                                 max_files_per_partition=config.history_max_files_per_partition)
+    history_store.start()
+else:
+    print("Warning: pyarrow not installed, /aggregate is disabled")
+
+# Production updates reach the dashboards as coalesced, acknowledged deltas
+production_publisher = DashboardPublisher(production_tracker, socketio, config.dashboard_push_rate,
+                                          config.dashboard_ack_timeout)
+production_publisher.start()
+
+# Set up event manager with the publisher
 event_manager = EventManager.get_instance()
-event_manager.set_socket(socketio)
+event_manager.set_publisher(production_publisher)
 
 # Initialize BOM reader
-bom_reader = BOMReader()
+bom_reader = BOMReader.get_instance()
+catalogue_watcher = CatalogueWatcher(bom_reader, interval=config.catalogue_poll_interval)
+catalogue_responses = CatalogueResponseCache(bom_reader)  # Pre-serialized scrap form catalogue
+catalogue_search = CatalogueSearch(bom_reader)
 
 def video_feed_producer():
     """Produce video frames in a separate thread"""
     for frame in video_stream.generate_frames(detector):
-        if frame_queue.full():
-            try:
-                frame_queue.get_nowait()  # Remove old frame if queue is full
-            except:
-                pass
-        frame_queue.put(frame)
+        frame_broadcaster.publish(frame)
 
 @app.route('/')
 def index():
@@ -109,6 +136,7 @@ def get_production_data():
             'total_delta': data.get('total_delta', 0),
             'total_scrap': data.get('total_scrap', 0),
             'average_scrap_rate': data.get('average_scrap_rate', 0),
+            'class_counts': data.get('class_counts', {}),
             'current_time': data['current_time']
         }
         
@@ -133,22 +161,26 @@ def get_production_data():
 
 @app.route('/video_feed')
 def video_feed():
-    def generate():
-        while True:
-            frame = frame_queue.get()
-            yield frame
-
     headers = {
         'Cache-Control': 'no-cache, no-store, must-revalidate',
         'Pragma': 'no-cache',
         'Expires': '0',
         'X-Accel-Buffering': 'no'
     }
-    return Response(generate(),
+    return Response(frame_broadcaster.subscribe(),
                    mimetype='multipart/x-mixed-replace; boundary=frame',
                    headers=headers,
                    direct_passthrough=True)
 
+@app.route('/pipeline_stats')
+def pipeline_stats():
+    """Queue depths and throughput of each video pipeline stage"""
+    stats = video_stream.get_pipeline_stats()
+    stats['broadcast'] = frame_broadcaster.get_stats()
+    stats['detector'] = detector.get_stats()
+    stats['dashboard_push'] = production_publisher.get_stats()
+    return jsonify(stats)
+
 @app.route('/upload_video', methods=['POST'])
 def upload_video():
     if 'video' not in request.files:
@@ -162,9 +194,8 @@ def upload_video():
         video_stream.set_test_video(video_file)
         detector.line_counter.reset_counts()
         
-        # Clear frame queue and restart video feed thread
-        while not frame_queue.empty():
-            frame_queue.get()
+        # Drop the last frame of the old source and restart video feed thread
+        frame_broadcaster.reset()
         
         if hasattr(app, 'video_thread') and app.video_thread.is_alive():
             # Wait for old thread to finish
@@ -178,43 +209,55 @@ def upload_video():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-def emit_update():
-    """Emit update event through WebSocket"""
-    data = production_tracker.get_all_data()
-    data['current_time'] = datetime.now().strftime("%H:%M:%S")
+@app.route('/analyze_video', methods=['POST'])
+def analyze_video():
+    """Queue a recorded video for offline high-speed analysis"""
+    if 'video' not in request.files:
+        return jsonify({'success': False, 'error': 'No video file provided'})
     
-    # Ensure data is properly formatted for JSON response
-    formatted_data = {
-        'line1_part': {
-            'program': str(data['line1_part'].get('program', '')).strip(),
-            'part_number': str(data['line1_part'].get('part_number', '')).strip(),
-            'part_description': str(data['line1_part'].get('part_description', '')).strip(),
-            'track_id': str(data['line1_part'].get('track_id', '')).strip(),
-            'target': str(data['line1_part'].get('target', '0')).strip(),
-            'class_name': str(data['line1_part'].get('class_name', '')).strip()
-        },
-        'line2_part': {
-            'program': str(data['line2_part'].get('program', '')).strip(),
-            'part_number': str(data['line2_part'].get('part_number', '')).strip(),
-            'part_description': str(data['line2_part'].get('part_description', '')).strip(),
-            'track_id': str(data['line2_part'].get('track_id', '')).strip(),
-            'target': str(data['line2_part'].get('target', '0')).strip(),
-            'class_name': str(data['line2_part'].get('class_name', '')).strip()
-        },
-        'line1_production': data['line1_production'],
-        'line2_production': data['line2_production'],
-        'line1_scrap': data['line1_scrap'],
-        'line2_scrap': data['line2_scrap'],
-        'total_quantity': data['total_quantity'],
-        'total_delta': data['total_delta'],
-        'total_scrap': data['total_scrap'],
-        'average_scrap_rate': data['average_scrap_rate'],
-        'current_time': data['current_time'],
-        'total_tbp_line1': data.get('total_tbp_line1', 0),
-        'total_tbp_line2': data.get('total_tbp_line2', 0)
-    }
+    video_file = request.files['video']
+    if video_file.filename == '':
+        return jsonify({'success': False, 'error': 'No video file selected'})
     
-    socketio.emit('production_update', formatted_data)
+    try:
+        batch_size = int(request.form.get('batch_size', 8))
+        suffix = Path(video_file.filename).suffix or '.mp4'
+        temp_fd, temp_path = tempfile.mkstemp(suffix=suffix)
+        os.close(temp_fd)
+        video_file.save(temp_path)
+        
+        job_id = AnalysisJobManager.get_instance().submit(temp_path, batch_size=batch_size, delete_after=True)
+        return jsonify({'success': True, 'job_id': job_id})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/analysis_jobs/<job_id>')
+def get_analysis_job(job_id):
+    """Status, progress and report of an offline analysis job"""
+    job = AnalysisJobManager.get_instance().get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job)
+
+@socketio.on('connect')
+def handle_connect():
+    production_publisher.add_client(request.sid)  # Full state, deltas after that
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    production_publisher.remove_client(request.sid)
+
+@socketio.on('production_ack')
+def handle_production_ack(data):
+    version = data.get('version') if isinstance(data, dict) else None
+    if not isinstance(version, int) or isinstance(version, bool):
+        print(f"Ignoring malformed production_ack from {request.sid}: {data!r}")
+        return
+    production_publisher.ack(request.sid, version)
+
+@socketio.on('production_resync')
+def handle_production_resync():
+    production_publisher.add_client(request.sid)
 
 # Scrap Report Routes
 @app.route('/scrap')
@@ -223,99 +266,106 @@ def scrap_report():
     current_datetime = datetime.now().strftime('%m/%d/%Y %I:%M:%S %p')
     return render_template('scrap_report.html', current_time=current_time, current_datetime=current_datetime)
 
-def get_current_calendar_week():
-    return f"cw{datetime.now().isocalendar()[1]:02d}"
+@app.route('/persistence_status')
+def persistence_status():
+    """Queue depth, lag and failures of the scrap write-behind worker"""
+    stats = scrap_writer.get_stats()
+    stats['crossing_log'] = CrossingLog.get_instance().get_stats()
+    stats['history'] = history_store.get_stats() if history_store else None
+    return jsonify(stats)
+
+@app.route('/shift_summary')
+def shift_summary():
+    """Per-line and per-part counts of a shift against its prorated target (current shift by default)"""
+    rollups = production_tracker.rollups
+    summary = rollups.get_shift_summary(request.args.get('shift'))
+    return jsonify({'summary': summary, 'shifts': rollups.shift_keys()})
+
+@app.route('/hour_summary')
+def hour_summary():
+    """Per-line and per-part counts of a clock hour ('YYYY-MM-DD HH:00', current hour by default)"""
+    rollups = production_tracker.rollups
+    summary = rollups.get_hour_summary(request.args.get('hour'))
+    return jsonify({'summary': summary, 'hours': rollups.hour_keys()})
+
+@app.route('/timeseries')
+def timeseries():
+    """Downsampled PPH, TBP and delta history of the lines, e.g. ?span=28800&step=60 for 8 hours by minute"""
+    span = request.args.get('span', 8 * 3600, type=int)
+    step = request.args.get('step', 60, type=int)
+    rolling = request.args.get('rolling', config.timeseries_rolling_seconds, type=int)
+    if span <= 0 or step <= 0 or rolling <= 0:
+        return jsonify({'error': 'span, step and rolling must be positive seconds'}), 400
+    store = production_tracker.timeseries
+    if step > store.span_seconds:
+        return jsonify({'error': f"step can be at most {store.span_seconds} seconds"}), 400
+    lines = [request.args['line']] if request.args.get('line') else store.lines()
+    return jsonify({line: store.query(line, span, step, rolling) for line in lines})
 
-def save_scrap_to_excel(scrap_data):
+@app.route('/aggregate')
+def aggregate():
+    """Counts of crossings or scrap over any period, e.g.
+    ?dataset=scrap&group_by=defect_code&program=TESLA M3&start=2024-07-01&end=2024-10-01&limit=10
+    """
+    if history_store is None:
+        return jsonify({'error': 'pyarrow is not installed'}), 503
     try:
-        # Create the filename with current calendar week
-        calendar_week = get_current_calendar_week()
-        filename = f"flock_scrap_data_{calendar_week}.xlsx"
-        
-        # Create new scrap entry
-        new_entry = {
-            'Timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'Line': scrap_data['line'],
-            'Program': scrap_data.get('program', ''),
-            'Part Number': scrap_data.get('part_number', ''),
-            'Defect Code': scrap_data['defect_code'],
-            'Description': scrap_data['defect_description'],
-            'Comments': scrap_data.get('comments', '')
-        }
-        
-        # Initialize DataFrame
-        if os.path.exists(filename):
-            try:
-                df = pd.read_excel(filename)
-                # Add new entry at the top
-                df = pd.concat([pd.DataFrame([new_entry]), df], ignore_index=True)
-            except Exception as e:
-                print(f"Error reading existing Excel file: {str(e)}")
-                df = pd.DataFrame([new_entry])
-        else:
-            df = pd.DataFrame([new_entry])
-        
-        try:
-            # Create a Pandas Excel writer using XlsxWriter as the engine
-            with pd.ExcelWriter(filename, engine='xlsxwriter', mode='w') as writer:
-                # Write the DataFrame to the Excel file
-                df.to_excel(writer, index=False, sheet_name='Sheet1')
-                
-                # Get the workbook and worksheet objects
-                workbook = writer.book
-                worksheet = writer.sheets['Sheet1']
-                
-                # Create formats
-                header_format = workbook.add_format({
-                    'bold': True,
-                    'align': 'center',
-                    'valign': 'vcenter',
-                    'bg_color': '#D3D3D3'
-                })
-                
-                cell_format = workbook.add_format({
-                    'align': 'center',
-                    'valign': 'vcenter',
-                    'text_wrap': True
-                })
-                
-                # Format headers
-                for col_num, value in enumerate(df.columns.values):
-                    worksheet.write(0, col_num, value, header_format)
-                
-                # Format all data cells
-                for row in range(1, len(df) + 1):
-                    for col in range(len(df.columns)):
-                        worksheet.write(row, col, df.iloc[row-1, col], cell_format)
-                
-                # Auto-fit columns
-                for col_num, column in enumerate(df.columns):
-                    # Get the maximum length in the column
-                    max_length = max(
-                        df[column].astype(str).apply(len).max(),
-                        len(str(column))
-                    ) + 2  # Add some padding
-                    
-                    # Set column width
-                    worksheet.set_column(col_num, col_num, max_length)
-            
-            print(f"Scrap data saved to {filename} with formatting")
-            return True
-            
-        except Exception as e:
-            print(f"Error writing formatted Excel file: {str(e)}")
-            # Fallback to basic save if formatting fails
-            df.to_excel(filename, index=False)
-            print(f"Scrap data saved without formatting to {filename}")
-            return True
-            
+        dataset = request.args.get('dataset', 'crossings')
+        group_by = [column for column in request.args.get('group_by', '').split(',') if column]
+        start = request.args.get('start')
+        end = request.args.get('end')
+        bucket = request.args.get('bucket') or None
+        filters = {column: request.args.get(column)
+                   for column in ('line', 'program', 'part_number', 'defect_code', 'class_name')
+                   if request.args.get(column)}
+        rows = history_store.aggregate(dataset, group_by,
+                                       datetime.fromisoformat(start) if start else None,
+                                       datetime.fromisoformat(end) if end else None,
+                                       bucket, filters, request.args.get('limit', type=int))
+        return jsonify({'dataset': dataset, 'group_by': group_by, 'bucket': bucket, 'rows': rows,
+                        'buckets': list(TIME_BUCKETS)})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error aggregating history: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/export_crossings')
+def export_crossings():
+    """Export one period of the crossing log as a workbook (production_log or flock_report layout)"""
+    try:
+        layout = request.args.get('layout', 'production_log')
+        if layout not in EXPORT_LAYOUTS:
+            return jsonify({'error': f"Unknown layout: {layout}"}), 400
+        crossing_log = CrossingLog.get_instance()
+        period = request.args.get('period') or crossing_log.period_of(datetime.now())
+        filename = crossing_log.export_xlsx(period, layout=layout)
+        return send_file(os.path.abspath(filename), as_attachment=True)
     except Exception as e:
-        print(f"Error saving scrap data to Excel: {str(e)}")
-        return False
+        print(f"Error exporting crossings: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/export_scrap')
+def export_scrap():
+    """Build the formatted weekly scrap workbook from the journal and download it"""
+    try:
+        week = request.args.get('week')  # e.g. cw07, defaults to the current week
+        year = request.args.get('year', type=int)
+        # Include submissions still in the write-behind queue
+        if not scrap_writer.flush():
+            return jsonify({'error': 'Scrap entries are still waiting to be written to the journal, '
+                                     'try again shortly',
+                            'queued': scrap_writer.get_stats()['queued']}), 503
+        filename = scrap_journal.export_week(week, year, directory=config.scrap_export_dir)
+        return send_file(os.path.abspath(filename), as_attachment=True)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error exporting scrap data: {str(e)}")
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/submit_scrap', methods=['POST'])
 def submit_scrap():
-    global scrap_history
     try:
         data = request.json
         if not data:
@@ -332,41 +382,17 @@ def submit_scrap():
             'comments': data.get('comments', '')
         }
         
-        # Save to Excel file
-        save_scrap_to_excel(scrap_entry)
-        
-        # Add to history (in memory)
-        scrap_history.insert(0, scrap_entry)
-        
-        # Keep only the last 100 entries in memory
-        if len(scrap_history) > 100:
-            scrap_history.pop()
+        # Durably queue for the scrap journal, the weekly workbook is exported from it.
+        # The live history picks the entry up once the journal has assigned its id.
+        scrap_writer.submit(scrap_entry)
             
         # Update production tracker with scrap data
         if production_tracker:
             try:
                 line_key = f"Line {data['line']}"
-                production_tracker.update_scrap(line_key, 1)  # Always increment by 1
-                
-                # Get scrap-related data with proper structure
-                line1_scrap_data = production_tracker.line_data.get('Line 1', {}).get('scrap', {'total': 0, 'rate': 0})
-                line2_scrap_data = production_tracker.line_data.get('Line 2', {}).get('scrap', {'total': 0, 'rate': 0})
-                
-                scrap_data = {
-                    'line1_scrap': {
-                        'total': line1_scrap_data.get('total', 0),
-                        'rate': line1_scrap_data.get('rate', 0)
-                    },
-                    'line2_scrap': {
-                        'total': line2_scrap_data.get('total', 0),
-                        'rate': line2_scrap_data.get('rate', 0)
-                    },
-                    'total_scrap': getattr(production_tracker, 'total_scrap', 0),
-                    'average_scrap_rate': getattr(production_tracker, 'average_scrap_rate', 0)
-                }
-                
-                # Emit scrap update with proper structure
-                socketio.emit('scrap_update', scrap_data)
+                production_tracker.update_scrap(line_key, 1, scrap_entry['part_number'],
+                                                scrap_entry['defect_code'])  # Always increment by 1
+                production_publisher.notify()  # Scrap totals and rates go out with the next push
             except Exception as e:
                 print(f"Error updating production tracker: {str(e)}")
                 # Continue execution even if production tracker update fails
@@ -377,17 +403,89 @@ def submit_scrap():
         print(f"Error submitting scrap: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/scrap_rates')
+def scrap_rates():
+    """Scrap rate per line and part, for all time or for one shift (?shift=2024-12-27 Shift 1)"""
+    scrap_stats = production_tracker.scrap_stats
+    shift_key = request.args.get('shift')
+    rates = scrap_stats.get_rates(shift_key)
+    return jsonify({'lines': rates, 'average_scrap_rate': scrap_stats.average_rate(shift_key),
+                    'shifts': scrap_stats.shift_keys()})
+
+@app.route('/scrap_pareto')
+def scrap_pareto():
+    """Top defect codes of a shift (current shift by default), optionally for one line"""
+    line = request.args.get('line')
+    if line and line.isdigit():
+        line = f"Line {line}"
+    pareto = production_tracker.scrap_stats.get_pareto(request.args.get('shift'), line,
+                                                       request.args.get('top', 10, type=int))
+    for row in pareto['defects']:
+        row['defect_description'] = bom_reader.get_description_for_code(row['defect_code'])
+    return jsonify(pareto)
+
 @app.route('/get_scrap_history')
 def get_scrap_history():
-    global scrap_history
-    return jsonify(scrap_history)
+    """Most recent scrap entries for the live table"""
+    return jsonify(scrap_history.recent())
+
+@app.route('/scrap_history')
+def query_scrap_history():
+    """Cursor-paginated persisted scrap history with optional filters"""
+    try:
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        cursor = request.args.get('cursor', type=int)
+        filters = {key: request.args.get(key) for key in ('line', 'program', 'part_number', 'defect_code',
+                                                           'since', 'until')}
+        entries, next_cursor = scrap_history.page(limit=limit, cursor=cursor, **filters)
+        return jsonify({'entries': entries, 'next_cursor': next_cursor})
+    except Exception as e:
+        print(f"Error querying scrap history: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/catalogue_status')
+def catalogue_status():
+    """Version, load time and watcher state of the BOM/Scrap Book catalogue"""
+    return jsonify(catalogue_watcher.get_status())
+
+def catalogue_response(cached):
+    """Serve pre-serialized catalogue JSON, answering 304 when the client's copy is current"""
+    response = Response(cached.body, mimetype='application/json')
+    response.set_etag(cached.etag)
+    response.last_modified = cached.last_modified
+    response.cache_control.no_cache = True  # Revalidate every time, the catalogue can hot-reload
+    return response.make_conditional(request)
+
+@app.route('/get_catalogue')
+def get_catalogue():
+    """Programs, parts, defect codes and descriptions for the scrap form in one response"""
+    try:
+        return catalogue_response(catalogue_responses.get('bootstrap'))
+    except Exception as e:
+        print(f"Error getting catalogue: {str(e)}")
+        return jsonify({}), 500
+
+@app.route('/search')
+def search_catalogue():
+    """Typeahead search over part numbers, part descriptions and defect codes"""
+    try:
+        query = request.args.get('q', '')
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+        kind = request.args.get('kind') or None  # 'part' or 'defect'
+        program = request.args.get('program') or None
+        return jsonify({
+            'query': query,
+            'results': catalogue_search.search(query, limit=limit, kind=kind, program=program)
+        })
+    except Exception as e:
+        print(f"Error searching catalogue: {str(e)}")
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/get_programs')
 def get_programs():
     """Get list of unique programs from BOM"""
     try:
-        programs = bom_reader.get_unique_programs()
-        return jsonify(sorted(programs))
+        return catalogue_response(catalogue_responses.get('programs'))
     except Exception as e:
         print(f"Error getting programs: {str(e)}")
         return jsonify([]), 500
@@ -396,8 +494,7 @@ def get_programs():
 def get_parts(program):
     """Get parts for a specific program from BOM"""
     try:
-        parts = bom_reader.get_parts_by_program(program)
-        return jsonify(parts)
+        return catalogue_response(catalogue_responses.get_parts(program))
     except Exception as e:
         print(f"Error getting parts: {str(e)}")
         return jsonify([]), 500
@@ -406,8 +503,7 @@ def get_parts(program):
 def get_defect_codes():
     """Get list of defect codes from Scrap Book"""
     try:
-        codes = bom_reader.get_defect_codes()
-        return jsonify(sorted(codes))
+        return catalogue_response(catalogue_responses.get('defect_codes'))
     except Exception as e:
         print(f"Error getting defect codes: {str(e)}")
         return jsonify([]), 500
@@ -416,8 +512,7 @@ def get_defect_codes():
 def get_defect_descriptions():
     """Get list of descriptions from Scrap Book"""
     try:
-        descriptions = bom_reader.get_defect_descriptions()
-        return jsonify(sorted(descriptions))
+        return catalogue_response(catalogue_responses.get('defect_descriptions'))
     except Exception as e:
         print(f"Error getting descriptions: {str(e)}")
         return jsonify([]), 500
@@ -447,4 +542,7 @@ if __name__ == '__main__':
     app.video_thread = Thread(target=video_feed_producer, daemon=True)
     app.video_thread.start()
     
+    if config.catalogue_watch_enabled:
+        catalogue_watcher.start()
+    
     socketio.run(app, host='0.0.0.0', port=8080, debug=False)
\ No newline at end of file
@@ -21,24 +21,52 @@ document.addEventListener('DOMContentLoaded', function() {
         })
         .then(data => {
             console.log('Initial data loaded:', data);
-            updateUI(data);
+            // The socket's full state may have arrived first and is newer
+            if (productionState === null) {
+                updateUI(data);
+            }
         })
         .catch(error => {
             console.error('Error loading initial data:', error);
         });
 });
 
+// Production state as of productionVersion; the server sends it in full on connect and deltas after that
+let productionState = null;
+let productionVersion = 0;
+
 // Listen for production updates
-socket.on('production_update', function(data) {
-    updateProductionData(data);
-});
+socket.on('production_update', function(message) {
+    if (message.full) {
+        productionState = message.state;
+    } else if (productionState === null) {
+        // A delta with nothing to apply it to
+        socket.emit('production_resync');
+        return;
+    } else {
+        mergeChanges(productionState, message.changes);
+    }
+    productionVersion = message.version;
+    // Acknowledge, so the next push only carries what changed after this version
+    socket.emit('production_ack', { version: productionVersion });
 
-// Listen for scrap updates
-socket.on('scrap_update', function(data) {
-    // Update only scrap-related elements
-    updateScrapData(data);
+    productionState.current_time = message.current_time;
+    updateUI(productionState);
+    document.dispatchEvent(new CustomEvent('production-state', { detail: productionState }));
 });
 
+// Apply the changed fields of a delta push to the local state
+function mergeChanges(target, changes) {
+    Object.entries(changes).forEach(([key, value]) => {
+        if (value !== null && typeof value === 'object' && !Array.isArray(value) &&
+            target[key] !== null && typeof target[key] === 'object') {
+            mergeChanges(target[key], value);
+        } else {
+            target[key] = value;
+        }
+    });
+}
+
 // Initialize charts
 function createCharts() {
     const commonConfig = {
@@ -571,99 +599,3 @@ function showNotification(line, program, partNumber, description, objectId) {
         notification.classList.remove('show');
     }, 5000);
 }
-
-function updateProductionData(data) {
-    // Update line 1 data
-    document.getElementById('program-1').textContent = data.line1_part.program || 'No Part';
-    document.getElementById('part-number-1').textContent = data.line1_part.part_number || 'No Part';
-    document.getElementById('part-description-1').textContent = data.line1_part.part_description || 'No Part';
-    document.getElementById('quantity-1').textContent = data.line1_production.quantity;
-    
-    // Update delta 1 with color and sign
-    const delta1Element = document.getElementById('delta-1');
-    const delta1Value = data.line1_production.delta;
-    delta1Element.textContent = (delta1Value > 0 ? '+' : '-') + Math.abs(delta1Value);  // Add + or - sign
-    delta1Element.parentElement.classList.toggle('positive', delta1Value > 0);
-
-    // Update line 2 data
-    document.getElementById('program-2').textContent = data.line2_part.program || 'No Part';
-    document.getElementById('part-number-2').textContent = data.line2_part.part_number || 'No Part';
-    document.getElementById('part-description-2').textContent = data.line2_part.part_description || 'No Part';
-    document.getElementById('quantity-2').textContent = data.line2_production.quantity;
-    
-    // Update delta 2 with color and sign
-    const delta2Element = document.getElementById('delta-2');
-    const delta2Value = data.line2_production.delta;
-    delta2Element.textContent = (delta2Value > 0 ? '+' : '-') + Math.abs(delta2Value);  // Add + or - sign
-    delta2Element.parentElement.classList.toggle('positive', delta2Value > 0);
-
-    // Update totals
-    document.getElementById('total-quantity').textContent = data.total_quantity;
-    const totalDeltaValue = data.total_delta;
-    document.getElementById('total-delta').textContent = (totalDeltaValue > 0 ? '+' : '-') + Math.abs(totalDeltaValue);
-
-    // Update last refresh time
-    document.getElementById('last-refresh').textContent = data.current_time;
-
-    // Recalculate scrap rates with new production quantities
-    const line1Quantity = data.line1_production.quantity;
-    const line2Quantity = data.line2_production.quantity;
-    
-    // Get current scrap totals from the DOM
-    const line1ScrapTotal = parseInt(document.getElementById('scrap-1').textContent) || 0;
-    const line2ScrapTotal = parseInt(document.getElementById('scrap-2').textContent) || 0;
-    
-    // Recalculate Line 1 scrap rate
-    const line1TotalParts = line1Quantity + line1ScrapTotal;
-    const line1ScrapRate = line1TotalParts > 0 ? ((line1ScrapTotal / line1TotalParts) * 100).toFixed(1) : '0.0';
-    document.getElementById('scrap-rate-1').textContent = line1ScrapRate + '%';
-    
-    // Recalculate Line 2 scrap rate
-    const line2TotalParts = line2Quantity + line2ScrapTotal;
-    const line2ScrapRate = line2TotalParts > 0 ? ((line2ScrapTotal / line2TotalParts) * 100).toFixed(1) : '0.0';
-    document.getElementById('scrap-rate-2').textContent = line2ScrapRate + '%';
-    
-    // Recalculate total scrap rate
-    const totalScrap = line1ScrapTotal + line2ScrapTotal;
-    const totalProduction = line1Quantity + line2Quantity;
-    const totalParts = totalProduction + totalScrap;
-    const averageScrapRate = totalParts > 0 ? ((totalScrap / totalParts) * 100).toFixed(1) : '0.0';
-    document.getElementById('average-scrap-rate').textContent = averageScrapRate + '%';
-
-    // Update charts
-    updateCharts(data);
-    
-    // Check for new parts
-    checkForNewParts(data);
-}
-
-function updateScrapData(data) {
-    // Get current production quantities from the DOM
-    const line1Quantity = parseInt(document.getElementById('quantity-1').textContent) || 0;
-    const line2Quantity = parseInt(document.getElementById('quantity-2').textContent) || 0;
-    
-    // Update Line 1 scrap
-    const line1ScrapTotal = data.line1_scrap.total;
-    const line1TotalParts = line1Quantity + line1ScrapTotal;
-    const line1ScrapRate = line1TotalParts > 0 ? ((line1ScrapTotal / line1TotalParts) * 100).toFixed(1) : '0.0';
-    
-    document.getElementById('scrap-1').textContent = line1ScrapTotal;
-    document.getElementById('scrap-rate-1').textContent = line1ScrapRate + '%';
-    
-    // Update Line 2 scrap
-    const line2ScrapTotal = data.line2_scrap.total;
-    const line2TotalParts = line2Quantity + line2ScrapTotal;
-    const line2ScrapRate = line2TotalParts > 0 ? ((line2ScrapTotal / line2TotalParts) * 100).toFixed(1) : '0.0';
-    
-    document.getElementById('scrap-2').textContent = line2ScrapTotal;
-    document.getElementById('scrap-rate-2').textContent = line2ScrapRate + '%';
-    
-    // Update total scrap and calculate average rate
-    const totalScrap = data.total_scrap;
-    const totalProduction = line1Quantity + line2Quantity;
-    const totalParts = totalProduction + totalScrap;
-    const averageScrapRate = totalParts > 0 ? ((totalScrap / totalParts) * 100).toFixed(1) : '0.0';
-    
-    document.getElementById('total-scrap').textContent = totalScrap;
-    document.getElementById('average-scrap-rate').textContent = averageScrapRate + '%';
-}
\ No newline at end of file
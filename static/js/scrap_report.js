@@ -123,16 +123,52 @@ document.addEventListener('DOMContentLoaded', function() {
         scrapHistoryBody.insertBefore(row, scrapHistoryBody.firstChild);
     }
 
+    // Form catalogue, loaded once from /get_catalogue
+    let catalogue = {
+        programs: [],
+        parts_by_program: {},
+        defect_codes: [],
+        defect_descriptions: [],
+        description_by_code: {},
+        code_by_description: {}
+    };
+
+    // Fill a select with a placeholder and one option per value
+    function fillSelect(select, placeholder, values) {
+        select.innerHTML = `<option value="">${placeholder}</option>`;
+        values.forEach(value => {
+            const option = document.createElement('option');
+            option.value = value;
+            option.textContent = value;
+            select.appendChild(option);
+        });
+    }
+
+    // Load programs, parts and defect codes in a single request
+    async function loadCatalogue() {
+        try {
+            const response = await fetch('/get_catalogue');
+            if (response.ok) {
+                catalogue = await response.json();
+                fillSelect(programSelect, 'Select Program', catalogue.programs);
+                fillSelect(defectCodeSelect, 'Select Defect Code', catalogue.defect_codes);
+                fillSelect(defectDescriptionSelect, 'Select Description', catalogue.defect_descriptions);
+            }
+        } catch (error) {
+            console.error('Error loading catalogue:', error);
+            showNotification('Error loading programs and defect codes', 'error');
+        }
+    }
+
     // Load initial data
-    loadPrograms();
-    loadDefectCodes();
-    loadDefectDescriptions();
+    loadCatalogue();
 
     // Handle program selection change
     programSelect.addEventListener('change', function() {
         const selectedProgram = this.value;
         if (selectedProgram) {
-            loadPartNumbers(selectedProgram);
+            const parts = catalogue.parts_by_program[selectedProgram] || [];
+            fillSelect(partSelect, 'Select Part Number', parts.map(part => part.part_number));
             partSelect.disabled = false;
         } else {
             partSelect.disabled = true;
@@ -140,122 +176,16 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
 
-    // Load programs from BOM
-    async function loadPrograms() {
-        try {
-            const response = await fetch('/get_programs');
-            if (response.ok) {
-                const programs = await response.json();
-                programSelect.innerHTML = '<option value="">Select Program</option>';
-                programs.forEach(program => {
-                    const option = document.createElement('option');
-                    option.value = program;
-                    option.textContent = program;
-                    programSelect.appendChild(option);
-                });
-            }
-        } catch (error) {
-            console.error('Error loading programs:', error);
-            showNotification('Error loading programs', 'error');
-        }
-    }
-
-    // Load part numbers for selected program
-    async function loadPartNumbers(program) {
-        try {
-            const response = await fetch(`/get_parts/${encodeURIComponent(program)}`);
-            if (response.ok) {
-                const parts = await response.json();
-                partSelect.innerHTML = '<option value="">Select Part Number</option>';
-                parts.forEach(part => {
-                    const option = document.createElement('option');
-                    option.value = part.part_number;
-                    option.textContent = part.part_number;
-                    partSelect.appendChild(option);
-                });
-            }
-        } catch (error) {
-            console.error('Error loading part numbers:', error);
-            showNotification('Error loading part numbers', 'error');
-        }
-    }
-
     // Handle defect code selection change
-    defectCodeSelect.addEventListener('change', async function() {
-        const selectedCode = this.value;
-        if (selectedCode) {
-            try {
-                const response = await fetch(`/get_description/${encodeURIComponent(selectedCode)}`);
-                if (response.ok) {
-                    const data = await response.json();
-                    defectDescriptionSelect.value = data.description;
-                }
-            } catch (error) {
-                console.error('Error getting description:', error);
-            }
-        } else {
-            defectDescriptionSelect.value = '';
-        }
+    defectCodeSelect.addEventListener('change', function() {
+        defectDescriptionSelect.value = catalogue.description_by_code[this.value] || '';
     });
 
     // Handle description selection change
-    defectDescriptionSelect.addEventListener('change', async function() {
-        const selectedDescription = this.value;
-        if (selectedDescription) {
-            try {
-                const response = await fetch(`/get_code/${encodeURIComponent(selectedDescription)}`);
-                if (response.ok) {
-                    const data = await response.json();
-                    defectCodeSelect.value = data.code;
-                }
-            } catch (error) {
-                console.error('Error getting code:', error);
-            }
-        } else {
-            defectCodeSelect.value = '';
-        }
+    defectDescriptionSelect.addEventListener('change', function() {
+        defectCodeSelect.value = catalogue.code_by_description[this.value] || '';
     });
 
-    // Load defect codes from Scrap Book
-    async function loadDefectCodes() {
-        try {
-            const response = await fetch('/get_defect_codes');
-            if (response.ok) {
-                const codes = await response.json();
-                defectCodeSelect.innerHTML = '<option value="">Select Defect Code</option>';
-                codes.forEach(code => {
-                    const option = document.createElement('option');
-                    option.value = code;
-                    option.textContent = code;
-                    defectCodeSelect.appendChild(option);
-                });
-            }
-        } catch (error) {
-            console.error('Error loading defect codes:', error);
-            showNotification('Error loading defect codes', 'error');
-        }
-    }
-
-    // Load descriptions from Scrap Book
-    async function loadDefectDescriptions() {
-        try {
-            const response = await fetch('/get_defect_descriptions');
-            if (response.ok) {
-                const descriptions = await response.json();
-                defectDescriptionSelect.innerHTML = '<option value="">Select Description</option>';
-                descriptions.forEach(description => {
-                    const option = document.createElement('option');
-                    option.value = description;
-                    option.textContent = description;
-                    defectDescriptionSelect.appendChild(option);
-                });
-            }
-        } catch (error) {
-            console.error('Error loading descriptions:', error);
-            showNotification('Error loading descriptions', 'error');
-        }
-    }
-
     // Load initial scrap history
     async function loadScrapHistory() {
         try {
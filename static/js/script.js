@@ -2,10 +2,6 @@ console.log('Production details script loaded');
 
 // Object to store class name counts and quantities
 let classNameData = {};
-let lastProcessedData = {
-    line1: null,
-    line2: null
-};
 
 // Helper function to format scrap rate
 function formatScrapRate(rate) {
@@ -47,42 +43,15 @@ function updateProductionDetails(data) {
     }
 
     try {
-        // Process Line 1
-        if (data.line1_part?.class_name) {
-            const className = data.line1_part.class_name.trim();
-            const currentData = JSON.stringify(data.line1_part);
-            
-            if (className && className !== 'undefined' && className !== 'null' && 
-                currentData !== lastProcessedData.line1) {
-                if (!classNameData[className]) {
-                    classNameData[className] = {
-                        quantity: 0,
-                        partDescription: data.line1_part.part_description || 'Unknown Part'
-                    };
-                }
-                classNameData[className].quantity += 1;
-                lastProcessedData.line1 = currentData;
-                console.log('Updated Line 1 class data:', className, classNameData[className]);
-            }
-        }
-
-        // Process Line 2
-        if (data.line2_part?.class_name) {
-            const className = data.line2_part.class_name.trim();
-            const currentData = JSON.stringify(data.line2_part);
-            
-            if (className && className !== 'undefined' && className !== 'null' && 
-                currentData !== lastProcessedData.line2) {
-                if (!classNameData[className]) {
-                    classNameData[className] = {
-                        quantity: 0,
-                        partDescription: data.line2_part.part_description || 'Unknown Part'
-                    };
-                }
-                classNameData[className].quantity += 1;
-                lastProcessedData.line2 = currentData;
-                console.log('Updated Line 2 class data:', className, classNameData[className]);
-            }
+        // Per-class quantities are counted by the server, so coalesced pushes don't lose parts
+        if (data.class_counts) {
+            classNameData = {};
+            Object.entries(data.class_counts).forEach(([className, counts]) => {
+                classNameData[className] = {
+                    quantity: counts.quantity,
+                    partDescription: counts.part_description || 'Unknown Part'
+                };
+            });
         }
 
         // Clear and rebuild the list
@@ -112,20 +81,9 @@ function updateProductionDetails(data) {
 document.addEventListener('DOMContentLoaded', function() {
     console.log('Production details script loaded, starting data updates');
     
-    // Set up WebSocket connection for production details
-    const socket = io();
-    
-    socket.on('connect', function() {
-        console.log('WebSocket connected for production details');
-    });
-    
-    socket.on('disconnect', function() {
-        console.log('WebSocket disconnected for production details');
-    });
-    
-    socket.on('production_update', function(data) {
-        console.log('WebSocket production update received for details:', data);
-        updateProductionDetails(data);
+    // main.js owns the socket and shares the merged production state
+    document.addEventListener('production-state', function(event) {
+        updateProductionDetails(event.detail);
     });
     
     // Initial load of production details
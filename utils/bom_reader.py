@@ -1,28 +1,126 @@
 import pandas as pd
 import os
-from typing import Dict
+import threading
+import time
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Dict, List, Optional, Tuple
+from .catalogue_cache import read_excel_cached
+from .config import Config
+
+BOM_COLUMNS = ['Class_Name', 'Program', 'Part_Number', 'Part_Description', 'Target']
+
+
+class PartCatalogue:
+    """Immutable, pre-indexed view of the BOM and the Scrap Book.
+
+    All indexes are built once from the parsed workbooks, so every lookup is
+    a dict access. Rows keep their workbook order and the first row wins on
+    duplicate keys, matching the old DataFrame filters.
+    """
+
+    def __init__(self, bom_data: pd.DataFrame, scrap_data: pd.DataFrame):
+        parts_by_class: Dict[str, Dict[str, str]] = {}
+        parts_by_number: Dict[str, Dict[str, str]] = {}
+        parts_by_program: Dict[str, List[Dict[str, str]]] = {}
+
+        for row in bom_data.reindex(columns=BOM_COLUMNS).itertuples(index=False):
+            class_name, program, part_number, description, target = row
+            part = MappingProxyType({
+                'program': str(program),
+                'part_number': str(part_number),
+                'part_description': str(description),
+                'target': str(self._target(target))
+            })
+            if not pd.isna(class_name):
+                parts_by_class.setdefault(str(class_name), part)
+            if not pd.isna(part_number):
+                parts_by_number.setdefault(str(part_number), part)
+            if not pd.isna(program):
+                parts_by_program.setdefault(str(program), []).append(MappingProxyType({
+                    'part_number': part['part_number'],
+                    'part_description': part['part_description'],
+                    'program': part['program']
+                }))
+
+        description_by_code: Dict[str, str] = {}
+        code_by_description: Dict[str, str] = {}
+        if scrap_data.shape[1] >= 2:
+            for code, description in scrap_data.iloc[:, :2].itertuples(index=False):
+                if not pd.isna(code):
+                    description_by_code.setdefault(str(code), str(description))
+                if not pd.isna(description):
+                    code_by_description.setdefault(str(description), str(code))
+
+        self.parts_by_class = MappingProxyType(parts_by_class)
+        self.parts_by_number = MappingProxyType(parts_by_number)
+        self.parts_by_program = MappingProxyType({program: tuple(parts)
+                                                  for program, parts in parts_by_program.items()})
+        self.description_by_code = MappingProxyType(description_by_code)
+        self.code_by_description = MappingProxyType(code_by_description)
+        self.programs = tuple(parts_by_program)
+        self.defect_codes = tuple(description_by_code)
+        self.defect_descriptions = tuple(code_by_description)
+        self.built_at = datetime.now(timezone.utc).replace(microsecond=0)  # Aware: sent as Last-Modified
+        self.bom_rows = len(bom_data)
+        self.scrap_rows = len(scrap_data)
+
+    @staticmethod
+    def _target(value) -> int:
+        """Ensure target is a number"""
+        if pd.isna(value):
+            return 0  # Parts the model doesn't detect have no target
+        try:
+            return int(float(value))
+        except (ValueError, TypeError):
+            print(f"Warning: Invalid target value in BOM: {value}")
+            return 0
+
 
 class BOMReader:
-    def __init__(self, bom_file: str = "BOM.xlsx", scrap_file: str = "Scrap_Book.xlsx"):
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, bom_file: str = "BOM.xlsx", scrap_file: str = "Scrap_Book.xlsx",
+                 cache_dir: Optional[str] = ".catalogue_cache"):
         self.bom_file = bom_file
         self.scrap_file = scrap_file
+        self.cache_dir = cache_dir  # Parsed workbooks are cached here, None to always parse the xlsx
         self.bom_data = None
         self.scrap_data = None
+        self._reload_lock = threading.Lock()
+        start = time.perf_counter()
+        self.source_signature = self.get_source_signature()
         self._load_bom()
         self._load_scrap_book()
+        self.catalogue = PartCatalogue(self.bom_data, self.scrap_data)
+        self.version = 1
+        self.loaded_at = datetime.now()
+        self.last_load_ms = (time.perf_counter() - start) * 1000
+        self.last_error = None
+        self.failed_reloads = 0
+        print(f"Debug - Catalogue loaded in {self.last_load_ms:.1f} ms")
+
+    @classmethod
+    def get_instance(cls) -> 'BOMReader':
+        """Process-wide reader, so the workbooks are parsed once"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = BOMReader(cache_dir=Config().catalogue_cache_dir)
+            return cls._instance
 
     def _load_bom(self) -> None:
         """Load BOM data from Excel file"""
         if not os.path.exists(self.bom_file):
             print(f"Warning: BOM file not found: {self.bom_file}")
-            self.bom_data = pd.DataFrame(columns=['Class_Name', 'Program', 'Part_Number', 'Part_Description', 'Target'])
+            self.bom_data = pd.DataFrame(columns=BOM_COLUMNS)
         else:
             try:
-                self.bom_data = pd.read_excel(self.bom_file)
+                self.bom_data = read_excel_cached(self.bom_file, self.cache_dir)
                 print(f"Successfully loaded BOM with {len(self.bom_data)} entries")
             except Exception as e:
                 print(f"Error loading BOM: {e}")
-                self.bom_data = pd.DataFrame(columns=['Class_Name', 'Program', 'Part_Number', 'Part_Description', 'Target'])
+                self.bom_data = pd.DataFrame(columns=BOM_COLUMNS)
 
     def _load_scrap_book(self) -> None:
         """Load scrap codes from Excel file"""
@@ -31,49 +129,90 @@ class BOMReader:
             self.scrap_data = pd.DataFrame(columns=['Defect_Code', 'Description'])
         else:
             try:
-                self.scrap_data = pd.read_excel(self.scrap_file)
+                self.scrap_data = read_excel_cached(self.scrap_file, self.cache_dir)
                 print(f"Successfully loaded Scrap Book with {len(self.scrap_data)} entries")
             except Exception as e:
                 print(f"Error loading Scrap Book: {e}")
                 self.scrap_data = pd.DataFrame(columns=['Defect_Code', 'Description'])
 
+    def get_source_signature(self) -> Tuple:
+        """(mtime, size) of both workbooks, None for a missing file"""
+        signature = []
+        for path in (self.bom_file, self.scrap_file):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _read_workbooks(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Parse both workbooks, raising if either is unusable"""
+        bom_data = read_excel_cached(self.bom_file, self.cache_dir)
+        scrap_data = read_excel_cached(self.scrap_file, self.cache_dir)
+        missing = [column for column in BOM_COLUMNS if column not in bom_data.columns]
+        if missing:
+            raise ValueError(f"BOM is missing columns: {missing}")
+        if bom_data.empty:
+            raise ValueError("BOM has no rows")
+        if scrap_data.shape[1] < 2 or scrap_data.empty:
+            raise ValueError("Scrap Book needs rows with a code and a description column")
+        return bom_data, scrap_data
+
+    def reload(self) -> bool:
+        """Re-read the workbooks and swap in the new catalogue.
+
+        The catalogue is built off to the side and replaced with a single
+        assignment, so lookups running on other threads see either the old
+        or the new one. On any error the current catalogue is kept.
+        """
+        with self._reload_lock:
+            start = time.perf_counter()
+            signature = self.get_source_signature()
+            try:
+                bom_data, scrap_data = self._read_workbooks()
+                catalogue = PartCatalogue(bom_data, scrap_data)
+            except Exception as e:
+                self.last_error = str(e)
+                self.failed_reloads += 1
+                print(f"Error reloading BOM/Scrap Book, keeping version {self.version}: {e}")
+                return False
+
+            self.bom_data = bom_data
+            self.scrap_data = scrap_data
+            self.catalogue = catalogue
+            self.source_signature = signature
+            self.version += 1
+            self.loaded_at = datetime.now()
+            self.last_load_ms = (time.perf_counter() - start) * 1000
+            self.last_error = None
+            print(f"Debug - Catalogue reloaded as version {self.version} in {self.last_load_ms:.1f} ms "
+                  f"({catalogue.bom_rows} BOM rows, {catalogue.scrap_rows} scrap codes)")
+            return True
+
+    def get_status(self) -> Dict:
+        return {
+            'version': self.version,
+            'loaded_at': self.loaded_at.isoformat(timespec='seconds'),
+            'load_ms': round(self.last_load_ms, 1),
+            'bom_rows': self.catalogue.bom_rows,
+            'scrap_rows': self.catalogue.scrap_rows,
+            'failed_reloads': self.failed_reloads,
+            'last_error': self.last_error
+        }
+
     def get_part_info(self, class_name: str) -> Dict[str, str]:
         """Get part information for a given class name"""
-        if self.bom_data is None:
+        part = self.catalogue.parts_by_class.get(class_name)
+        if part is None:
+            print(f"Class name not found in BOM: {class_name}")
             return self._get_unknown_part_info()
+        return dict(part)
 
-        try:
-            # Find matching row in BOM
-            matching_row = self.bom_data[self.bom_data['Class_Name'] == class_name]
-            
-            if not matching_row.empty:
-                row = matching_row.iloc[0]
-                print(f"\nDebug - BOM Reader - Found part info for {class_name}:")
-                print(f"  Program: {row['Program']}")
-                print(f"  Part Number: {row['Part_Number']}")
-                print(f"  Description: {row['Part_Description']}")
-                # Ensure target is a number
-                try:
-                    target = int(float(row['Target']))
-                    print(f"  Target (raw): {row['Target']}, Type: {type(row['Target'])}")
-                    print(f"  Target (converted): {target}, Type: {type(target)}")
-                except (ValueError, TypeError):
-                    print(f"Warning: Invalid target value in BOM: {row['Target']}")
-                    target = 0
-                
-                return {
-                    'program': str(row['Program']),
-                    'part_number': str(row['Part_Number']),
-                    'part_description': str(row['Part_Description']),
-                    'target': str(target)
-                }
-            else:
-                print(f"Class name not found in BOM: {class_name}")
-                return self._get_unknown_part_info()
-                
-        except Exception as e:
-            print(f"Error retrieving part info: {e}")
-            return self._get_unknown_part_info()
+    def get_part_by_number(self, part_number: str) -> Optional[Dict[str, str]]:
+        """Get part information for a given part number"""
+        part = self.catalogue.parts_by_number.get(str(part_number))
+        return dict(part) if part is not None else None
 
     def _get_unknown_part_info(self) -> Dict[str, str]:
         """Return default values for unknown parts"""
@@ -84,83 +223,26 @@ class BOMReader:
             'target': '0'
         }
 
-    def get_unique_programs(self):
+    def get_unique_programs(self) -> List[str]:
         """Get list of unique programs from BOM"""
-        try:
-            if self.bom_data is None:
-                return []
-            # Get unique values from the 'Program' column
-            programs = self.bom_data['Program'].dropna().unique().tolist()
-            return [str(program) for program in programs]  # Convert all to strings
-        except Exception as e:
-            print(f"Error getting unique programs: {str(e)}")
-            return []
-
-    def get_parts_by_program(self, program):
+        return list(self.catalogue.programs)
+
+    def get_parts_by_program(self, program) -> List[Dict[str, str]]:
         """Get all parts for a specific program"""
-        try:
-            if self.bom_data is None:
-                return []
-            # Filter rows by program and create list of dictionaries
-            parts_df = self.bom_data[self.bom_data['Program'] == program]
-            return [
-                {
-                    'part_number': str(row['Part_Number']),
-                    'part_description': str(row['Part_Description']),
-                    'program': str(row['Program'])
-                }
-                for _, row in parts_df.iterrows()
-            ]
-        except Exception as e:
-            print(f"Error getting parts for program {program}: {str(e)}")
-            return []
-
-    def get_defect_codes(self):
+        return [dict(part) for part in self.catalogue.parts_by_program.get(str(program), ())]
+
+    def get_defect_codes(self) -> List[str]:
         """Get list of defect codes from Scrap Book"""
-        try:
-            if self.scrap_data is None:
-                return []
-            # Get values from column A (Defect Code)
-            codes = self.scrap_data.iloc[:, 0].dropna().unique().tolist()
-            return [str(code) for code in codes]
-        except Exception as e:
-            print(f"Error getting defect codes: {str(e)}")
-            return []
-
-    def get_defect_descriptions(self):
+        return list(self.catalogue.defect_codes)
+
+    def get_defect_descriptions(self) -> List[str]:
         """Get list of descriptions from Scrap Book"""
-        try:
-            if self.scrap_data is None:
-                return []
-            # Get values from column B (Description)
-            descriptions = self.scrap_data.iloc[:, 1].dropna().unique().tolist()
-            return [str(desc) for desc in descriptions]
-        except Exception as e:
-            print(f"Error getting descriptions: {str(e)}")
-            return []
-
-    def get_description_for_code(self, code):
+        return list(self.catalogue.defect_descriptions)
+
+    def get_description_for_code(self, code) -> Optional[str]:
         """Get description for a given defect code"""
-        try:
-            if self.scrap_data is None:
-                return None
-            matching_row = self.scrap_data[self.scrap_data.iloc[:, 0] == code]
-            if not matching_row.empty:
-                return str(matching_row.iloc[0, 1])
-            return None
-        except Exception as e:
-            print(f"Error getting description for code {code}: {str(e)}")
-            return None
-
-    def get_code_for_description(self, description):
+        return self.catalogue.description_by_code.get(str(code))
+
+    def get_code_for_description(self, description) -> Optional[str]:
         """Get defect code for a given description"""
-        try:
-            if self.scrap_data is None:
-                return None
-            matching_row = self.scrap_data[self.scrap_data.iloc[:, 1] == description]
-            if not matching_row.empty:
-                return str(matching_row.iloc[0, 0])
-            return None
-        except Exception as e:
-            print(f"Error getting code for description {description}: {str(e)}")
-            return None
\ No newline at end of file
+        return self.catalogue.code_by_description.get(str(description))
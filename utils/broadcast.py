@@ -0,0 +1,70 @@
+import threading
+from typing import Dict, Generator, Optional, Tuple
+
+
+class FrameBroadcaster:
+    """Holds the latest encoded frame and hands it to any number of viewers.
+
+    The producer publishes each encoded frame once. Viewers wait for a
+    sequence number newer than the one they last sent, so every viewer gets
+    the newest frame and a slow viewer simply skips the frames it missed.
+    The same bytes object is shared by all viewers; nothing is copied.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._frame: Optional[bytes] = None
+        self._sequence = 0
+        self._subscribers = 0
+        self.published = 0
+        self.skipped = 0  # Frames viewers never saw because they were too slow
+
+    def publish(self, frame: bytes) -> int:
+        """Replace the latest frame and wake up all waiting viewers"""
+        with self._condition:
+            self._frame = frame
+            self._sequence += 1
+            self.published += 1
+            self._condition.notify_all()
+            return self._sequence
+
+    def wait_for_frame(self, last_sequence: int, timeout: float = 1.0) -> Tuple[int, Optional[bytes]]:
+        """Block until a frame newer than last_sequence is available.
+
+        Returns (last_sequence, None) if nothing new arrived within the timeout.
+        """
+        with self._condition:
+            if self._sequence <= last_sequence:
+                self._condition.wait_for(lambda: self._sequence > last_sequence, timeout)
+            if self._sequence <= last_sequence:
+                return last_sequence, None
+            if last_sequence:
+                self.skipped += self._sequence - last_sequence - 1
+            return self._sequence, self._frame
+
+    def subscribe(self, timeout: float = 1.0) -> Generator[bytes, None, None]:
+        """Yield every newest frame for one viewer until the viewer disconnects"""
+        with self._condition:
+            self._subscribers += 1
+        try:
+            sequence = 0
+            while True:
+                sequence, frame = self.wait_for_frame(sequence, timeout)
+                if frame is not None:
+                    yield frame
+        finally:
+            with self._condition:
+                self._subscribers -= 1
+
+    def reset(self) -> None:
+        """Drop the held frame so viewers don't see a stale one after a source change"""
+        with self._condition:
+            self._frame = None
+
+    def get_stats(self) -> Dict:
+        return {
+            'sequence': self._sequence,
+            'subscribers': self._subscribers,
+            'published': self.published,
+            'skipped': self.skipped
+        }
@@ -0,0 +1,121 @@
+import argparse
+import hashlib
+import os
+import pickle
+import time
+import pandas as pd
+from typing import Dict, Optional
+
+CACHE_FORMAT = 1
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_path(path: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, os.path.basename(path) + '.pkl')
+
+
+def _load_entry(cache_file: str) -> Optional[Dict]:
+    try:
+        with open(cache_file, 'rb') as f:
+            entry = pickle.load(f)
+    except Exception:
+        return None
+    if not isinstance(entry, dict) or entry.get('format') != CACHE_FORMAT \
+            or entry.get('pandas') != pd.__version__:
+        return None
+    return entry
+
+
+def _store_entry(cache_file: str, entry: Dict) -> None:
+    """Write the cache next to its final name and rename it into place"""
+    try:
+        os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+        temp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(temp_file, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, cache_file)
+    except Exception as e:
+        print(f"Warning: could not write catalogue cache {cache_file}: {e}")
+
+
+def read_excel_cached(path: str, cache_dir: Optional[str] = ".catalogue_cache") -> pd.DataFrame:
+    """pd.read_excel with a pickle cache keyed by the source file's mtime, size and sha256.
+
+    Matching mtime and size loads the cache without reading the workbook.
+    Otherwise the workbook is hashed, and the cache is still used if the
+    content is unchanged (e.g. the file was only touched or copied).
+    Only a real change re-parses the xlsx.
+    """
+    if not cache_dir:
+        return pd.read_excel(path)
+
+    stat = os.stat(path)
+    cache_file = _cache_path(path, cache_dir)
+    entry = _load_entry(cache_file)
+    if entry is not None and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+        return entry['data']
+
+    sha256 = file_sha256(path)
+    if entry is not None and entry['sha256'] == sha256:
+        entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+        _store_entry(cache_file, entry)
+        return entry['data']
+
+    data = pd.read_excel(path)
+    _store_entry(cache_file, {
+        'format': CACHE_FORMAT,
+        'pandas': pd.__version__,
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': sha256,
+        'data': data
+    })
+    return data
+
+
+def compare_startup(paths, cache_dir: str = ".catalogue_cache", runs: int = 5) -> Dict[str, Dict[str, float]]:
+    """Average load time in ms of each workbook parsed from xlsx and loaded from the cache"""
+    results = {}
+    for path in paths:
+        start = time.perf_counter()
+        for _ in range(runs):
+            pd.read_excel(path)
+        parse_ms = (time.perf_counter() - start) * 1000 / runs
+
+        read_excel_cached(path, cache_dir)  # Make sure the cache is warm
+        start = time.perf_counter()
+        for _ in range(runs):
+            read_excel_cached(path, cache_dir)
+        cached_ms = (time.perf_counter() - start) * 1000 / runs
+
+        results[path] = {
+            'xlsx_ms': round(parse_ms, 2),
+            'cached_ms': round(cached_ms, 2),
+            'speedup': round(parse_ms / cached_ms, 1) if cached_ms else 0.0
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare catalogue load time from xlsx and from the parsed cache")
+    parser.add_argument('files', nargs='*', default=["BOM.xlsx", "Scrap_Book.xlsx"])
+    parser.add_argument('--cache-dir', default=".catalogue_cache")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    results = compare_startup(args.files, args.cache_dir, args.runs)
+    print(f"{'File':<24}{'xlsx (ms)':>12}{'cache (ms)':>12}{'speedup':>10}")
+    for path, result in results.items():
+        print(f"{os.path.basename(path):<24}{result['xlsx_ms']:>12.2f}{result['cached_ms']:>12.2f}"
+              f"{result['speedup']:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
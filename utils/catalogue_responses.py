@@ -0,0 +1,78 @@
+import hashlib
+import json
+import threading
+from datetime import datetime
+from typing import Optional, Tuple
+from .bom_reader import BOMReader, PartCatalogue
+
+
+class CatalogueResponse:
+    """Serialized JSON body of one catalogue endpoint and its validators"""
+
+    __slots__ = ('body', 'etag', 'last_modified')
+
+    def __init__(self, payload, last_modified: datetime):
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.etag = hashlib.sha1(self.body).hexdigest()[:20]
+        self.last_modified = last_modified
+
+
+class CatalogueResponseCache:
+    """Pre-serialized responses of the scrap form endpoints, rebuilt once per catalogue version.
+
+    The catalogue is immutable, so the responses built from it never go
+    stale. They are rebuilt only when BOMReader swaps in a new catalogue.
+    ETags are content hashes, so they stay valid across restarts.
+    """
+
+    def __init__(self, bom_reader: Optional[BOMReader] = None):
+        self.bom_reader = bom_reader or BOMReader.get_instance()
+        self._lock = threading.Lock()
+        # (catalogue, named responses, responses per program, empty parts response)
+        self._state: Optional[Tuple] = None
+        self.builds = 0
+
+    def _current(self) -> Tuple:
+        catalogue = self.bom_reader.catalogue
+        state = self._state
+        if state is None or state[0] is not catalogue:
+            with self._lock:
+                state = self._state
+                if state is None or state[0] is not catalogue:
+                    state = self._state = self._build(catalogue)
+        return state
+
+    def _build(self, catalogue: PartCatalogue) -> Tuple:
+        built_at = catalogue.built_at
+        parts_by_program = {program: [dict(part) for part in parts]
+                            for program, parts in catalogue.parts_by_program.items()}
+        programs = sorted(catalogue.programs)
+        defect_codes = sorted(catalogue.defect_codes)
+        defect_descriptions = sorted(catalogue.defect_descriptions)
+
+        responses = {
+            'programs': CatalogueResponse(programs, built_at),
+            'defect_codes': CatalogueResponse(defect_codes, built_at),
+            'defect_descriptions': CatalogueResponse(defect_descriptions, built_at),
+            'bootstrap': CatalogueResponse({
+                'programs': programs,
+                'parts_by_program': parts_by_program,
+                'defect_codes': defect_codes,
+                'defect_descriptions': defect_descriptions,
+                'description_by_code': dict(catalogue.description_by_code),
+                'code_by_description': dict(catalogue.code_by_description)
+            }, built_at)
+        }
+        parts = {program: CatalogueResponse(program_parts, built_at)
+                 for program, program_parts in parts_by_program.items()}
+
+        self.builds += 1
+        return catalogue, responses, parts, CatalogueResponse([], built_at)
+
+    def get(self, name: str) -> CatalogueResponse:
+        """Response for 'programs', 'defect_codes', 'defect_descriptions' or 'bootstrap'"""
+        return self._current()[1][name]
+
+    def get_parts(self, program: str) -> CatalogueResponse:
+        _, _, parts, empty_parts = self._current()
+        return parts.get(program, empty_parts)
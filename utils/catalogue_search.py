@@ -0,0 +1,197 @@
+import argparse
+import bisect
+import random
+import threading
+import time
+import unicodedata
+import pandas as pd
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from .bom_reader import BOMReader, PartCatalogue, BOM_COLUMNS
+
+MAX_PREFIX_SCAN = 2000  # Keys looked at per tier when filters reject most matches
+
+
+def normalize(text: str) -> str:
+    """Case- and accent-insensitive form used for matching ("Dañada" -> "danada")"""
+    text = str(text)
+    if text.isascii():
+        return text.casefold().strip()
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold().strip()
+
+
+def _trigrams(text: str):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class CatalogueSearchIndex:
+    """Typeahead index over BOM parts and Scrap Book defect codes.
+
+    Results rank as exact matches, then prefixes of a whole field, then
+    prefixes of a word inside a field, then substrings; within each class
+    by field priority and alphabetically. Every (class, field priority)
+    pair is its own sorted key list, so a lookup walks the tiers in rank
+    order with a bisect each and stops as soon as the limit is filled.
+    Substrings go through a trigram posting index and are only looked up
+    when the prefix tiers come up short; they keep workbook order.
+    """
+
+    # (field, priority): lower priority ranks first within a match class
+    PART_FIELDS = (('part_number', 0), ('part_description', 2), ('program', 3))
+    DEFECT_FIELDS = (('code', 0), ('description', 1))
+
+    def __init__(self, catalogue: PartCatalogue):
+        self.entries: List[Dict[str, str]] = []
+        self._fields: List[List[Tuple[str, str]]] = []  # Per entry: (field, normalized value)
+        self._exact: Dict[str, List[Tuple[int, int, int]]] = {}  # value -> (priority, entry, field index)
+        tiers: Dict[Tuple[int, int], List[Tuple[str, int, int]]] = {}  # (word?, priority) -> keys
+        postings: Dict[str, List[int]] = defaultdict(list)
+
+        seen_parts = set()
+        for parts in catalogue.parts_by_program.values():
+            for part in parts:
+                identity = (part['program'], part['part_number'])
+                if identity in seen_parts:
+                    continue
+                seen_parts.add(identity)
+                self._add(dict(part, kind='part'), self.PART_FIELDS, tiers, postings)
+        for code, description in catalogue.description_by_code.items():
+            self._add({'kind': 'defect', 'code': code, 'description': description},
+                      self.DEFECT_FIELDS, tiers, postings)
+
+        self._tiers = []
+        for tier in sorted(tiers):
+            keys = sorted(tiers[tier])
+            self._tiers.append(([key[0] for key in keys], [key[1:] for key in keys]))
+        for matches in self._exact.values():
+            matches.sort()
+        self._postings = {trigram: tuple(ids) for trigram, ids in postings.items()}
+
+    def _add(self, entry: Dict[str, str], fields, tiers: Dict, postings: Dict[str, List[int]]) -> None:
+        entry_id = len(self.entries)
+        self.entries.append(entry)
+        normalized = []
+        trigrams = set()
+        for field_index, (field, priority) in enumerate(fields):
+            value = normalize(entry.get(field, ''))
+            normalized.append((field, value))
+            if not value or value == 'nan':
+                continue
+            self._exact.setdefault(value, []).append((priority, entry_id, field_index))
+            tiers.setdefault((0, priority), []).append((value, entry_id, field_index))
+            words = value.replace('/', ' ').replace('-', ' ').split()
+            for word in set(words[1:]) - {words[0]}:
+                tiers.setdefault((1, priority), []).append((word, entry_id, field_index))
+            trigrams.update(_trigrams(value))
+        for trigram in trigrams:
+            postings[trigram].append(entry_id)
+        self._fields.append(normalized)
+
+    def search(self, query: str, limit: int = 10, kind: Optional[str] = None,
+               program: Optional[str] = None) -> List[Dict[str, str]]:
+        """Ranked entries matching query as a prefix or substring of any field"""
+        text = normalize(query)
+        if not text or limit <= 0:
+            return []
+        results: Dict[int, str] = {}  # entry -> matched field, in rank order
+
+        def accept(entry_id: int, field_index: int) -> bool:
+            if entry_id in results:
+                return False
+            entry = self.entries[entry_id]
+            if (kind and entry['kind'] != kind) or (program and entry.get('program') != program):
+                return False
+            results[entry_id] = self._fields[entry_id][field_index][0]
+            return len(results) >= limit
+
+        for _, entry_id, field_index in self._exact.get(text, ()):
+            if accept(entry_id, field_index):
+                return self._render(results)
+
+        for keys, refs in self._tiers:
+            position = bisect.bisect_left(keys, text)
+            for position in range(position, min(position + MAX_PREFIX_SCAN, len(keys))):
+                if not keys[position].startswith(text):
+                    break
+                if accept(*refs[position]):
+                    return self._render(results)
+
+        if len(text) >= 3:
+            # Walk the rarest trigram's posting in entry order and check the full substring
+            candidates = min((self._postings.get(trigram, ()) for trigram in _trigrams(text)), key=len)
+            for entry_id in candidates:
+                if entry_id in results:
+                    continue
+                for field_index, (_, value) in enumerate(self._fields[entry_id]):
+                    if text in value:
+                        if accept(entry_id, field_index):
+                            return self._render(results)
+                        break
+        return self._render(results)
+
+    def _render(self, results: Dict[int, str]) -> List[Dict[str, str]]:
+        return [dict(self.entries[entry_id], matched_field=field) for entry_id, field in results.items()]
+
+
+class CatalogueSearch:
+    """Search index over the current catalogue, rebuilt when the catalogue is reloaded"""
+
+    def __init__(self, bom_reader: Optional[BOMReader] = None):
+        self.bom_reader = bom_reader or BOMReader.get_instance()
+        self._lock = threading.Lock()
+        self._state: Optional[Tuple[PartCatalogue, CatalogueSearchIndex]] = None
+
+    def get_index(self) -> CatalogueSearchIndex:
+        catalogue = self.bom_reader.catalogue
+        state = self._state
+        if state is None or state[0] is not catalogue:
+            with self._lock:
+                state = self._state
+                if state is None or state[0] is not catalogue:
+                    state = self._state = (catalogue, CatalogueSearchIndex(catalogue))
+        return state[1]
+
+    def search(self, query: str, limit: int = 10, kind: Optional[str] = None,
+               program: Optional[str] = None) -> List[Dict[str, str]]:
+        return self.get_index().search(query, limit, kind, program)
+
+
+def _synthetic_catalogue(rows: int) -> PartCatalogue:
+    rng = random.Random(0)
+    programs = [f"PROGRAM {i}" for i in range(40)]
+    words = ["inner", "outer", "housing", "lid", "bracket", "cover", "panel", "frame", "door", "trim"]
+    bom = pd.DataFrame([[None, rng.choice(programs), f"P{i:07d}",
+                         f"{rng.choice(words).title()} / {rng.choice(words)} / {i}", None]
+                        for i in range(rows)], columns=BOM_COLUMNS)
+    scrap = pd.DataFrame([[f"R{i:03d}", f"Defect {rng.choice(words)} {i}"] for i in range(500)],
+                         columns=['Codigo', 'DESCRIPCION'])
+    return PartCatalogue(bom, scrap)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark catalogue typeahead search")
+    parser.add_argument('--rows', type=int, default=50000, help="Synthetic BOM rows")
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    catalogue = _synthetic_catalogue(args.rows)
+    start = time.perf_counter()
+    index = CatalogueSearchIndex(catalogue)
+    print(f"Indexed {len(index.entries)} entries in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    rng = random.Random(1)
+    queries = [f"P{rng.randrange(args.rows):07d}"[:rng.randint(2, 8)] for _ in range(args.queries // 2)]
+    queries += [rng.choice(["hous", "lid", "oute", "r01", "defect br", "cover / do"]) for _ in range(args.queries // 2)]
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(f"{len(timings)} queries: median {timings[len(timings) // 2]:.3f} ms, "
+          f"p95 {timings[int(len(timings) * 0.95)]:.3f} ms, max {timings[-1]:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
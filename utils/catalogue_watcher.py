@@ -0,0 +1,73 @@
+import threading
+from typing import Dict, Optional
+from .bom_reader import BOMReader
+
+
+class CatalogueWatcher:
+    """Polls BOM.xlsx and Scrap_Book.xlsx and hot-reloads the catalogue when they change.
+
+    A change is only picked up once the files have looked the same on two
+    polls in a row, so a workbook that is still being saved is not parsed
+    half-written. A failed parse is not retried until the files change again.
+    """
+
+    def __init__(self, bom_reader: Optional[BOMReader] = None, interval: float = 2.0):
+        self.bom_reader = bom_reader or BOMReader.get_instance()
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._pending_signature = None
+        self._failed_signature = None
+        self.checks = 0
+        self.reloads = 0
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="catalogue-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1.0)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Error in catalogue watcher: {e}")
+
+    def check(self) -> bool:
+        """Reload if the workbooks changed and have settled; True if a reload happened"""
+        self.checks += 1
+        signature = self.bom_reader.get_source_signature()
+        if signature == self.bom_reader.source_signature or signature == self._failed_signature:
+            self._pending_signature = None
+            return False
+        if None in signature or signature != self._pending_signature:
+            # Wait one more poll for the save to finish
+            self._pending_signature = signature
+            return False
+
+        self._pending_signature = None
+        if self.bom_reader.reload():
+            self.reloads += 1
+            self._failed_signature = None
+            return True
+        self._failed_signature = signature
+        return False
+
+    def get_status(self) -> Dict:
+        status = self.bom_reader.get_status()
+        status.update({
+            'watching': self._thread is not None and self._thread.is_alive(),
+            'poll_interval': self.interval,
+            'checks': self.checks,
+            'reloads': self.reloads,
+            'change_pending': self._pending_signature is not None
+        })
+        return status
@@ -1,8 +1,77 @@
 class Config:
     def __init__(self):
         self.model_path = "best.pt"
+        self.inference_backend = "pytorch"  # pytorch, onnx or openvino
+        self.inference_int8 = False  # Use the INT8 quantized export of the backend
         self.confidence_threshold = 0.95
         self.frame_width = 1020
         self.frame_height = 600
         self.camera_id = "/dev/video0"
-        self.frame_rate = 25
\ No newline at end of file
+        self.frame_rate = 25
+
+        # Region of interest: run inference only on a crop around the counting band
+        self.roi_enabled = False
+        self.roi_margin = 200  # Pixels of lead-in on each side of the band for tracking
+
+        # Motion gate: skip the detector while nothing moves around the counting band
+        self.motion_gate_enabled = False
+        self.motion_pixel_threshold = 25  # Grey-level change that counts as motion
+        self.motion_min_changed_fraction = 0.002  # Fraction of changed pixels that counts as motion
+        self.motion_hold_frames = 25  # Frames to keep detecting after motion stops
+
+        # Keyframe mode: full detection every few frames, Kalman prediction in between
+        self.keyframe_enabled = False
+        self.keyframe_max_interval = 4  # Upper bound on frames between detections
+        self.keyframe_max_displacement = 30  # Pixels the fastest part may move between detections
+        self.keyframe_uncertainty_px = 10  # Prediction sigma that forces a detection
+
+        # Track bookkeeping limits for 24/7 running
+        self.track_ttl_seconds = 300  # Forget tracks not seen for this long
+        self.track_max_entries = 10000  # Hard cap on tracks held per store
+        self.track_recount_window_seconds = 600  # Evicted ids can't be counted again within this window
+
+        # Hot reload of BOM.xlsx / Scrap_Book.xlsx
+        self.catalogue_watch_enabled = True
+        self.catalogue_poll_interval = 2.0  # Seconds between mtime checks
+        self.catalogue_cache_dir = ".catalogue_cache"  # Parsed workbook cache, None to disable
+
+        # Scrap journal (SQLite, WAL mode); weekly workbooks are exported from it
+        self.scrap_journal_path = "scrap_journal.db"
+        self.scrap_spool_path = "scrap_spool.jsonl"  # fsynced queue in front of the journal
+        self.scrap_history_cache_size = 100  # Newest entries kept in memory for the live page
+        self.scrap_export_dir = "scrap_exports"  # Exported weekly workbooks, kept apart from the legacy ones
+
+        # Crossing log: buffered CSV per period, workbooks exported on demand
+        self.crossing_log_dir = "production_logs"
+        self.crossing_log_flush_interval = 1.0  # Seconds between batched writes
+        self.crossing_log_rollover = "day"  # One file per day or per shift
+
+        # Shift calendar: shift/hour rollups with targets prorated by scheduled working time
+        self.shift_calendar_file = "Flock_Shifts.xlsx"
+        self.shift_break_minutes = 30  # The workbook only gives break start times
+        self.rollup_keep_shifts = 21  # Closed shifts kept queryable in memory
+        self.rollup_keep_hours = 168
+
+        # Chart time series: ring buffers per line at second, minute and hour resolution
+        self.timeseries_second_slots = 3600  # Last hour
+        self.timeseries_minute_slots = 1440  # Last day
+        self.timeseries_hour_slots = 336  # Last two weeks
+        self.timeseries_rolling_seconds = 900  # Trailing window of the rolling PPH
+
+        # Production event store: every count/scrap event is persisted, state is snapshotted
+        self.production_event_db = "production_events.db"
+        self.production_snapshot_every = 500  # Events between snapshots, bounds replay on startup
+
+        # Columnar history (Parquet by week and line) for multi-week reports; needs pyarrow
+        self.history_dir = "history"
+        self.history_compact_interval = 60.0  # Seconds between incremental compactions
+        self.history_max_files_per_partition = 8  # Small files are merged beyond this
+
+        # Dashboard pushes: deltas since each client's acknowledged version, coalesced
+        self.dashboard_push_rate = 4.0  # Max production_update pushes per second
+        self.dashboard_ack_timeout = 5.0  # Seconds before an unacknowledged push is resent
+
+        # Frame pipeline (capture -> inference -> annotate -> encode)
+        self.pipeline_queue_size = 2
+        self.pipeline_drop_policy = "drop_oldest"  # drop_oldest, drop_newest or block
+        self.jpeg_quality = 85
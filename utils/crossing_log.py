@@ -0,0 +1,243 @@
+import csv
+import os
+import re
+import tempfile
+import threading
+import time
+import xlsxwriter
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from .config import Config
+from .shift_calendar import ShiftCalendar
+
+LOG_COLUMNS = ['timestamp', 'line', 'track_id', 'class_name', 'program', 'part_number', 'part_description']
+
+# Workbook layouts for on-demand exports: (header, log column or function of the row)
+EXPORT_LAYOUTS = {
+    'production_log': [
+        ("Timestamp", 'timestamp'),
+        ("Line", 'line'),
+        ("Class Name", 'class_name'),
+        ("Program", 'program'),
+        ("Part Number", 'part_number'),
+        ("Description", 'part_description')
+    ],
+    'flock_report': [
+        ("Class Name", 'class_name'),
+        ("Program", 'program'),
+        ("Part Number", 'part_number'),
+        ("Part Description", 'part_description'),
+        ("Day", lambda row: row['timestamp'][:10]),
+        ("Time", lambda row: row['timestamp'][11:19])
+    ]
+}
+
+
+def daily_period(moment: datetime) -> str:
+    return moment.strftime('%Y-%m-%d')
+
+
+class CrossingLog:
+    """Buffered, rolling log of counted crossings.
+
+    record() only appends to an in-memory buffer. A background thread
+    appends the buffer to the CSV file of each entry's period (one file per
+    day by default) every flush_interval seconds, or sooner once
+    flush_batch entries are waiting. Workbooks are built from those files
+    on demand with export_xlsx().
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, directory: str = "production_logs", flush_interval: float = 1.0, flush_batch: int = 200,
+                 period_of: Callable[[datetime], str] = daily_period):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.flush_batch = max(1, flush_batch)
+        self.period_of = period_of
+        os.makedirs(directory, exist_ok=True)
+        self._buffer: deque = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.recorded = 0
+        self.written = 0
+        self.flushes = 0
+        self.failures = 0
+        self.last_error = None
+
+    @classmethod
+    def get_instance(cls) -> 'CrossingLog':
+        with cls._instance_lock:
+            if cls._instance is None:
+                config = Config()
+                period_of = daily_period
+                if config.crossing_log_rollover == 'shift':
+                    period_of = ShiftCalendar.get_instance().period_key
+                cls._instance = CrossingLog(config.crossing_log_dir, config.crossing_log_flush_interval,
+                                            period_of=period_of)
+                cls._instance.start()
+            return cls._instance
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="crossing-log", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5.0)
+            self._thread = None
+        self.flush()
+
+    def record(self, line: str, crossing: Dict, moment: Optional[datetime] = None) -> None:
+        """Queue one counted crossing; crossing carries the part info of LineCounter's crossing data"""
+        moment = moment or datetime.now()
+        row = {
+            'timestamp': moment.strftime('%Y-%m-%d %H:%M:%S'),
+            'line': line,
+            'track_id': crossing.get('track_id', ''),
+            'class_name': crossing.get('class_name', ''),
+            'program': crossing.get('program', ''),
+            'part_number': crossing.get('part_number', ''),
+            'part_description': crossing.get('part_description', '')
+        }
+        with self._lock:
+            self._buffer.append((self.period_of(moment), row))
+            self.recorded += 1
+            full = len(self._buffer) >= self.flush_batch
+        if full:
+            self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """Append everything buffered to the period files; returns the number of rows written"""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._buffer)
+            if not batch:
+                return 0
+
+            by_period: Dict[str, List[Dict]] = {}
+            for period, row in batch:
+                by_period.setdefault(period, []).append(row)
+            try:
+                for period, rows in by_period.items():
+                    path = self.path_for(period)
+                    new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+                    with open(path, 'a', newline='', encoding='utf-8') as f:
+                        writer = csv.DictWriter(f, fieldnames=LOG_COLUMNS)
+                        if new_file:
+                            writer.writeheader()
+                        writer.writerows(rows)
+                        f.flush()
+                        os.fsync(f.fileno())
+            except Exception as e:
+                # Rows stay buffered and go out with the next flush
+                self.failures += 1
+                self.last_error = str(e)
+                print(f"Error flushing crossing log: {e}")
+                return 0
+
+            with self._lock:
+                for _ in batch:
+                    self._buffer.popleft()
+            self.written += len(batch)
+            self.flushes += 1
+            self.last_error = None
+            return len(batch)
+
+    def path_for(self, period: str) -> str:
+        return os.path.join(self.directory, f"crossings_{period}.csv")
+
+    def periods(self) -> List[str]:
+        """Periods that have a log file, oldest first"""
+        names = [name for name in os.listdir(self.directory) if name.startswith('crossings_') and name.endswith('.csv')]
+        return sorted(name[len('crossings_'):-len('.csv')] for name in names)
+
+    def export_xlsx(self, period: Optional[str] = None, filename: Optional[str] = None,
+                    layout: str = 'production_log') -> str:
+        """Stream one period's log into a workbook, rows in the order they were counted"""
+        self.flush()
+        period = period or self.period_of(datetime.now())
+        if not re.fullmatch(r'[\w-]+', period):
+            raise ValueError(f"Invalid period: {period}")
+        columns = EXPORT_LAYOUTS[layout]
+        filename = filename or os.path.join(self.directory, f"{layout}_{period}.xlsx")
+        source = self.path_for(period)
+
+        temp_fd, temp_path = tempfile.mkstemp(suffix='.xlsx', dir=os.path.dirname(os.path.abspath(filename)))
+        os.close(temp_fd)
+        rows_written = 0
+        try:
+            workbook = xlsxwriter.Workbook(temp_path, {'constant_memory': True})
+            worksheet = workbook.add_worksheet()
+            header_format = workbook.add_format({'bold': True, 'bg_color': '#D3D3D3'})
+            for col_num, (header, _) in enumerate(columns):
+                worksheet.set_column(col_num, col_num, max(len(header) + 2, 14))
+                worksheet.write(0, col_num, header, header_format)
+            if os.path.exists(source):
+                with open(source, newline='', encoding='utf-8') as f:
+                    for row in csv.DictReader(f):
+                        rows_written += 1
+                        for col_num, (_, value) in enumerate(columns):
+                            worksheet.write(rows_written, col_num, value(row) if callable(value) else row[value])
+            workbook.close()
+            os.replace(temp_path, filename)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        print(f"Exported {rows_written} crossings of {period} to {filename}")
+        return filename
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            buffered = len(self._buffer)
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'buffered': buffered,
+            'recorded': self.recorded,
+            'written': self.written,
+            'flushes': self.flushes,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'current_period': self.period_of(datetime.now())
+        }
+
+
+def benchmark(crossings: int = 20000) -> Dict[str, float]:
+    """Per-crossing cost of record() and the cost of a full flush and export"""
+    with tempfile.TemporaryDirectory() as directory:
+        log = CrossingLog(directory, flush_batch=crossings + 1)
+        crossing = {'track_id': 1, 'class_name': 'Tesla_M3', 'program': 'TESLA M3',
+                    'part_number': '4296625XXX', 'part_description': 'Tesla / M3 / GB Inner'}
+        start = time.perf_counter()
+        for _ in range(crossings):
+            log.record('Line 1', crossing)
+        record_us = (time.perf_counter() - start) * 1e6 / crossings
+        start = time.perf_counter()
+        log.flush()
+        flush_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        log.export_xlsx(filename=os.path.join(directory, 'export.xlsx'))
+        export_ms = (time.perf_counter() - start) * 1000
+    return {'crossings': crossings, 'record_us': round(record_us, 2),
+            'flush_ms': round(flush_ms, 1), 'export_ms': round(export_ms, 1)}
+
+
+if __name__ == '__main__':
+    print(benchmark())
@@ -0,0 +1,165 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Tuple
+
+_MISSING = object()
+
+
+def flatten(data: Dict, prefix: Tuple = ()) -> Dict[Tuple, object]:
+    """{'a': {'b': 1}} -> {('a', 'b'): 1}; dictionaries are walked (empty ones vanish), everything else is a leaf.
+
+    Paths are tuples of keys, so keys such as class names may contain any character.
+    """
+    flat = {}
+    for key, value in data.items():
+        path = prefix + (key,)
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        else:
+            flat[path] = value
+    return flat
+
+
+def nest(flat: Dict[Tuple, object]) -> Dict:
+    """Inverse of flatten() for a subset of paths"""
+    nested: Dict = {}
+    for path, value in flat.items():
+        node = nested
+        *parents, leaf = path
+        for key in parents:
+            node = node.setdefault(key, {})
+        node[leaf] = value
+    return nested
+
+
+class DashboardPublisher:
+    """Pushes the tracker's versioned state to dashboard clients as deltas.
+
+    Crossings and scrap only call notify(). A background thread sends at
+    most max_rate pushes per second, so a burst of parts is coalesced
+    into one push. Every leaf of the state remembers the version it last
+    changed in. A client is sent the leaves that changed after the
+    version it acknowledged, and gets nothing more until it acknowledges
+    that push or ack_timeout passes; a slow client therefore only ever
+    has one push in flight. On (re)connect a client gets the full state.
+    """
+
+    def __init__(self, tracker, socket, max_rate: float = 4.0, ack_timeout: float = 5.0,
+                 event: str = 'production_update'):
+        self.tracker = tracker
+        self.socket = socket
+        self.min_interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.ack_timeout = ack_timeout
+        self.event = event
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._version = -1
+        self._values: Dict[Tuple, object] = {}
+        self._changed_in: Dict[Tuple, int] = {}  # Leaf path -> version it last changed in
+        self._clients: Dict[str, Dict] = {}  # sid -> acked / sent version and when it was sent
+        self.pushes = 0
+        self.full_pushes = 0
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="dashboard-push", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def notify(self) -> None:
+        """The tracker changed; push it with the next tick"""
+        self._wake.set()
+
+    def _refresh(self) -> int:
+        """Record which leaves changed since the last refresh; returns the current version"""
+        version, data = self.tracker.get_versioned_data()
+        if version != self._version:
+            for path, value in flatten(data).items():
+                if self._values.get(path, _MISSING) != value:
+                    self._values[path] = value
+                    self._changed_in[path] = version
+            self._version = version
+        return version
+
+    def add_client(self, sid: str) -> None:
+        """Send a newly connected (or resyncing) client the full state"""
+        with self._lock:
+            version = self._refresh()
+            self._clients[sid] = {'acked': version, 'sent': version, 'sent_at': time.monotonic()}
+            payload = {'version': version, 'full': True, 'state': nest(self._values),
+                       'current_time': datetime.now().strftime("%H:%M:%S")}
+            self.full_pushes += 1
+        self.socket.emit(self.event, payload, to=sid)
+
+    def remove_client(self, sid: str) -> None:
+        with self._lock:
+            self._clients.pop(sid, None)
+
+    def ack(self, sid: str, version: int) -> None:
+        with self._lock:
+            client = self._clients.get(sid)
+            if client:
+                # A client can't acknowledge more than it was sent
+                client['acked'] = max(client['acked'], min(version, client['sent']))
+                if client['acked'] < self._version:
+                    self._wake.set()  # Changes queued up behind the push it just acknowledged
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            # Wake up on changes, and now and then to resend unacknowledged pushes
+            self._wake.wait(self.ack_timeout)
+            self._wake.clear()
+            if self._stop_event.is_set():
+                return
+            try:
+                self.push()
+            except Exception as e:
+                print(f"Error pushing production update: {e}")
+            # Changes arriving during this pause are coalesced into the next push
+            self._stop_event.wait(self.min_interval)
+
+    def push(self) -> int:
+        """Send each client what changed since its acknowledged version; returns the number of pushes"""
+        outgoing = []
+        now = time.monotonic()
+        with self._lock:
+            version = self._refresh()
+            for sid, client in self._clients.items():
+                if client['acked'] >= version:
+                    continue  # Up to date
+                if client['sent'] > client['acked'] and now - client['sent_at'] < self.ack_timeout:
+                    continue  # Previous push still in flight
+                changes = {path: value for path, value in self._values.items()
+                           if self._changed_in[path] > client['acked']}
+                outgoing.append((sid, {'version': version, 'base': client['acked'], 'full': False,
+                                       'changes': nest(changes),
+                                       'current_time': datetime.now().strftime("%H:%M:%S")}))
+                client['sent'] = version
+                client['sent_at'] = now
+            self.pushes += len(outgoing)
+        for sid, payload in outgoing:
+            self.socket.emit(self.event, payload, to=sid)
+        return len(outgoing)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'running': self._thread is not None and self._thread.is_alive(),
+                'version': self._version,
+                'clients': len(self._clients),
+                'lagging_clients': sum(1 for client in self._clients.values()
+                                       if client['acked'] < self._version),
+                'pushes': self.pushes,
+                'full_pushes': self.full_pushes
+            }
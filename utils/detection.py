@@ -1,23 +1,89 @@
 import cv2
-from ultralytics import YOLO
-from typing import Dict, List
+import numpy as np
+from typing import Dict, Tuple
 from .config import Config
 from .line_counter import LineCounter
 from .production_tracker import ProductionTracker
+from .crossing_log import CrossingLog
+from .rollups import ProductionRollups
+from .shift_calendar import ShiftCalendar
+from .timeseries import TimeSeriesStore
+from .scrap_stats import ScrapStats
+from .event_store import ProductionEventStore
 from .line_drawing import LineDrawer
 from .event_manager import EventManager
+from .inference_backend import load_model
+from .motion_gate import MotionGate
+from .track_propagation import KeyframeScheduler
+from .detections import Detections
+
+def counting_region(line_counter: LineCounter, config: Config) -> Tuple[int, int]:
+    """Horizontal pixel range [x_start, x_end) of the counting band plus its lead-in"""
+    width = config.frame_width
+    if line_counter.frame_width == 0:
+        return 0, width
+    line1_x = int(line_counter.frame_width * line_counter.line1_x)
+    line2_x = int(line_counter.frame_width * line_counter.line2_x)
+    return max(0, line1_x - config.roi_margin), min(width, line2_x + config.roi_margin)
+
+
+def inference_region(line_counter: LineCounter, config: Config) -> Tuple[int, int]:
+    """Horizontal pixel range [x_start, x_end) that inference runs on"""
+    if not config.roi_enabled:
+        return 0, config.frame_width
+    return counting_region(line_counter, config)
+
+
+def crop_to_region(frame: cv2.Mat, region: Tuple[int, int]) -> cv2.Mat:
+    """Cut the inference region out of a frame"""
+    x_start, x_end = region
+    if x_start == 0 and x_end >= frame.shape[1]:
+        return frame
+    return np.ascontiguousarray(frame[:, x_start:x_end])
+
+
+def extract_detections(result, names: Dict[int, str], x_offset: int = 0) -> Detections:
+    """Pull the tracked boxes of one result out as NumPy arrays, without per-box Python objects.
+
+    x_offset maps boxes from a cropped inference region back to frame space.
+    """
+    if result.boxes is None or result.boxes.id is None:
+        return Detections.empty(names)
+    boxes = result.boxes.xyxy.int().cpu().numpy()
+    if x_offset:
+        boxes[:, [0, 2]] += x_offset
+    return Detections(boxes,
+                      result.boxes.cls.int().cpu().numpy().astype(np.int64),
+                      result.boxes.id.int().cpu().numpy().astype(np.int64),
+                      names)
+
 
 class ObjectDetector:
     instance = None
 
     def __init__(self):
         self.config = Config()
-        self.model = YOLO(self.config.model_path)
+        self.model = load_model(self.config)
         self.model.conf = self.config.confidence_threshold
-        self.names = self.model.model.names
+        self.names = self.model.names
         self.line_counter = LineCounter()
-        self.production_tracker = ProductionTracker()
+        self.production_tracker = ProductionTracker(
+            crossing_log=CrossingLog.get_instance(),
+            event_store=ProductionEventStore(self.config.production_event_db),
+            snapshot_every=self.config.production_snapshot_every,
+            rollups=ProductionRollups(ShiftCalendar.get_instance(), self.config.rollup_keep_shifts,
+                                      self.config.rollup_keep_hours),
+            timeseries=TimeSeriesStore(ShiftCalendar.get_instance(), self.config.timeseries_second_slots,
+                                       self.config.timeseries_minute_slots, self.config.timeseries_hour_slots),
+            scrap_stats=ScrapStats(ShiftCalendar.get_instance(), self.config.rollup_keep_shifts))
+        self.production_tracker.recover()
         self.line_drawer = LineDrawer()
+        self.motion_gate = MotionGate(self.config.motion_pixel_threshold,
+                                      self.config.motion_min_changed_fraction,
+                                      self.config.motion_hold_frames)
+        self.keyframe_scheduler = KeyframeScheduler(self.config.keyframe_max_interval,
+                                                    self.config.keyframe_max_displacement,
+                                                    self.config.keyframe_uncertainty_px)
         # Set up event manager
         event_manager = EventManager.get_instance()
         event_manager.set_production_tracker(self.production_tracker)
@@ -26,48 +92,37 @@ class ObjectDetector:
     def process_frame(self, frame: cv2.Mat) -> cv2.Mat:
         if frame is None:
             return frame
-            
+        frame, detections = self.detect(frame)
+        return self.annotate(frame, detections)
+
+    def detect(self, frame: cv2.Mat) -> Tuple[cv2.Mat, Detections]:
+        """Run tracking on a frame and update the line counts"""
         # Resize frame first to ensure consistent coordinates
         frame = cv2.resize(frame, (self.config.frame_width, self.config.frame_height))
         
         # Update line counter with frame dimensions
         self.line_counter.update_frame_dimensions(self.config.frame_width, self.config.frame_height)
         
-        # Run detection
-        results = self.model.track(frame, persist=True)
-        detections = []
-        
-        if results[0].boxes is not None and results[0].boxes.id is not None:
-            boxes = results[0].boxes.xyxy.int().cpu().tolist()
-            class_ids = results[0].boxes.cls.int().cpu().tolist()
-            track_ids = results[0].boxes.id.int().cpu().tolist()
-
-            for box, class_id, track_id in zip(boxes, class_ids, track_ids):
-                class_name = self.names[class_id]
-                x1, y1, x2, y2 = box
-                
-                detection = {
-                    'class_name': class_name,
-                    'track_id': int(track_id),
-                    'box': box,
-                    'center': ((x1 + x2) / 2, (y1 + y2) / 2)  # Add center point
-                }
-                detections.append(detection)
-                
-                # Draw detection box and label
-                color = (0, 255, 0)  # Green color for box
-                cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                
-                # Draw class name at top
-                cv2.putText(frame, f'{class_name}', (x1, y1 - 5),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-                
-                # Draw tracking ID at bottom
-                cv2.putText(frame, f'ID: {track_id}', (x1, y2 + 15),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+        # While the conveyor is idle, skip the detector. The tracker simply sees
+        # no frames, so its tracks stay valid for when motion resumes; nothing
+        # is drawn rather than boxes from an earlier frame.
+        if (self.config.motion_gate_enabled and
+                not self.motion_gate.should_run(frame, counting_region(self.line_counter, self.config))):
+            return frame, Detections.empty(self.names)
+
+        if self.config.keyframe_enabled and not self.keyframe_scheduler.needs_detection():
+            # Between keyframes, predicted boxes stand in for detections
+            detections = self.keyframe_scheduler.propagate()
+        else:
+            # Run detection, only on the region around the counting band if enabled
+            region = inference_region(self.line_counter, self.config)
+            results = self.model.track(crop_to_region(frame, region), persist=True)
+            detections = extract_detections(results[0], self.names, x_offset=region[0])
+            if self.config.keyframe_enabled:
+                self.keyframe_scheduler.on_detections(detections)
 
         # Process detections for counting
-        if detections:
+        if len(detections):
             self.line_counter.update_counts(detections)
             
             # Update production tracker with latest data
@@ -75,6 +130,42 @@ class ObjectDetector:
             crossings = self.line_counter.get_latest_crossings()
             self.production_tracker.update_production(counts, crossings)
 
+        return frame, detections
+
+    def get_stats(self) -> Dict:
+        """Detector-side stats for the pipeline stats endpoint"""
+        return {
+            'motion_gate_enabled': self.config.motion_gate_enabled,
+            'motion_gate': self.motion_gate.get_stats(),
+            'keyframe_enabled': self.config.keyframe_enabled,
+            'keyframes': self.keyframe_scheduler.get_stats(),
+            'track_state': dict(self.line_counter.get_track_stats(),
+                                production_tracker=self.production_tracker.counted_track_ids.get_stats())
+        }
+
+    def annotate(self, frame: cv2.Mat, detections: Detections) -> cv2.Mat:
+        """Draw detection boxes and counting lines on a frame"""
+        for index, (box, track_id) in enumerate(zip(detections.boxes.tolist(), detections.track_ids.tolist())):
+            x1, y1, x2, y2 = box
+            class_name = detections.class_name(index)
+
+            # Draw detection box and label
+            color = (0, 255, 0)  # Green color for box
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+            
+            # Draw class name at top
+            cv2.putText(frame, f'{class_name}', (x1, y1 - 5),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+            
+            # Draw tracking ID at bottom
+            cv2.putText(frame, f'ID: {track_id}', (x1, y2 + 15),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+
+        # Outline the inference region so operators can see what the model looks at
+        if self.config.roi_enabled:
+            x_start, x_end = inference_region(self.line_counter, self.config)
+            cv2.rectangle(frame, (x_start, 0), (x_end - 1, frame.shape[0] - 1), (128, 128, 128), 1)
+
         # Draw the dotted lines after all detections are processed and drawn
         frame = self.line_drawer.draw_lines(frame, 
                                           self.line_counter.line1_x,
@@ -0,0 +1,37 @@
+import numpy as np
+from typing import Dict, Optional
+
+
+class Detections:
+    """Tracked boxes of one frame as parallel NumPy arrays.
+
+    boxes is (N, 4) xyxy in frame pixels, class_ids and track_ids are (N,).
+    names maps class ids to class names and is shared, not copied.
+    """
+
+    __slots__ = ('boxes', 'class_ids', 'track_ids', 'names', 'propagated')
+
+    def __init__(self, boxes: np.ndarray, class_ids: np.ndarray, track_ids: np.ndarray,
+                 names: Dict[int, str], propagated: bool = False):
+        self.boxes = boxes
+        self.class_ids = class_ids
+        self.track_ids = track_ids
+        self.names = names
+        self.propagated = propagated  # Predicted between keyframes, not detected
+
+    @classmethod
+    def empty(cls, names: Optional[Dict[int, str]] = None) -> 'Detections':
+        return cls(np.empty((0, 4), dtype=np.int32), np.empty(0, dtype=np.int64),
+                   np.empty(0, dtype=np.int64), names or {})
+
+    def __len__(self) -> int:
+        return len(self.track_ids)
+
+    @property
+    def centers(self) -> np.ndarray:
+        """(N, 2) box centres"""
+        return np.column_stack(((self.boxes[:, 0] + self.boxes[:, 2]) / 2,
+                                (self.boxes[:, 1] + self.boxes[:, 3]) / 2))
+
+    def class_name(self, index: int) -> str:
+        return self.names[int(self.class_ids[index])]
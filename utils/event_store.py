@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class ProductionEventStore:
+    """Append-only store of production events with periodic state snapshots (SQLite, WAL mode).
+
+    Every crossing and scrap event that changes ProductionTracker is
+    appended here before it is applied. Recovery loads the newest snapshot
+    and replays only the events after it, so startup time is bounded by
+    the snapshot interval rather than by how long the line has been running.
+    """
+
+    def __init__(self, db_path: str = "production_events.db", keep_snapshots: int = 3):
+        self.db_path = db_path
+        self.keep_snapshots = max(1, keep_snapshots)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS events (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                type TEXT NOT NULL,
+                line TEXT NOT NULL,
+                time TEXT NOT NULL,
+                payload TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_events_time ON events (time);
+            CREATE TABLE IF NOT EXISTS snapshots (
+                seq INTEGER PRIMARY KEY,
+                created TEXT NOT NULL,
+                state TEXT NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def append(self, event: Dict) -> int:
+        """Persist one event and return its sequence number"""
+        with self._lock:
+            with self._conn:
+                return self._conn.execute(
+                    "INSERT INTO events (type, line, time, payload) VALUES (?, ?, ?, ?)",
+                    (event['type'], event['line'], event['time'], json.dumps(event))).lastrowid
+
+    def append_many(self, events: List[Dict]) -> int:
+        """Persist several events in one transaction and return the last sequence number"""
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("INSERT INTO events (type, line, time, payload) VALUES (?, ?, ?, ?)",
+                                       [(event['type'], event['line'], event['time'], json.dumps(event))
+                                        for event in events])
+                return self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM events").fetchone()[0]
+
+    def events_after(self, seq: int = 0, limit: int = -1) -> Iterator[Tuple[int, Dict]]:
+        """Events with a sequence number above seq, oldest first (at most limit, -1 for all)"""
+        with self._lock:
+            rows = self._conn.execute("SELECT seq, payload FROM events WHERE seq > ? ORDER BY seq LIMIT ?",
+                                      (seq, limit)).fetchall()
+        for row_seq, payload in rows:
+            yield row_seq, json.loads(payload)
+
+    def crossings_between(self, since: str, upto_seq: int) -> Iterator[Dict]:
+        """Crossing events at or after the ISO time since with a sequence number up to upto_seq"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM events WHERE type = 'crossing' AND time >= ? AND seq <= ? ORDER BY seq",
+                (since, upto_seq)).fetchall()
+        for (payload,) in rows:
+            yield json.loads(payload)
+
+    def last_crossing_before(self, line: str, before: str, upto_seq: int) -> Optional[Dict]:
+        """Newest crossing of a line before the ISO time before, with a sequence number up to upto_seq"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM events WHERE type = 'crossing' AND line = ? AND time < ? AND seq <= ? "
+                "ORDER BY time DESC LIMIT 1", (line, before, upto_seq)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_snapshot(self, seq: int, state: Dict) -> None:
+        """Store tracker state as of event seq and drop all but the newest snapshots"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO snapshots (seq, created, state) VALUES (?, ?, ?)",
+                                   (seq, datetime.now().isoformat(timespec='seconds'), json.dumps(state)))
+                self._conn.execute(
+                    "DELETE FROM snapshots WHERE seq NOT IN (SELECT seq FROM snapshots ORDER BY seq DESC LIMIT ?)",
+                    (self.keep_snapshots,))
+
+    def latest_snapshot(self) -> Optional[Tuple[int, Dict]]:
+        with self._lock:
+            row = self._conn.execute("SELECT seq, state FROM snapshots ORDER BY seq DESC LIMIT 1").fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def last_seq(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM events").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def benchmark(days: int = 7, parts_per_hour: int = 120, snapshot_every: int = 500) -> Dict[str, float]:
+    """Write a week of crossings and scrap through a tracker, then time recovery"""
+    from .production_tracker import ProductionTracker
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = ProductionEventStore(os.path.join(directory, 'events.db'))
+        tracker = ProductionTracker(event_store=store, snapshot_every=snapshot_every)
+        start_time = datetime(2024, 1, 1, 6, 0)
+        events = days * 24 * parts_per_hour
+        for i in range(events):
+            moment = start_time + timedelta(seconds=i * 3600 / parts_per_hour)
+            line_key = 'Line 1' if i % 2 == 0 else 'Line 2'
+            tracker.apply_new_event({'type': 'crossing', 'line': line_key, 'time': moment.isoformat(),
+                                     'track_id': i, 'class_name': 'Tesla_M3', 'program': 'TESLA M3',
+                                     'part_number': '4296625XXX', 'part_description': 'Tesla / M3 / GB Inner',
+                                     'target': 80})
+            if i % 50 == 0:
+                tracker.apply_new_event({'type': 'scrap', 'line': line_key, 'time': moment.isoformat(),
+                                         'quantity': 1})
+        expected = tracker.get_all_data()
+
+        end_time = moment
+        start = time.perf_counter()
+        recovered = ProductionTracker(event_store=store, snapshot_every=snapshot_every)
+        recovered.clock = lambda: end_time  # Restart in the shift of the last event
+        stats = recovered.recover()
+        recovery_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        full_replay = ProductionTracker()
+        for _, event in store.events_after(0):
+            full_replay.apply_event(event)
+        full_replay_ms = (time.perf_counter() - start) * 1000
+
+        matches = recovered.get_all_data() == expected == full_replay.get_all_data()
+        total_events = store.last_seq()
+        store.close()
+
+    return {
+        'events': total_events,
+        'replayed_after_snapshot': stats['replayed'],
+        'recovery_ms': round(recovery_ms, 1),
+        'full_replay_ms': round(full_replay_ms, 1),
+        'state_matches': matches
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure ProductionTracker crash recovery time")
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--parts-per-hour', type=int, default=120)
+    parser.add_argument('--snapshot-every', type=int, default=500)
+    args = parser.parse_args()
+    print(benchmark(args.days, args.parts_per_hour, args.snapshot_every))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,54 +1,24 @@
-import openpyxl
-from datetime import datetime
-from typing import Dict
-import os
+from typing import Dict, Optional
+from .crossing_log import CrossingLog
 
 class ExcelLogger:
-    def __init__(self, filename="production_log.xlsx"):
+    """Production log front-end over the buffered crossing log.
+
+    Crossings are no longer written into production_log.xlsx one at a time;
+    the workbook is exported from the crossing log on demand.
+    """
+
+    def __init__(self, filename="production_log.xlsx", crossing_log: Optional[CrossingLog] = None):
         self.filename = filename
-        self._ensure_file_exists()
-        
-    def _ensure_file_exists(self):
-        """Create the Excel file with headers if it doesn't exist"""
-        if not os.path.exists(self.filename):
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            headers = [
-                "Timestamp", 
-                "Line", 
-                "Class Name", 
-                "Program", 
-                "Part Number", 
-                "Description"
-            ]
-            ws.append(headers)
-            wb.save(self.filename)
-            print(f"Created new production log file: {self.filename}")
+        self.crossing_log = crossing_log or CrossingLog.get_instance()
     
     def log_crossing(self, line_number: int, class_name: str, part_info: Dict):
-        """Log a line crossing event to Excel"""
+        """Log a line crossing event"""
         try:
-            wb = openpyxl.load_workbook(self.filename)
-            ws = wb.active
-            
-            # Prepare row data
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            row_data = [
-                timestamp,
-                f"Line {line_number}",
-                class_name,
-                part_info['program'],
-                part_info['part_number'],
-                part_info['description']
-            ]
-            
-            # Insert new row after header
-            ws.insert_rows(2)
-            for col, value in enumerate(row_data, start=1):
-                ws.cell(row=2, column=col, value=value)
-            
-            wb.save(self.filename)
-            print(f"Logged crossing event: Line {line_number}, {class_name}")
-            
+            self.crossing_log.record(f"Line {line_number}", dict(part_info, class_name=class_name))
         except Exception as e:
-            print(f"Error logging crossing event: {e}")
\ No newline at end of file
+            print(f"Error logging crossing event: {e}")
+
+    def export(self, period: Optional[str] = None) -> str:
+        """Write production_log.xlsx for a period (today by default)"""
+        return self.crossing_log.export_xlsx(period, self.filename, layout='production_log')
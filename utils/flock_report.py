@@ -1,52 +1,21 @@
-import openpyxl
-from datetime import datetime
-from typing import Dict
-import os
+from typing import Optional
 from .bom_reader import BOMReader
+from .crossing_log import CrossingLog
 
 class FlockReport:
-    def __init__(self, filename="flock_report.xlsx"):
+    """Flock report front-end over the buffered crossing log"""
+
+    def __init__(self, filename="flock_report.xlsx", crossing_log: Optional[CrossingLog] = None):
         self.filename = filename
-        self.bom_reader = BOMReader()
-        self._ensure_file_exists()
-        
-    def _ensure_file_exists(self):
-        """Create the Excel file with headers if it doesn't exist"""
-        if not os.path.exists(self.filename):
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            headers = ["Class Name", "Program", "Part Number", "Part Description", "Day", "Time"]
-            ws.append(headers)
-            wb.save(self.filename)
+        self.bom_reader = BOMReader.get_instance()
+        self.crossing_log = crossing_log or CrossingLog.get_instance()
     
-    def record_crossing(self, class_name: str):
-        """Record a line crossing event in the Excel file"""
+    def record_crossing(self, class_name: str, line: str = ''):
+        """Record a line crossing event"""
         # Get part information from BOM
         part_info = self.bom_reader.get_part_info(class_name)
-        
-        # Get current date and time
-        now = datetime.now()
-        day = now.strftime("%Y-%m-%d")
-        time = now.strftime("%H:%M:%S")
-        
-        # Prepare row data
-        row_data = [
-            class_name,
-            part_info['program'],
-            part_info['part_number'],
-            part_info['description'],
-            day,
-            time
-        ]
-        
-        # Open workbook and insert new row after header
-        wb = openpyxl.load_workbook(self.filename)
-        ws = wb.active
-        ws.insert_rows(2)  # Insert after header row
-        
-        # Write data to the new row
-        for col, value in enumerate(row_data, start=1):
-            ws.cell(row=2, column=col, value=value)
-        
-        # Save the workbook
-        wb.save(self.filename)
\ No newline at end of file
+        self.crossing_log.record(line, dict(part_info, class_name=class_name))
+
+    def export(self, period: Optional[str] = None) -> str:
+        """Write flock_report.xlsx for a period (today by default)"""
+        return self.crossing_log.export_xlsx(period, self.filename, layout='flock_report')
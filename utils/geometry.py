@@ -1,6 +1,8 @@
 from dataclasses import dataclass
 from typing import Optional, Tuple
 
+import numpy as np
+
 @dataclass
 class Point:
     x: float
@@ -29,4 +31,29 @@ def calculate_intersection(line1: Line, line2: Line) -> Optional[Point]:
         y = y1 + t * (y2 - y1)
         return Point(x, y)
     
-    return None
\ No newline at end of file
+    return None
+
+def band_crossings(previous: np.ndarray, current: np.ndarray, has_previous: np.ndarray,
+                   x_min: float, x_max: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized test of which tracks reached the vertical band [x_min, x_max].
+
+    A track crosses if its current centre lies in the band, or if the segment
+    from its previous centre to its current one passes through the band, so
+    parts that jump over the band between two frames are still caught.
+    Returns the crossing mask and the y of each track where it met the band:
+    its current y when inside the band, otherwise the segment's y at the
+    band centre (the calculate_intersection idea, for all tracks at once).
+    """
+    x, y = current[:, 0], current[:, 1]
+    in_band = (x >= x_min) & (x <= x_max)
+
+    prev_x, prev_y = previous[:, 0], previous[:, 1]
+    spans = has_previous & (np.minimum(prev_x, x) <= x_max) & (np.maximum(prev_x, x) >= x_min)
+
+    band_x = (x_min + x_max) / 2
+    dx = x - prev_x
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(dx != 0, (band_x - prev_x) / dx, 1.0)
+    crossing_y = np.where(in_band | ~has_previous, y, prev_y + np.clip(t, 0.0, 1.0) * (y - prev_y))
+
+    return in_band | spans, crossing_y
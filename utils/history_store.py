@@ -0,0 +1,429 @@
+import argparse
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from .event_store import ProductionEventStore
+from .scrap_journal import ScrapJournal
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Columns of each dataset; the row id (event seq / journal id) makes compaction idempotent
+DATASET_COLUMNS = {
+    'crossings': ['id', 'time', 'line', 'program', 'part_number', 'class_name', 'target'],
+    'scrap': ['id', 'time', 'line', 'program', 'part_number', 'defect_code', 'defect_description']
+}
+
+# Columns each dataset can be grouped and filtered on
+GROUP_COLUMNS = {
+    'crossings': ('line', 'program', 'part_number', 'class_name'),
+    'scrap': ('line', 'program', 'part_number', 'defect_code')
+}
+
+TIME_BUCKETS = ('hour', 'day', 'week', 'month', 'quarter')
+
+_PART_FILE = re.compile(r'part-(\d+)-(\d+)\.parquet')
+
+
+def _schema(dataset: str):
+    fields = {'id': pa.int64(), 'time': pa.timestamp('ms'), 'target': pa.int32()}
+    return pa.schema([(column, fields.get(column, pa.string())) for column in DATASET_COLUMNS[dataset]])
+
+
+def iso_week(moment: datetime) -> str:
+    year, week, _ = moment.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def line_name(line) -> str:
+    """Journal lines are stored as '1'/'2', crossings as 'Line 1'/'Line 2'"""
+    line = str(line)
+    return f"Line {line}" if line.isdigit() else line
+
+
+class HistoryStore:
+    """Columnar history of crossings and scrap for multi-week reports.
+
+    Rows are copied incrementally from the production event store and the
+    scrap journal into Parquet files partitioned by ISO week and line
+    ({dataset}/{week}/{line}/part-{first id}-{last id}.parquet). A
+    quarter's question then reads only the partitions it needs, and only
+    the columns it groups on, instead of opening a workbook per week.
+
+    A file whose id range lies inside another file's range is superseded
+    and ignored. This makes a compaction that is cut short safe to redo,
+    and lets small files be merged without a window where rows are
+    missing or doubled.
+    """
+
+    def __init__(self, root: str = "history", event_store: Optional[ProductionEventStore] = None,
+                 scrap_journal: Optional[ScrapJournal] = None, interval: float = 60.0,
+                 max_files_per_partition: int = 8, batch_size: int = 50000):
+        if not PARQUET_AVAILABLE:
+            raise RuntimeError("pyarrow is required for the columnar history store")
+        self.root = root
+        self.event_store = event_store
+        self.scrap_journal = scrap_journal
+        self.interval = interval
+        self.max_files_per_partition = max(2, max_files_per_partition)
+        self.batch_size = batch_size
+        os.makedirs(root, exist_ok=True)
+        self._state_path = os.path.join(root, 'watermarks.json')
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.watermarks = self._load_watermarks()
+        self.compactions = 0
+        self.last_compacted_at = None
+        self.last_error = None
+
+    def _load_watermarks(self) -> Dict[str, int]:
+        try:
+            with open(self._state_path, encoding='utf-8') as f:
+                return {dataset: int(value) for dataset, value in json.load(f).items()}
+        except FileNotFoundError:
+            return {dataset: 0 for dataset in DATASET_COLUMNS}
+
+    def _save_watermarks(self) -> None:
+        temp_path = self._state_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.watermarks, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self._state_path)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="history-compaction", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30.0)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.compact()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Error compacting history: {e}")
+            self._stop_event.wait(self.interval)
+
+    # Compaction
+
+    def _new_rows(self, dataset: str) -> Tuple[List[Dict], int]:
+        """Next batch of rows past the dataset's watermark and the watermark after them"""
+        after = self.watermarks.get(dataset, 0)
+        if dataset == 'crossings':
+            if not self.event_store:
+                return [], after
+            rows = []
+            for seq, event in self.event_store.events_after(after, self.batch_size):
+                after = seq  # Scrap events are skipped here but still move the watermark
+                if event['type'] == 'crossing':
+                    rows.append({'id': seq, 'time': datetime.fromisoformat(event['time']),
+                                 'line': event['line'], 'program': event.get('program', ''),
+                                 'part_number': event.get('part_number', ''),
+                                 'class_name': event.get('class_name', ''), 'target': int(event.get('target', 0))})
+            return rows, after
+        if not self.scrap_journal:
+            return [], after
+        rows = [{'id': entry['id'], 'time': datetime.strptime(entry['timestamp'], '%Y-%m-%d %H:%M:%S'),
+                 'line': line_name(entry['line']), 'program': entry['program'] or '',
+                 'part_number': entry['part_number'] or '', 'defect_code': entry['defect_code'],
+                 'defect_description': entry['defect_description'] or ''}
+                for entry in self.scrap_journal.entries_after(after, self.batch_size)]
+        return rows, rows[-1]['id'] if rows else after
+
+    def compact(self) -> Dict[str, int]:
+        """Copy new crossings and scrap into the partitioned files; returns rows written per dataset"""
+        written = {}
+        with self._lock:
+            for dataset in DATASET_COLUMNS:
+                written[dataset] = 0
+                while True:
+                    rows, watermark = self._new_rows(dataset)
+                    if watermark <= self.watermarks.get(dataset, 0):
+                        break
+                    partitions: Dict[tuple, List[Dict]] = {}
+                    for row in rows:
+                        partitions.setdefault((iso_week(row['time']), row['line']), []).append(row)
+                    for (week, line), partition_rows in partitions.items():
+                        self._write_part(dataset, week, line, partition_rows)
+                    # Files first, then the watermark: a crash in between only rewrites superseded files
+                    self.watermarks[dataset] = watermark
+                    self._save_watermarks()
+                    written[dataset] += len(rows)
+            self.compactions += 1
+            self.last_compacted_at = datetime.now()
+            self.last_error = None
+        return written
+
+    def _partition_dir(self, dataset: str, week: str, line: str) -> str:
+        return os.path.join(self.root, dataset, week, re.sub(r'[^\w-]+', '_', line))
+
+    def _write_part(self, dataset: str, week: str, line: str, rows: List[Dict]) -> None:
+        directory = self._partition_dir(dataset, week, line)
+        os.makedirs(directory, exist_ok=True)
+        table = pa.Table.from_pylist(rows, schema=_schema(dataset))
+        self._write_table(directory, table, rows[0]['id'], rows[-1]['id'])
+        files = self._live_files(directory)
+        if len(files) > self.max_files_per_partition:
+            self._merge(directory, files)
+
+    @staticmethod
+    def _write_table(directory: str, table, first_id: int, last_id: int) -> None:
+        temp_fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+        os.close(temp_fd)
+        try:
+            pq.write_table(table, temp_path, compression='zstd')
+            os.replace(temp_path, os.path.join(directory, f"part-{first_id:012d}-{last_id:012d}.parquet"))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _merge(self, directory: str, files: List[str]) -> None:
+        """Rewrite a partition's files as one; the new file's id range supersedes the old ones"""
+        table = pa.concat_tables(pq.read_table(path) for path in files).sort_by('id')
+        ids = table.column('id')
+        self._write_table(directory, table, pc.min(ids).as_py(), pc.max(ids).as_py())
+        for path in files:
+            os.remove(path)
+
+    @staticmethod
+    def _live_files(directory: str) -> List[str]:
+        """Part files of a partition that are not superseded by a file covering their id range"""
+        ranges = []
+        for name in os.listdir(directory):
+            match = _PART_FILE.fullmatch(name)
+            if match:
+                ranges.append((int(match.group(1)), int(match.group(2)), os.path.join(directory, name)))
+        live = []
+        for first, last, path in ranges:
+            covered = any(other_first <= first and last <= other_last and (other_first, other_last) != (first, last)
+                          for other_first, other_last, _ in ranges)
+            if not covered:
+                live.append(path)
+        return sorted(live)
+
+    # Queries
+
+    def _files(self, dataset: str, start: Optional[datetime], end: Optional[datetime],
+               line: Optional[str]) -> List[str]:
+        """Live part files of the weeks overlapping [start, end), optionally for one line"""
+        dataset_dir = os.path.join(self.root, dataset)
+        if not os.path.isdir(dataset_dir):
+            return []
+        first_week = iso_week(start) if start else None
+        last_week = iso_week(end - timedelta(microseconds=1)) if end else None
+        line_dir = re.sub(r'[^\w-]+', '_', line_name(line)) if line else None
+        files = []
+        for week in sorted(os.listdir(dataset_dir)):
+            if (first_week and week < first_week) or (last_week and week > last_week):
+                continue
+            week_dir = os.path.join(dataset_dir, week)
+            for partition in sorted(os.listdir(week_dir)):
+                if line_dir and partition != line_dir:
+                    continue
+                files.extend(self._live_files(os.path.join(week_dir, partition)))
+        return files
+
+    def aggregate(self, dataset: str, group_by: List[str], start: Optional[datetime] = None,
+                  end: Optional[datetime] = None, bucket: Optional[str] = None,
+                  filters: Optional[Dict[str, str]] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Row counts grouped by columns of GROUP_COLUMNS and optionally a time bucket.
+
+        start/end bound the time (end exclusive), filters match columns
+        exactly. Rows come back with the largest count first, or in time
+        order when grouped by bucket.
+        """
+        if dataset not in DATASET_COLUMNS:
+            raise ValueError(f"Unknown dataset: {dataset}")
+        unknown = [column for column in group_by if column not in GROUP_COLUMNS[dataset]]
+        filters = {column: value for column, value in (filters or {}).items() if value not in (None, '')}
+        unknown += [column for column in filters if column not in GROUP_COLUMNS[dataset]]
+        if unknown:
+            raise ValueError(f"Cannot group or filter {dataset} on: {', '.join(unknown)}")
+        if bucket and bucket not in TIME_BUCKETS:
+            raise ValueError(f"Unknown time bucket: {bucket}")
+
+        if 'line' in filters:
+            filters['line'] = line_name(filters['line'])
+        files = self._files(dataset, start, end, filters.get('line'))
+        if not files:
+            return []
+
+        expression = None
+        conditions = [ds.field(column) == value for column, value in filters.items()]
+        if start:
+            conditions.append(ds.field('time') >= pa.scalar(start, pa.timestamp('ms')))
+        if end:
+            conditions.append(ds.field('time') < pa.scalar(end, pa.timestamp('ms')))
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+
+        columns = list(dict.fromkeys(group_by + (['time'] if bucket else ['id'])))
+        table = ds.dataset(files, schema=_schema(dataset), format='parquet').to_table(columns=columns,
+                                                                                    filter=expression)
+        keys = list(group_by)
+        if bucket:
+            table = table.append_column('bucket', pc.floor_temporal(table['time'], unit=bucket,
+                                                                    week_starts_monday=True))
+            keys.append('bucket')
+        if not keys:
+            return [{'count': table.num_rows}]
+
+        grouped = table.group_by(keys).aggregate([([], 'count_all')]).rename_columns(keys + ['count'])
+        order = [('bucket', 'ascending'), ('count', 'descending')] if bucket else [('count', 'descending')]
+        grouped = grouped.sort_by(order)
+        if limit:
+            grouped = grouped.slice(0, limit)
+        rows = grouped.to_pylist()
+        for row in rows:
+            if bucket:
+                row['bucket'] = row['bucket'].isoformat()
+        return rows
+
+    def get_stats(self) -> Dict:
+        files = {dataset: len(self._files(dataset, None, None, None)) for dataset in DATASET_COLUMNS}
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'watermarks': dict(self.watermarks),
+            'files': files,
+            'compactions': self.compactions,
+            'last_compacted_at': self.last_compacted_at.isoformat(timespec='seconds')
+            if self.last_compacted_at else None,
+            'last_error': self.last_error
+        }
+
+
+def import_scrap_workbooks(journal: ScrapJournal, paths: List[str]) -> int:
+    """Load weekly flock_scrap_data_cwNN.xlsx workbooks written before the journal existed.
+
+    Rows the journal already holds (same second, line, part and defect
+    code) are skipped, and each imported row gets a spool id derived from
+    its file and row, so importing a workbook twice adds nothing.
+    """
+    import pandas as pd
+
+    imported = 0
+    for path in paths:
+        frame = pd.read_excel(path, dtype=str).fillna('')
+        entries, moments, spool_ids = [], [], []
+        for index, row in frame.iterrows():
+            moment = datetime.strptime(row['Timestamp'][:19], '%Y-%m-%d %H:%M:%S')
+            entry = {'line': row['Line'], 'program': row['Program'], 'part_number': row['Part Number'],
+                     'defect_code': row['Defect Code'], 'defect_description': row['Description'],
+                     'comments': row['Comments']}
+            existing, _ = journal.history(limit=1, since=row['Timestamp'][:19],
+                                          until=(moment + timedelta(seconds=1)).strftime('%Y-%m-%d %H:%M:%S'),
+                                          line=entry['line'], part_number=entry['part_number'],
+                                          defect_code=entry['defect_code'])
+            if existing:
+                continue
+            entries.append(entry)
+            moments.append(moment)
+            spool_ids.append(f"xlsx:{os.path.basename(path)}:{index}")
+        if entries:
+            journal.append_many(entries, moments, spool_ids)
+        imported += len(entries)
+        print(f"Imported {len(entries)} of {len(frame)} scrap rows from {path}")
+    return imported
+
+
+def benchmark(weeks: int = 13, parts_per_hour: int = 120, scrap_every: int = 40) -> Dict[str, float]:
+    """Compact a quarter of crossings and scrap, then time typical report queries"""
+    import random
+
+    rng = random.Random(7)
+    programs = ['TESLA M3', 'TESLA MY', 'GM BT1', 'FORD P702']
+    codes = [f"R{n:02d}" for n in range(1, 21)]
+    with tempfile.TemporaryDirectory() as directory:
+        store = ProductionEventStore(os.path.join(directory, 'events.db'))
+        journal = ScrapJournal(os.path.join(directory, 'scrap.db'))
+        start_time = datetime(2024, 1, 1, 6, 0)
+        crossings = weeks * 7 * 16 * parts_per_hour
+        events, scrap_entries, scrap_moments = [], [], []
+        for i in range(crossings):
+            moment = start_time + timedelta(seconds=i * 3600 * 24 / (16 * parts_per_hour))
+            program = programs[(i // 5000) % len(programs)]
+            events.append({'type': 'crossing', 'line': f"Line {i % 2 + 1}", 'time': moment.isoformat(),
+                           'track_id': i, 'class_name': program.replace(' ', '_'), 'program': program,
+                           'part_number': f"{programs.index(program)}00XX", 'target': 80})
+            if i % scrap_every == 0:
+                scrap_entries.append({'line': str(i % 2 + 1), 'program': program,
+                                      'part_number': events[-1]['part_number'], 'defect_code': rng.choice(codes)})
+                scrap_moments.append(moment)
+        store.append_many(events)
+        journal.append_many(scrap_entries, scrap_moments)
+
+        history = HistoryStore(os.path.join(directory, 'history'), store, journal)
+        start = time.perf_counter()
+        history.compact()
+        compact_ms = (time.perf_counter() - start) * 1000
+
+        quarter_end = start_time + timedelta(weeks=weeks)
+        timings = {}
+        queries = {
+            'top_defects_for_program': lambda: history.aggregate('scrap', ['defect_code'], start_time, quarter_end,
+                                                                 filters={'program': 'TESLA M3'}, limit=10),
+            'crossings_by_line_week': lambda: history.aggregate('crossings', ['line', 'program'], start_time,
+                                                                quarter_end, bucket='week'),
+            'crossings_by_part_day': lambda: history.aggregate('crossings', ['part_number'], start_time,
+                                                               quarter_end, bucket='day')
+        }
+        for name, query in queries.items():
+            start = time.perf_counter()
+            query()
+            timings[name] = round((time.perf_counter() - start) * 1000, 1)
+        store.close()
+        journal.close()
+
+    return {'crossings': crossings, 'scrap': len(scrap_entries), 'compact_ms': round(compact_ms, 1),
+            'query_ms': timings}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar crossing and scrap history")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    compact_parser = subparsers.add_parser('compact', help="Copy new events and scrap into the Parquet history")
+    compact_parser.add_argument('--root', default="history")
+    compact_parser.add_argument('--events', default="production_events.db")
+    compact_parser.add_argument('--journal', default="scrap_journal.db")
+
+    import_parser = subparsers.add_parser('import-workbooks', help="Load old weekly scrap workbooks into the journal")
+    import_parser.add_argument('paths', nargs='+')
+    import_parser.add_argument('--journal', default="scrap_journal.db")
+
+    bench_parser = subparsers.add_parser('benchmark', help="Time quarter-long report queries")
+    bench_parser.add_argument('--weeks', type=int, default=13)
+    args = parser.parse_args()
+
+    if args.command == 'compact':
+        history = HistoryStore(args.root, ProductionEventStore(args.events), ScrapJournal(args.journal))
+        print(history.compact())
+    elif args.command == 'import-workbooks':
+        import_scrap_workbooks(ScrapJournal(args.journal), args.paths)
+    else:
+        print(benchmark(args.weeks))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+import argparse
+import json
+import os
+import shutil
+from typing import Dict, List, Optional
+
+from ultralytics import YOLO
+
+from .config import Config
+
+BACKENDS = ('pytorch', 'onnx', 'openvino')
+
+
+def model_path_for_backend(config: Config, backend: Optional[str] = None, int8: Optional[bool] = None) -> str:
+    """Path of the model file (or OpenVINO directory) used for a backend"""
+    backend = backend or config.inference_backend
+    int8 = config.inference_int8 if int8 is None else int8
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    if backend == 'pytorch':
+        return config.model_path
+
+    base = os.path.splitext(config.model_path)[0]
+    suffix = '_int8' if int8 else ''
+    if backend == 'onnx':
+        return f"{base}{suffix}.onnx"
+    return f"{base}{suffix}_openvino_model"
+
+
+def load_model(config: Config) -> YOLO:
+    """Load the detection model for the backend selected in Config.
+
+    Falls back to the PyTorch weights if the exported model is missing, so a
+    line PC without an export still starts.
+    """
+    path = model_path_for_backend(config)
+    if not os.path.exists(path):
+        print(f"Warning: {config.inference_backend} model not found at {path}, "
+              f"run 'python -m utils.inference_backend export' first. Falling back to {config.model_path}")
+        path = config.model_path
+    print(f"Loading {config.inference_backend} model from {path}")
+    return YOLO(path, task='detect')
+
+
+def export_model(config: Config, backend: str, int8: bool = False, data: Optional[str] = None) -> str:
+    """Export the PyTorch weights to ONNX or OpenVINO IR, optionally INT8 quantized.
+
+    ONNX INT8 uses onnxruntime dynamic quantization of the exported model.
+    OpenVINO INT8 uses post-training quantization through NNCF, calibrated on
+    the dataset yaml given in data.
+    """
+    if backend == 'pytorch':
+        raise ValueError("The PyTorch backend uses the weights as they are, nothing to export")
+    target = model_path_for_backend(config, backend, int8)
+    model = YOLO(config.model_path)
+
+    if backend == 'onnx':
+        exported = model.export(format='onnx', dynamic=True, simplify=True)
+        if int8:
+            try:
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+            except ImportError:
+                raise RuntimeError("onnxruntime is required for ONNX INT8 quantization")
+            quantize_dynamic(exported, target, weight_type=QuantType.QUInt8)
+        elif os.path.abspath(exported) != os.path.abspath(target):
+            shutil.move(exported, target)
+    else:
+        export_args = {'format': 'openvino', 'dynamic': True, 'int8': int8}
+        if int8 and data:
+            export_args['data'] = data
+        exported = model.export(**export_args)
+        if os.path.abspath(exported) != os.path.abspath(target):
+            if os.path.exists(target):
+                shutil.rmtree(target)
+            shutil.move(exported, target)
+
+    print(f"Exported {backend}{' INT8' if int8 else ''} model to {target}")
+    return target
+
+
+def compare_backends(video_path: str, variants: List[Dict], batch_size: int = 8) -> Dict:
+    """Run the offline analyzer on a reference clip once per backend variant.
+
+    The first variant is the reference for count accuracy.
+    """
+    from .offline_analysis import OfflineAnalyzer
+
+    results = []
+    reference = None
+    for variant in variants:
+        config = Config()
+        config.inference_backend = variant['backend']
+        config.inference_int8 = variant.get('int8', False)
+        label = f"{variant['backend']}{' int8' if config.inference_int8 else ''}"
+        if not os.path.exists(model_path_for_backend(config)):
+            print(f"Skipping {label}: no exported model at {model_path_for_backend(config)}")
+            continue
+        print(f"Analyzing {video_path} with {label}")
+
+        report = OfflineAnalyzer(batch_size=batch_size, config=config).analyze(video_path)
+        counts = {line_key: line['count'] for line_key, line in report['lines'].items()}
+        if reference is None:
+            reference = counts
+
+        expected = sum(reference.values())
+        mismatched = sum(abs(counts[line_key] - reference[line_key]) for line_key in reference)
+        results.append({
+            'backend': label,
+            'fps': report['throughput']['fps'],
+            'realtime_factor': report['throughput']['realtime_factor'],
+            'counts': counts,
+            'count_accuracy': round(max(0.0, 100.0 * (1 - mismatched / expected)), 2) if expected else 100.0
+        })
+
+    return {'video': os.path.basename(video_path), 'batch_size': batch_size, 'results': results}
+
+
+def format_comparison(comparison: Dict) -> str:
+    """Markdown table of a compare_backends result with at least one backend"""
+    lines = [
+        f"# Inference backend comparison: {comparison['video']}",
+        "",
+        f"Batch size {comparison['batch_size']}, accuracy relative to {comparison['results'][0]['backend']}.",
+        "",
+        "| Backend | FPS | x real time | Line 1 | Line 2 | Count accuracy |",
+        "|---|---|---|---|---|---|"
+    ]
+    for result in comparison['results']:
+        lines.append(f"| {result['backend']} | {result['fps']} | {result['realtime_factor']} | "
+                     f"{result['counts']['Line 1']} | {result['counts']['Line 2']} | {result['count_accuracy']}% |")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and compare CPU inference backends")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="Export best.pt to ONNX or OpenVINO IR")
+    export_parser.add_argument('--backend', choices=['onnx', 'openvino'], required=True)
+    export_parser.add_argument('--int8', action='store_true', help="Apply INT8 post-training quantization")
+    export_parser.add_argument('--data', help="Dataset yaml for OpenVINO INT8 calibration")
+
+    compare_parser = subparsers.add_parser('compare', help="Compare backends on a reference clip")
+    compare_parser.add_argument('video', help="Reference video file")
+    compare_parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=BACKENDS)
+    compare_parser.add_argument('--int8', action='store_true', help="Also run INT8 variants of exported backends")
+    compare_parser.add_argument('--batch-size', type=int, default=8)
+    compare_parser.add_argument('--output', default='backend_comparison.md', help="Markdown report file")
+
+    args = parser.parse_args()
+    config = Config()
+
+    if args.command == 'export':
+        export_model(config, args.backend, int8=args.int8, data=args.data)
+        return
+
+    variants = []
+    for backend in args.backends:
+        variants.append({'backend': backend, 'int8': False})
+        if args.int8 and backend != 'pytorch':
+            variants.append({'backend': backend, 'int8': True})
+    comparison = compare_backends(args.video, variants, batch_size=args.batch_size)
+    if not comparison['results']:
+        print("No backend could be loaded or exported, nothing to compare")
+        return
+    report = format_comparison(comparison)
+    with open(args.output, 'w') as f:
+        f.write(report)
+    print(report)
+    print(json.dumps(comparison, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,24 +1,33 @@
 import cv2
-from typing import Dict, List, Set, Optional
-from .geometry import Point
+import numpy as np
+from typing import Dict, Optional
+from .config import Config
+from .detections import Detections
+from .geometry import Point, band_crossings
 from .tracking import TrackingState
+from .track_store import TrackStore
 from .bom_reader import BOMReader
 from .event_manager import EventManager
 
 class LineCounter:
-    def __init__(self):
-        self.counted_ids: Set[int] = set()
+    def __init__(self, event_manager: Optional[EventManager] = None):
+        config = Config()
+        self.counted_ids = TrackStore(config.track_ttl_seconds, config.track_max_entries,
+                                      config.track_recount_window_seconds)
         self.center_x = 0.5  # Center of the frame
         self.line_spacing = 20  # 20 pixels between lines
         self.line_y_position = 0.5  # Horizontal line at 50% of height
-        self.tracking_state = TrackingState()
+        self.tracking_state = TrackingState(config.track_ttl_seconds, config.track_max_entries)
         self.counts = {'line1': 0, 'line2': 0}
         self.latest_crossings = {'Line 1': None, 'Line 2': None}
         self.frame_width = 0
         self.frame_height = 0
-        self.bom_reader = BOMReader()
-        self.event_manager = EventManager.get_instance()
-        self.objects_between_lines = {}  # Track objects between the lines
+        self.bom_reader = BOMReader.get_instance()
+        # Headless users (e.g. offline analysis) pass their own event manager
+        self.event_manager = event_manager or EventManager.get_instance()
+        # Track objects between the lines
+        self.objects_between_lines = TrackStore(config.track_ttl_seconds, config.track_max_entries,
+                                                recount_window=0)
         self.line1_x = 0  # Will be calculated when frame dimensions are set
         self.line2_x = 0  # Will be calculated when frame dimensions are set
 
@@ -31,42 +40,53 @@ class LineCounter:
         self.line2_x = (center_x_pixels + self.line_spacing/2) / self.frame_width
         self.tracking_state.update_frame_dimensions(width, height)
 
-    def update_counts(self, detections: List[Dict]) -> None:
-        """Update part counts based on detected objects between the lines"""
-        if not detections or self.frame_width == 0 or self.frame_height == 0:
+    def update_counts(self, detections: Detections) -> None:
+        """Update part counts from one frame of detections in a single vectorized pass"""
+        if len(detections) == 0 or self.frame_width == 0 or self.frame_height == 0:
             return
 
         line1_x = int(self.frame_width * self.line1_x)
         line2_x = int(self.frame_width * self.line2_x)
-        line_y = int(self.frame_height * self.line_y_position)
 
-        for detection in detections:
-            track_id = detection['track_id']
-            x = detection['center'][0]
-            y = detection['center'][1]
+        track_ids = detections.track_ids
+        centers = detections.centers
+        previous, has_previous = self.tracking_state.get_previous_positions(track_ids)
+        self.tracking_state.update_positions(track_ids, centers)
 
-            # Check if object is between the lines
-            if line1_x <= x <= line2_x:
-                if track_id not in self.counted_ids and track_id not in self.objects_between_lines:
-                    # New object detected between lines
-                    self.objects_between_lines[track_id] = {
-                        'detection': detection,
-                        'position': Point(x, y),
-                        'timestamp': cv2.getTickCount()
-                    }
-                    self._process_detection(track_id, detection, Point(x, y))
-            else:
-                # Remove object from tracking if it's outside the lines
+        crossed, crossing_y = band_crossings(previous, centers, has_previous, line1_x, line2_x)
+        in_band = (centers[:, 0] >= line1_x) & (centers[:, 0] <= line2_x)
+
+        # Forget objects that have left the band
+        if self.objects_between_lines:
+            for track_id in track_ids[~in_band].tolist():
                 self.objects_between_lines.pop(track_id, None)
+            self.objects_between_lines.touch(track_ids[in_band].tolist())
+
+        # Counted parts still in view stay counted however long they sit there
+        self.counted_ids.touch(track_ids.tolist())
 
-    def _process_detection(self, track_id: int, detection: Dict, position: Point) -> None:
-        """Process a detection between the lines"""
+        # Usually none or one candidate per frame, so per-id checks are cheap here
+        for index in np.flatnonzero(crossed).tolist():
+            track_id = int(track_ids[index])
+            if track_id in self.counted_ids or track_id in self.objects_between_lines:
+                continue
+            position = Point(float(centers[index, 0]), float(crossing_y[index]))
+            class_name = detections.class_name(index)
+            if in_band[index]:
+                self.objects_between_lines[track_id] = {
+                    'class_name': class_name,
+                    'position': position,
+                    'timestamp': cv2.getTickCount()
+                }
+            self._process_detection(track_id, class_name, position)
+
+    def _process_detection(self, track_id: int, class_name: str, position: Point) -> None:
+        """Count a track that reached the band on the line it crossed at"""
         if track_id not in self.counted_ids:
             line_y = int(self.frame_height * self.line_y_position)
             line_key = 'Line 1' if position.y < line_y else 'Line 2'
             
             # First, retrieve part information from BOM
-            class_name = detection['class_name']
             part_info = self.bom_reader.get_part_info(class_name)
             
             print(f"\nDebug - LineCounter - Creating crossing data for {line_key}:")
@@ -76,7 +96,7 @@ class LineCounter:
             
             # Create crossing data with exact property names expected by frontend
             self.latest_crossings[line_key] = {
-                'class_name': detection['class_name'],
+                'class_name': class_name,
                 'program': part_info['program'],
                 'part_number': part_info['part_number'],
                 'part_description': part_info['part_description'],
@@ -103,6 +123,14 @@ class LineCounter:
             
             self.counted_ids.add(track_id)
 
+    def get_track_stats(self) -> Dict:
+        """Size and eviction counters of the track bookkeeping"""
+        return {
+            'counted_ids': self.counted_ids.get_stats(),
+            'objects_between_lines': self.objects_between_lines.get_stats(),
+            'positions': self.tracking_state.get_stats()
+        }
+
     def get_counts(self) -> Dict[str, int]:
         """Get current counts for both lines"""
         return self.counts.copy()
@@ -0,0 +1,71 @@
+import cv2
+import numpy as np
+from typing import Dict, Tuple
+
+
+class MotionGate:
+    """Cheap frame-differencing check that decides whether the detector needs to run.
+
+    The counting region is downsampled to grayscale and compared with a
+    reference sample: the frame the detector last ran on. When less than
+    min_changed_fraction of the pixels differ for more than hold_frames
+    frames in a row, the scene is treated as idle. The reference does not
+    move while frames are skipped, so a slow part that changes little per
+    frame still adds up to motion and wakes the detector.
+    """
+
+    def __init__(self, pixel_threshold: int = 25, min_changed_fraction: float = 0.002,
+                 hold_frames: int = 25, scale: float = 0.25):
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_fraction = min_changed_fraction
+        self.hold_frames = hold_frames
+        self.scale = scale
+        self._reference = None
+        self._idle_frames = 0
+        self.frames = 0
+        self.skipped = 0
+        self.last_changed_fraction = 0.0
+
+    def should_run(self, frame: cv2.Mat, region: Tuple[int, int]) -> bool:
+        """True if something moved in the region recently enough to run the detector"""
+        self.frames += 1
+        x_start, x_end = region
+        sample = cv2.resize(frame[:, x_start:x_end], None, fx=self.scale, fy=self.scale,
+                            interpolation=cv2.INTER_AREA)
+        sample = cv2.GaussianBlur(cv2.cvtColor(sample, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+        reference = self._reference
+        if reference is None or reference.shape != sample.shape:
+            return self._run(sample)
+
+        diff = cv2.absdiff(sample, reference)
+        self.last_changed_fraction = np.count_nonzero(diff > self.pixel_threshold) / diff.size
+        if self.last_changed_fraction >= self.min_changed_fraction:
+            return self._run(sample)
+
+        # Keep running for a while after motion stops so slow parts are not lost
+        self._idle_frames += 1
+        if self._idle_frames <= self.hold_frames:
+            self._reference = sample
+            return True
+        self.skipped += 1
+        return False
+
+    def _run(self, sample: np.ndarray) -> bool:
+        """Motion: the detector runs on this frame, which becomes the reference"""
+        self._reference = sample
+        self._idle_frames = 0
+        return True
+
+    def reset(self) -> None:
+        self._reference = None
+        self._idle_frames = 0
+
+    def get_stats(self) -> Dict:
+        return {
+            'frames': self.frames,
+            'skipped': self.skipped,
+            'skip_ratio': round(self.skipped / self.frames, 3) if self.frames else 0.0,
+            'idle': self._idle_frames > self.hold_frames,
+            'changed_fraction': round(self.last_changed_fraction, 4)
+        }
@@ -0,0 +1,349 @@
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import cv2
+
+from .config import Config
+from .detection import crop_to_region, extract_detections, inference_region
+from .event_manager import EventManager
+from .inference_backend import load_model
+from .line_counter import LineCounter
+from .pipeline import BLOCK, FramePipeline
+from .production_tracker import ProductionTracker
+from .track_propagation import KeyframeScheduler
+from .video import VideoStream
+
+# Video time is expressed as an offset from this fixed point
+_VIDEO_EPOCH = datetime(2000, 1, 1)
+
+
+class _CrossingRecorder(EventManager):
+    """Headless event manager that records every counted crossing instead of emitting it"""
+
+    def __init__(self, production_tracker: ProductionTracker):
+        super().__init__()
+        self.set_production_tracker(production_tracker)
+        self.crossings: List[Dict] = []
+        self._last_counts = {'line1': 0, 'line2': 0}
+
+    def update_production(self, counts, crossings):
+        super().update_production(counts, crossings)
+        # LineCounter calls this once per newly counted part
+        for count_key, line_key in (('line1', 'Line 1'), ('line2', 'Line 2')):
+            if counts[count_key] > self._last_counts[count_key] and crossings[line_key]:
+                crossing = crossings[line_key]
+                self.crossings.append({
+                    'line': line_key,
+                    'video_seconds': round((self.production_tracker.clock() - _VIDEO_EPOCH).total_seconds(), 3),
+                    'track_id': crossing['track_id'],
+                    'class_name': crossing['class_name'],
+                    'program': crossing['program'],
+                    'part_number': crossing['part_number']
+                })
+        self._last_counts = dict(counts)
+
+
+class OfflineAnalyzer:
+    """Count parts in a recorded clip as fast as the CPU allows.
+
+    Frames are decoded, batched through YOLO.track and counted by a headless
+    LineCounter/ProductionTracker pair. Nothing is drawn or encoded and the
+    live dashboard state is not touched. With Config.keyframe_enabled the
+    frames go through the same KeyframeScheduler as the live detector, one
+    at a time.
+    """
+
+    def __init__(self, batch_size: int = 8, config: Optional[Config] = None):
+        self.config = config or Config()
+        self.batch_size = max(1, batch_size)
+
+    def analyze(self, video_path: str, progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """Analyze a video file and return the count/TBP report"""
+        capture = cv2.VideoCapture(video_path)
+        if not capture.isOpened():
+            raise ValueError(f"Failed to open the video file: {video_path}")
+
+        source_fps = capture.get(cv2.CAP_PROP_FPS) or self.config.frame_rate
+        total_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+
+        # Fresh model so the tracker state of the live detector is untouched
+        model = load_model(self.config)
+        names = model.names
+        resizer = VideoStream()
+
+        tracker = ProductionTracker()
+        recorder = _CrossingRecorder(tracker)
+        line_counter = LineCounter(event_manager=recorder)
+        line_counter.update_frame_dimensions(self.config.frame_width, self.config.frame_height)
+
+        region = inference_region(line_counter, self.config)
+        state = {'frame_index': 0}
+        tracker.clock = lambda: _VIDEO_EPOCH + timedelta(seconds=state['frame_index'] / source_fps)
+
+        def decode():
+            batch = []
+            while len(batch) < self.batch_size:
+                ret, frame = capture.read()
+                if not ret:
+                    break
+                frame = resizer.maintain_aspect_ratio(frame, self.config.frame_width, self.config.frame_height)
+                batch.append(crop_to_region(frame, region))
+            if not batch:
+                raise StopIteration
+            return batch
+
+        scheduler = None
+        if self.config.keyframe_enabled:
+            scheduler = KeyframeScheduler(self.config.keyframe_max_interval,
+                                          self.config.keyframe_max_displacement,
+                                          self.config.keyframe_uncertainty_px)
+
+        def inference(batch):
+            if scheduler is None:
+                results = model.track(batch, persist=True, verbose=False)
+                return [extract_detections(result, names, x_offset=region[0]) for result in results]
+
+            # Keyframe decisions depend on the previous frame, so no batching here
+            batch_detections = []
+            for frame in batch:
+                if scheduler.needs_detection():
+                    result = model.track(frame, persist=True, verbose=False)[0]
+                    detections = extract_detections(result, names, x_offset=region[0])
+                    scheduler.on_detections(detections)
+                else:
+                    detections = scheduler.propagate()
+                batch_detections.append(detections)
+            return batch_detections
+
+        def count(batch_detections):
+            for detections in batch_detections:
+                state['frame_index'] += 1
+                if len(detections):
+                    line_counter.update_counts(detections)
+            if progress_callback:
+                progress_callback(state['frame_index'], total_frames)
+            return len(batch_detections)
+
+        # Offline frames must never be dropped, so the queues block instead
+        pipeline = FramePipeline([('decode', decode), ('inference', inference), ('count', count)],
+                                 queue_size=2, drop_policy=BLOCK)
+        started = time.perf_counter()
+        try:
+            pipeline.start()
+            for _ in pipeline.frames():
+                pass
+        finally:
+            pipeline.stop()
+            capture.release()
+        wall_seconds = time.perf_counter() - started
+
+        report = self._build_report(video_path, state['frame_index'], source_fps,
+                                    wall_seconds, tracker, recorder.crossings, pipeline.get_stats())
+        if scheduler is not None:
+            report['keyframes'] = scheduler.get_stats()
+        return report
+
+    def _build_report(self, video_path: str, frames: int, source_fps: float, wall_seconds: float,
+                      tracker: ProductionTracker, crossings: List[Dict], pipeline_stats: Dict) -> Dict:
+        video_seconds = frames / source_fps if source_fps else 0
+        lines = {}
+        for line_key in ('Line 1', 'Line 2'):
+            line_crossings = [c for c in crossings if c['line'] == line_key]
+            gaps = [b['video_seconds'] - a['video_seconds']
+                    for a, b in zip(line_crossings, line_crossings[1:])]
+            parts = {}
+            for crossing in line_crossings:
+                parts[crossing['part_number']] = parts.get(crossing['part_number'], 0) + 1
+            lines[line_key] = {
+                'count': tracker.line_data[line_key]['production']['quantity'],
+                'parts': parts,
+                'total_tbp': tracker.total_tbp[line_key],
+                'avg_tbp': round(sum(gaps) / len(gaps), 2) if gaps else 0,
+                'min_tbp': round(min(gaps), 2) if gaps else 0,
+                'max_tbp': round(max(gaps), 2) if gaps else 0,
+                'pph': round(len(line_crossings) * 3600 / video_seconds, 1) if video_seconds else 0
+            }
+
+        return {
+            'video': os.path.basename(video_path),
+            'frames': frames,
+            'source_fps': round(source_fps, 2),
+            'video_seconds': round(video_seconds, 2),
+            'total_quantity': tracker.total_quantity,
+            'lines': lines,
+            'crossings': crossings,
+            'throughput': {
+                'batch_size': self.batch_size,
+                'wall_seconds': round(wall_seconds, 2),
+                'fps': round(frames / wall_seconds, 1) if wall_seconds else 0,
+                'realtime_factor': round(video_seconds / wall_seconds, 2) if wall_seconds else 0,
+                'stages': pipeline_stats['stages']
+            }
+        }
+
+
+def compare_keyframe_counts(video_path: str, batch_size: int = 8, tolerance_seconds: float = 0.5) -> Dict:
+    """Count a clip with and without keyframe mode and list every disagreement.
+
+    Crossings are matched per line by video time. A crossing only found by
+    full detection is a missed count; one only found in keyframe mode is a
+    double or false count.
+    """
+    reference_config = Config()
+    reference_config.keyframe_enabled = False
+    keyframe_config = Config()
+    keyframe_config.keyframe_enabled = True
+
+    reference = OfflineAnalyzer(batch_size, reference_config).analyze(video_path)
+    keyframed = OfflineAnalyzer(batch_size, keyframe_config).analyze(video_path)
+
+    missed, extra = [], []
+    for line_key in ('Line 1', 'Line 2'):
+        expected = [c for c in reference['crossings'] if c['line'] == line_key]
+        actual = [c for c in keyframed['crossings'] if c['line'] == line_key]
+        i = j = 0
+        while i < len(expected) and j < len(actual):
+            gap = actual[j]['video_seconds'] - expected[i]['video_seconds']
+            if abs(gap) <= tolerance_seconds:
+                i += 1
+                j += 1
+            elif gap > 0:
+                missed.append(expected[i])
+                i += 1
+            else:
+                extra.append(actual[j])
+                j += 1
+        missed.extend(expected[i:])
+        extra.extend(actual[j:])
+
+    return {
+        'video': os.path.basename(video_path),
+        'reference_counts': {k: v['count'] for k, v in reference['lines'].items()},
+        'keyframe_counts': {k: v['count'] for k, v in keyframed['lines'].items()},
+        'missed': missed,
+        'extra': extra,
+        'reference_fps': reference['throughput']['fps'],
+        'keyframe_fps': keyframed['throughput']['fps'],
+        'keyframes': keyframed.get('keyframes')
+    }
+
+
+class AnalysisJobManager:
+    """Runs offline analyses one at a time on a background thread"""
+
+    _instance = None
+
+    def __init__(self):
+        self.jobs: Dict[str, Dict] = {}
+        self._pending = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = AnalysisJobManager()
+        return cls._instance
+
+    def submit(self, video_path: str, batch_size: int = 8, delete_after: bool = False) -> str:
+        """Queue a video for analysis and return its job id"""
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self.jobs[job_id] = {
+                'job_id': job_id,
+                'status': 'queued',
+                'video': os.path.basename(video_path),
+                'progress': 0.0,
+                'submitted': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'report': None,
+                'error': None,
+                '_path': video_path,
+                '_batch_size': batch_size,
+                '_delete_after': delete_after
+            }
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="offline-analysis", daemon=True)
+                self._worker.start()
+        self._pending.put(job_id)
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        return {key: value for key, value in job.items() if not key.startswith('_')}
+
+    def _run(self) -> None:
+        while True:
+            job_id = self._pending.get()
+            job = self.jobs[job_id]
+            job['status'] = 'running'
+
+            def progress(done, total, job=job):
+                job['progress'] = round(done / total, 3) if total else 0.0
+
+            try:
+                analyzer = OfflineAnalyzer(batch_size=job['_batch_size'])
+                job['report'] = analyzer.analyze(job['_path'], progress_callback=progress)
+                job['progress'] = 1.0
+                job['status'] = 'done'
+            except Exception as e:
+                print(f"Error in offline analysis job {job_id}: {e}")
+                job['status'] = 'failed'
+                job['error'] = str(e)
+            finally:
+                if job['_delete_after'] and os.path.exists(job['_path']):
+                    try:
+                        os.remove(job['_path'])
+                    except Exception as e:
+                        print(f"Warning: Could not remove analysed video: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count parts in a recorded video without the live preview")
+    parser.add_argument("video", help="Path to the video file")
+    parser.add_argument("--batch-size", type=int, default=8, help="Frames per YOLO.track call")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--check-keyframes", action="store_true",
+                        help="Verify keyframe mode gives the same counts as full detection")
+    args = parser.parse_args()
+
+    if args.check_keyframes:
+        comparison = compare_keyframe_counts(args.video, batch_size=args.batch_size)
+        print(json.dumps(comparison, indent=2))
+        if comparison['missed'] or comparison['extra']:
+            print(f"Keyframe mode disagrees: {len(comparison['missed'])} missed, "
+                  f"{len(comparison['extra'])} extra counts")
+            sys.exit(1)
+        print("Keyframe mode counts match full detection")
+        return
+
+    def progress(done, total):
+        if total and done % 500 < args.batch_size:
+            print(f"Analyzed {done}/{total} frames")
+
+    report = OfflineAnalyzer(batch_size=args.batch_size).analyze(args.video, progress_callback=progress)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+        print(f"Report written to {args.output}")
+    else:
+        print(output)
+
+    throughput = report['throughput']
+    print(f"Line 1: {report['lines']['Line 1']['count']} parts, Line 2: {report['lines']['Line 2']['count']} parts")
+    print(f"{report['frames']} frames in {throughput['wall_seconds']}s "
+          f"({throughput['fps']} fps, {throughput['realtime_factor']}x real time)")
+
+
+if __name__ == '__main__':
+    main()
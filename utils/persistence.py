@@ -0,0 +1,201 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from .scrap_journal import ScrapJournal
+
+
+class WriteBehindQueue:
+    """Single-writer persistence worker in front of the scrap journal.
+
+    submit() appends the entry to a spool file and fsyncs it, which makes
+    the entry durable, and returns straight away. One background thread
+    takes everything that is waiting, writes it to the journal in a
+    single transaction, and empties the spool once the queue is idle.
+    After a crash the spool is replayed on startup. The journal skips
+    spool ids it already holds, so replaying twice is harmless.
+    on_persisted is called from the writer thread with the journal ids of
+    every batch it wrote, leaving out entries the journal already held.
+    """
+
+    def __init__(self, journal: ScrapJournal, spool_path: str = "scrap_spool.jsonl",
+                 max_batch: int = 500, retry_delay: float = 1.0, max_retry_delay: float = 30.0,
+                 on_persisted: Optional[Callable[[List[int]], None]] = None):
+        self.journal = journal
+        self.on_persisted = on_persisted
+        self.spool_path = spool_path
+        self.max_batch = max(1, max_batch)
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._lock = threading.Lock()
+        self._has_work = threading.Condition(self._lock)
+        self._pending: deque = deque()  # Spool records not yet in the journal
+        self._stop_requested = False
+        self._worker = None
+        self.submitted = 0
+        self.persisted = 0
+        self.batches = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_batch_size = 0
+        self.last_persisted_at = None
+
+        self.recovered = self._recover()
+        self._spool = open(self.spool_path, 'a+', encoding='utf-8')
+
+    def _recover(self) -> int:
+        """Queue the records a previous run spooled but never wrote to the journal"""
+        lines, torn = [], False
+        try:
+            with open(self.spool_path, encoding='utf-8') as spool:
+                for line in spool:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        torn = True  # Torn last line of a write cut short by the crash
+                        continue
+                    lines.append(json.dumps(record, ensure_ascii=False) + '\n')
+                    record['queued_at'] = time.monotonic()
+                    self._pending.append(record)
+        except FileNotFoundError:
+            return 0
+
+        if torn:
+            # Rewrite without the torn line so new records don't get appended onto it. The clean
+            # copy is on disk before it replaces the spool, so a crash here loses nothing.
+            temp_path = self.spool_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.spool_path)
+            if hasattr(os, 'O_DIRECTORY'):
+                directory = os.open(os.path.dirname(os.path.abspath(self.spool_path)), os.O_DIRECTORY)
+                try:
+                    os.fsync(directory)
+                finally:
+                    os.close(directory)
+        if lines:
+            print(f"Debug - Recovered {len(lines)} spooled scrap entries")
+        return len(lines)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._stop_requested = False
+            self._worker = threading.Thread(target=self._run, name="scrap-writer", daemon=True)
+            self._worker.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop after writing what is queued; anything left stays in the spool"""
+        with self._lock:
+            self._stop_requested = True
+            self._has_work.notify_all()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+
+    def submit(self, entry: Dict) -> str:
+        """Durably queue an entry for the journal and return its spool id"""
+        now = datetime.now()
+        record = {
+            'spool_id': uuid.uuid4().hex,
+            'moment': now.isoformat(),
+            'entry': entry
+        }
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._spool.write(line)
+            self._spool.flush()
+            os.fsync(self._spool.fileno())
+            record['queued_at'] = time.monotonic()
+            self._pending.append(record)
+            self.submitted += 1
+            self._has_work.notify_all()
+        return record['spool_id']
+
+    def _run(self) -> None:
+        delay = self.retry_delay
+        while True:
+            with self._lock:
+                while not self._pending and not self._stop_requested:
+                    self._has_work.wait()
+                if not self._pending:
+                    return
+                # Coalesce everything that queued up while the last batch was written
+                batch = [self._pending[i] for i in range(min(self.max_batch, len(self._pending)))]
+
+            try:
+                ids = self.journal.append_many([record['entry'] for record in batch],
+                                         [datetime.fromisoformat(record['moment']) for record in batch],
+                                         [record['spool_id'] for record in batch])
+            except Exception as e:
+                with self._lock:
+                    self.failures += 1
+                    self.last_error = str(e)
+                print(f"Error persisting {len(batch)} scrap entries, retrying in {delay:.0f}s: {e}")
+                with self._lock:
+                    if self._stop_requested:
+                        return
+                    self._has_work.wait(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+                continue
+
+            delay = self.retry_delay
+            with self._lock:
+                for _ in batch:
+                    self._pending.popleft()
+                self.persisted += len(batch)
+                self.batches += 1
+                self.last_batch_size = len(batch)
+                self.last_persisted_at = datetime.now()
+                self.last_error = None
+                if not self._pending:
+                    # Everything spooled is in the journal now
+                    self._spool.seek(0)
+                    self._spool.truncate()
+                    self._spool.flush()
+                    os.fsync(self._spool.fileno())
+                self._has_work.notify_all()  # Wake flush() callers
+
+            if self.on_persisted:
+                try:
+                    self.on_persisted([entry_id for entry_id in ids if entry_id is not None])
+                except Exception as e:
+                    print(f"Error handling persisted scrap entries: {e}")
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until everything submitted so far is in the journal"""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            target = self.submitted + self.recovered
+            while self.persisted < target and self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._worker is None:
+                    return False
+                self._has_work.wait(remaining)
+            return True
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            oldest = self._pending[0]['queued_at'] if self._pending else None
+            return {
+                'running': self._worker is not None and self._worker.is_alive(),
+                'queued': len(self._pending),
+                'lag_seconds': round(time.monotonic() - oldest, 3) if oldest is not None else 0.0,
+                'submitted': self.submitted,
+                'persisted': self.persisted,
+                'recovered': self.recovered,
+                'batches': self.batches,
+                'last_batch_size': self.last_batch_size,
+                'avg_batch_size': round(self.persisted / self.batches, 1) if self.batches else 0.0,
+                'failures': self.failures,
+                'last_error': self.last_error,
+                'last_persisted_at': self.last_persisted_at.isoformat(timespec='seconds')
+                if self.last_persisted_at else None
+            }
@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Generator, List, Optional
+
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+BLOCK = 'block'
+DROP_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+# Passed down the pipeline once the source stage runs out of frames
+_END_OF_STREAM = object()
+
+
+class StageQueue:
+    """Bounded hand-off queue between two pipeline stages"""
+
+    def __init__(self, maxsize: int = 2, drop_policy: str = DROP_OLDEST):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.maxsize = max(1, maxsize)
+        self.drop_policy = drop_policy
+        self.dropped = 0
+        self._items = deque()
+        self._condition = threading.Condition()
+
+    def put(self, item: Any, stop_event: threading.Event, force: bool = False) -> None:
+        """Add an item, applying the drop policy when the queue is full"""
+        with self._condition:
+            while not force and len(self._items) >= self.maxsize:
+                if self.drop_policy == DROP_OLDEST:
+                    self._items.popleft()
+                    self.dropped += 1
+                elif self.drop_policy == DROP_NEWEST:
+                    self.dropped += 1
+                    return
+                else:
+                    if stop_event.is_set():
+                        return
+                    self._condition.wait(0.1)
+            self._items.append(item)
+            self._condition.notify_all()
+
+    def get(self, timeout: float = 0.1) -> Optional[Any]:
+        """Take the next item, or None if nothing arrived within the timeout"""
+        with self._condition:
+            if not self._items:
+                self._condition.wait(timeout)
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._condition.notify_all()
+            return item
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+
+class PipelineStage:
+    """One worker thread running a single step of the frame pipeline"""
+
+    def __init__(self, name: str, func: Callable, input_queue: Optional[StageQueue],
+                 output_queue: StageQueue):
+        self.name = name
+        self.func = func
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.processed = 0
+        self.errors = 0
+        self.busy_ms = 0.0  # Moving average of time spent in func
+        self._completed_at = deque(maxlen=50)
+        self._thread = None
+
+    def start(self, stop_event: threading.Event) -> None:
+        self._thread = threading.Thread(target=self._run, args=(stop_event,),
+                                        name=f"pipeline-{self.name}", daemon=True)
+        self._thread.start()
+
+    def join(self, timeout: float = 1.0) -> None:
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _run(self, stop_event: threading.Event) -> None:
+        while not stop_event.is_set():
+            if self.input_queue is None:
+                item = None
+            else:
+                item = self.input_queue.get()
+                if item is None:
+                    continue
+                if item is _END_OF_STREAM:
+                    self.output_queue.put(item, stop_event, force=True)
+                    break
+
+            started = time.perf_counter()
+            try:
+                result = self.func() if self.input_queue is None else self.func(item)
+            except StopIteration:
+                # Source ran out of frames; let downstream stages drain first
+                self.output_queue.put(_END_OF_STREAM, stop_event, force=True)
+                break
+            except Exception as e:
+                self.errors += 1
+                print(f"Error in pipeline stage {self.name}: {e}")
+                continue
+            finished = time.perf_counter()
+
+            elapsed_ms = (finished - started) * 1000
+            self.busy_ms = elapsed_ms if self.processed == 0 else 0.9 * self.busy_ms + 0.1 * elapsed_ms
+            self.processed += 1
+            self._completed_at.append(finished)
+
+            if result is not None:
+                self.output_queue.put(result, stop_event)
+
+    def get_stats(self) -> Dict:
+        """Throughput and queue depth for this stage"""
+        fps = 0.0
+        if len(self._completed_at) > 1:
+            span = self._completed_at[-1] - self._completed_at[0]
+            if span > 0:
+                fps = (len(self._completed_at) - 1) / span
+        return {
+            'name': self.name,
+            'processed': self.processed,
+            'errors': self.errors,
+            'fps': round(fps, 1),
+            'avg_ms': round(self.busy_ms, 2),
+            'input_depth': self.input_queue.qsize() if self.input_queue else 0,
+            'input_capacity': self.input_queue.maxsize if self.input_queue else 0,
+            'dropped_output': self.output_queue.dropped
+        }
+
+
+class FramePipeline:
+    """Chain of stages linked by bounded queues, each stage on its own thread.
+
+    The first stage is a source that takes no input and raises StopIteration
+    when it has nothing more to produce. Items from the last stage are read
+    with frames().
+    """
+
+    def __init__(self, stages: List[tuple], queue_size: int = 2, drop_policy: str = DROP_OLDEST):
+        self._stop_event = threading.Event()
+        self.stages: List[PipelineStage] = []
+        input_queue = None
+        for name, func in stages:
+            output_queue = StageQueue(queue_size, drop_policy)
+            self.stages.append(PipelineStage(name, func, input_queue, output_queue))
+            input_queue = output_queue
+        self.output_queue = input_queue
+
+    def start(self) -> None:
+        for stage in self.stages:
+            stage.start(self._stop_event)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        for stage in self.stages:
+            stage.join()
+
+    def is_running(self) -> bool:
+        return not self._stop_event.is_set()
+
+    def frames(self) -> Generator[Any, None, None]:
+        """Yield output of the last stage until the pipeline stops"""
+        while not self._stop_event.is_set():
+            item = self.output_queue.get()
+            if item is _END_OF_STREAM:
+                self._stop_event.set()
+                break
+            if item is not None:
+                yield item
+
+    def get_stats(self) -> Dict:
+        """Per-stage stats plus the name of the slowest stage"""
+        stages = [stage.get_stats() for stage in self.stages]
+        bottleneck = max(stages, key=lambda s: s['avg_ms'])['name'] if stages else None
+        return {
+            'running': self.is_running(),
+            'stages': stages,
+            'output_depth': self.output_queue.qsize(),
+            'bottleneck': bottleneck
+        }
@@ -4,7 +4,7 @@ from .bom_reader import BOMReader
 
 class ProductionTracker:
     def __init__(self):
-        self.bom_reader = BOMReader()
+        self.bom_reader = BOMReader.get_instance()
         self.line1_data = {
             'part': {
                 'program': '',
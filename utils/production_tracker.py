@@ -1,11 +1,34 @@
-from datetime import datetime
-from typing import Dict, Optional
+import copy
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
 from .bom_reader import BOMReader
-from .excel_logger import ExcelLogger
+from .crossing_log import CrossingLog
+from .config import Config
+from .track_store import TrackStore
+from .event_store import ProductionEventStore
+from .rollups import ProductionRollups
+from .timeseries import TimeSeriesStore
+from .scrap_stats import ScrapStats
 
 class ProductionTracker:
-    def __init__(self):
-        """Initialize production tracker"""
+    def __init__(self, crossing_log: Optional[CrossingLog] = None,
+                 event_store: Optional[ProductionEventStore] = None, snapshot_every: int = 500,
+                 rollups: Optional[ProductionRollups] = None, timeseries: Optional[TimeSeriesStore] = None,
+                 scrap_stats: Optional[ScrapStats] = None):
+        """Initialize production tracker.
+
+        Counted crossings are written to crossing_log if given. With an
+        event_store every state change is persisted as an event first, and
+        a snapshot is taken every snapshot_every events so recover() can
+        rebuild the state after a restart. Shift and hour counters are kept
+        in rollups; without one, a whole day counts as one shift. The
+        dashboard's quantities, scrap totals and class counts cover the
+        current shift, like its delta. Chart history is kept in the
+        fixed-size timeseries store, scrap rates and defect Paretos in
+        scrap_stats.
+        """
         self.line_data = {
             'Line 1': {
                 'part': {
@@ -48,23 +71,45 @@ class ProductionTracker:
         # Separate tracking for production and scrap totals
         self.total_quantity = 0
         self.total_scrap = 0
+        self.average_scrap_rate = 0.0
+        self.class_counts: Dict[str, Dict] = {}  # class name -> quantity and part description
+        self.shift_key: Optional[str] = None  # Shift the counters above cover
+
+        # Bumped on every change of what get_all_data() returns, so pushes can send only what changed
+        self.version = 0
         
         # Track IDs that have been counted
-        self.counted_track_ids = set()
+        config = Config()
+        self.counted_track_ids = TrackStore(config.track_ttl_seconds, config.track_max_entries,
+                                            config.track_recount_window_seconds)
+        # The latest crossing of each line is passed in again every frame until the next part
+        # crosses; it becomes an event once, however long ago its track id expired
+        self._consumed_crossings = {'Line 1': None, 'Line 2': None}
         
         # Time between parts tracking
         self.last_crossing_time = {'Line 1': None, 'Line 2': None}
         self.tbp = {'Line 1': 0, 'Line 2': 0}  # Time between parts (seconds)
         self.total_tbp = {'Line 1': 0, 'Line 2': 0}  # Total time between parts
 
+        # Source of "now"; offline analysis replaces it with video time
+        self.clock = datetime.now
+        self.crossing_log = crossing_log
+        self.rollups = rollups or ProductionRollups()
+        self.timeseries = timeseries or TimeSeriesStore(self.rollups.calendar)
+        self.scrap_stats = scrap_stats or ScrapStats(self.rollups.calendar)
+
+        self.event_store = event_store
+        self.snapshot_every = max(1, snapshot_every)
+        self._last_seq = 0
+        self._events_since_snapshot = 0
+        self._event_lock = threading.RLock()
+
     def update_production(self, counts: Dict[str, int], latest_crossings: Dict[str, Optional[Dict]]) -> None:
         """Update production data based on line crossings"""
         print("\nDebug - Updating production with:")
         print(f"Latest crossings: {latest_crossings}")
         
-        current_time = datetime.now()
-        current_hour_start = current_time.replace(minute=0, second=0, microsecond=0)
-        elapsed_hour_fraction = (current_time - current_hour_start).total_seconds() / 3600.0
+        current_time = self.clock()
         
         for line_key in ['Line 1', 'Line 2']:
             # Debug - Print current state before update
@@ -75,61 +120,241 @@ class ProductionTracker:
             crossing_data = latest_crossings[line_key]
             if crossing_data:
                 track_id = crossing_data['track_id']
-                
-                # Calculate time between parts only for new track IDs
-                if track_id not in self.counted_track_ids:
-                    if self.last_crossing_time[line_key]:
-                        self.tbp[line_key] = int((current_time - self.last_crossing_time[line_key]).total_seconds())
-                        self.total_tbp[line_key] += self.tbp[line_key]
-                    self.last_crossing_time[line_key] = current_time
-
-                # Update only part information
                 target = int(crossing_data.get('target', 0))
-                
-                # Save current scrap data
-                current_scrap_total = self.line_data[line_key]['scrap']['total']
-                
-                self.line_data[line_key]['part'].update({
-                    'program': crossing_data['program'],
-                    'part_number': crossing_data['part_number'],
-                    'part_description': crossing_data['part_description'],
-                    'track_id': track_id,
-                    'target': target,
-                    'class_name': crossing_data.get('class_name', '')
-                })
-
-                # Calculate theoretical target for current hour
-                theoretical_target = int(target * elapsed_hour_fraction)
-                
-                # Only update quantities if this track_id hasn't been counted before
-                if track_id not in self.counted_track_ids:
-                    self.line_data[line_key]['production']['quantity'] += 1
-                    current_quantity = self.line_data[line_key]['production']['quantity']
-                    self.line_data[line_key]['production']['delta'] = current_quantity - theoretical_target
-                    self.total_quantity += 1
+
+                crossing_key = (track_id, crossing_data.get('timestamp'))
+                is_new = crossing_key != self._consumed_crossings[line_key]
+                self._consumed_crossings[line_key] = crossing_key
+                if is_new and track_id not in self.counted_track_ids:
+                    # Only a new crossing of a new track_id changes quantities, so only it becomes an event
                     self.counted_track_ids.add(track_id)
+                    self.apply_new_event({
+                        'type': 'crossing',
+                        'line': line_key,
+                        'time': current_time.isoformat(),
+                        'track_id': track_id,
+                        'class_name': crossing_data.get('class_name', ''),
+                        'program': crossing_data['program'],
+                        'part_number': crossing_data['part_number'],
+                        'part_description': crossing_data['part_description'],
+                        'target': target
+                    })
+                    if self.crossing_log:
+                        self.crossing_log.record(line_key, crossing_data, current_time)
+                else:
+                    # Update only part information
+                    with self._event_lock:
+                        before = dict(self.line_data[line_key]['part'])
+                        self._set_part(line_key, crossing_data, track_id, target)
+                        if self.line_data[line_key]['part'] != before:
+                            self.version += 1
                 
                 # Debug - Print state after update
                 print(f"\nDebug - {line_key} AFTER production update:")
                 print(f"Production: {self.line_data[line_key]['production']}")
                 print(f"Scrap: {self.line_data[line_key]['scrap']}")
 
-    def update_scrap(self, line_key: str, quantity: int = 1) -> None:
-        """Update scrap data for a line"""
+    def update_scrap(self, line_key: str, quantity: int = 1, part_number: str = '', defect_code: str = '') -> None:
+        """Update scrap data for a line; part number and defect code feed the rates and Paretos"""
         # Debug - Print current state before update
         print(f"\nDebug - {line_key} BEFORE scrap update:")
         print(f"Production: {self.line_data[line_key]['production']}")
         print(f"Scrap: {self.line_data[line_key]['scrap']}")
         
         # Update scrap total
-        self.line_data[line_key]['scrap']['total'] += quantity
-        self.total_scrap += quantity
+        self.apply_new_event({
+            'type': 'scrap',
+            'line': line_key,
+            'time': self.clock().isoformat(),
+            'quantity': quantity,
+            'part_number': part_number,
+            'defect_code': defect_code
+        })
         
         # Debug - Print state after update
         print(f"\nDebug - {line_key} AFTER scrap update:")
         print(f"Production: {self.line_data[line_key]['production']}")
         print(f"Scrap: {self.line_data[line_key]['scrap']}")
 
+    def _set_part(self, line_key: str, crossing_data: Dict, track_id, target: int) -> None:
+        self.line_data[line_key]['part'].update({
+            'program': crossing_data['program'],
+            'part_number': crossing_data['part_number'],
+            'part_description': crossing_data['part_description'],
+            'track_id': track_id,
+            'target': target,
+            'class_name': crossing_data.get('class_name', '')
+        })
+
+    def apply_new_event(self, event: Dict) -> None:
+        """Persist an event (if there is an event store), then apply it"""
+        with self._event_lock:
+            if self.event_store:
+                self._last_seq = self.event_store.append(event)
+            self.apply_event(event)
+            if self.event_store:
+                self._events_since_snapshot += 1
+                if self._events_since_snapshot >= self.snapshot_every:
+                    self.take_snapshot()
+
+    def apply_event(self, event: Dict) -> None:
+        """Apply a crossing or scrap event to the state; used both live and for replay"""
+        line_key = event['line']
+        event_time = datetime.fromisoformat(event['time'])
+        if event['type'] not in ('crossing', 'scrap'):
+            return
+        self._roll_over(event_time)
+        if event['type'] == 'crossing':
+            # Calculate time between parts
+            if self.last_crossing_time[line_key]:
+                self.tbp[line_key] = int((event_time - self.last_crossing_time[line_key]).total_seconds())
+                self.total_tbp[line_key] += self.tbp[line_key]
+            self.last_crossing_time[line_key] = event_time
+
+            target = int(event.get('target', 0))
+            self._set_part(line_key, event, event['track_id'], target)
+
+            # Delta against the shift target, prorated by scheduled working time
+            self.rollups.record_crossing(line_key, event['part_number'], target, event_time)
+            self.timeseries.record_crossing(line_key, event_time, target)
+            self.scrap_stats.record_crossing(line_key, event['part_number'], event_time)
+
+            production = self.line_data[line_key]['production']
+            production['quantity'] += 1
+            production['delta'] = self.rollups.shift_delta(line_key, event_time)
+            self.total_quantity += 1
+
+            class_name = event.get('class_name', '')
+            if class_name:
+                counts = self.class_counts.setdefault(class_name, {'quantity': 0, 'part_description': ''})
+                counts['quantity'] += 1
+                counts['part_description'] = event.get('part_description', '') or counts['part_description']
+        elif event['type'] == 'scrap':
+            self.line_data[line_key]['scrap']['total'] += event['quantity']
+            self.total_scrap += event['quantity']
+            self.scrap_stats.record_scrap(line_key, event.get('part_number', ''), event.get('defect_code', ''),
+                                          event_time, event['quantity'])
+
+        # Live rates cover the event's shift; more good parts lower them just as more scrap raises them
+        shift_key = self.scrap_stats.calendar.shift_key(event_time)
+        for key in self.line_data:
+            self.line_data[key]['scrap']['rate'] = self.scrap_stats.line_rate(key, shift_key)
+        self.average_scrap_rate = self.scrap_stats.average_rate(shift_key)
+        self.version += 1
+
+    def _roll_over(self, moment: datetime) -> None:
+        """Point the dashboard counters at the shift containing moment.
+
+        Quantities, deltas and scrap totals are taken from the rollups and
+        scrap stats of that shift, which are zero for a shift that has just
+        started. Class counts are not kept per shift and start over.
+        """
+        shift_key = self.rollups.calendar.shift_key(moment)
+        if shift_key == self.shift_key:
+            return
+        self.shift_key = shift_key
+        summary = self.rollups.get_shift_summary(shift_key, now=moment) or {}
+        rates = self.scrap_stats.get_rates(shift_key) or {}
+        for line_key, line in self.line_data.items():
+            shift_line = summary.get('lines', {}).get(line_key, {})
+            line['production']['quantity'] = shift_line.get('quantity', 0)
+            line['production']['delta'] = shift_line.get('delta', 0)
+            line['scrap']['total'] = rates.get(line_key, {}).get('scrap', 0)
+        self.total_quantity = sum(line['production']['quantity'] for line in self.line_data.values())
+        self.total_scrap = sum(line['scrap']['total'] for line in self.line_data.values())
+        self.class_counts = {}
+        self.version += 1
+
+    def get_snapshot_state(self) -> Dict:
+        """Everything apply_event changes, as JSON-friendly data"""
+        return {
+            'line_data': copy.deepcopy(self.line_data),
+            'total_quantity': self.total_quantity,
+            'total_scrap': self.total_scrap,
+            'average_scrap_rate': self.average_scrap_rate,
+            'class_counts': copy.deepcopy(self.class_counts),
+            'shift_key': self.shift_key,
+            'last_crossing_time': {line_key: moment.isoformat() if moment else None
+                                   for line_key, moment in self.last_crossing_time.items()},
+            'tbp': dict(self.tbp),
+            'total_tbp': dict(self.total_tbp),
+            'rollups': self.rollups.get_state(),
+            'scrap_stats': self.scrap_stats.get_state(),
+            'timeseries': self.timeseries.get_state()
+        }
+
+    def restore_snapshot_state(self, state: Dict) -> None:
+        self.line_data = copy.deepcopy(state['line_data'])
+        self.total_quantity = state['total_quantity']
+        self.total_scrap = state['total_scrap']
+        self.last_crossing_time = {line_key: datetime.fromisoformat(moment) if moment else None
+                                   for line_key, moment in state['last_crossing_time'].items()}
+        self.tbp = dict(state['tbp'])
+        self.total_tbp = dict(state['total_tbp'])
+        self.average_scrap_rate = state.get('average_scrap_rate', 0.0)
+        self.class_counts = copy.deepcopy(state.get('class_counts', {}))
+        self.shift_key = state.get('shift_key')  # None in older snapshots: re-scoped on the next roll-over
+        self.version += 1
+        if 'rollups' in state:
+            self.rollups.restore_state(state['rollups'])
+        if 'scrap_stats' in state:
+            self.scrap_stats.restore_state(state['scrap_stats'])
+        if 'timeseries' in state:
+            self.timeseries.restore_state(state['timeseries'])
+
+    def take_snapshot(self) -> None:
+        with self._event_lock:
+            if not self.event_store:
+                return
+            self.event_store.save_snapshot(self._last_seq, self.get_snapshot_state())
+            self._events_since_snapshot = 0
+
+    def recover(self) -> Dict:
+        """Rebuild the state from the newest snapshot plus the events after it"""
+        if not self.event_store:
+            return {'snapshot_seq': 0, 'replayed': 0, 'recovery_ms': 0.0}
+        start = time.perf_counter()
+        with self._event_lock:
+            snapshot = self.event_store.latest_snapshot()
+            snapshot_seq = 0
+            if snapshot:
+                snapshot_seq, state = snapshot
+                self.restore_snapshot_state(state)
+                # Minute and hour rings come with the snapshot; only the last hour of seconds is replayed
+                if 'timeseries' in state:
+                    since = (self.clock() - timedelta(seconds=self.timeseries.refill_seconds)).isoformat()
+                    # Each line's crossing before the hour gives the first one its TBP and the target
+                    # of the slots before it
+                    crossings = [self.event_store.last_crossing_before(line_key, since, snapshot_seq)
+                                 for line_key in self.line_data]
+                    crossings = [crossing for crossing in crossings if crossing]
+                    crossings.extend(self.event_store.crossings_between(since, snapshot_seq))
+                    self.timeseries.refill(crossings)
+                else:
+                    # A snapshot from before the rings were snapshotted: replay all they cover, once
+                    since = (self.clock() - timedelta(seconds=self.timeseries.span_seconds)).isoformat()
+                    for event in self.event_store.crossings_between(since, snapshot_seq):
+                        self.timeseries.record_crossing(event['line'], datetime.fromisoformat(event['time']),
+                                                        int(event.get('target', 0)))
+            self._last_seq = snapshot_seq
+            replayed = 0
+            for seq, event in self.event_store.events_after(snapshot_seq):
+                self.apply_event(event)
+                self._last_seq = seq
+                replayed += 1
+            self._events_since_snapshot = replayed
+            if snapshot or replayed:
+                # Restarted in a later shift than the last event: show that shift, not the previous one
+                self._roll_over(self.clock())
+        stats = {
+            'snapshot_seq': snapshot_seq,
+            'replayed': replayed,
+            'recovery_ms': round((time.perf_counter() - start) * 1000, 1)
+        }
+        print(f"Debug - ProductionTracker recovered from snapshot {snapshot_seq} "
+              f"+ {replayed} events in {stats['recovery_ms']} ms")
+        return stats
+
     def get_all_data(self) -> Dict:
         """Get all production data for display"""
         # Debug print current part data
@@ -142,6 +367,14 @@ class ProductionTracker:
         print(f"Line 1 production: {self.line_data['Line 1']['production']}")
         print(f"Line 2 production: {self.line_data['Line 2']['production']}")
 
+        return self._dashboard_data()
+
+    def get_versioned_data(self) -> Tuple[int, Dict]:
+        """The data of get_all_data() together with the version it belongs to"""
+        with self._event_lock:
+            return self.version, self._dashboard_data()
+
+    def _dashboard_data(self) -> Dict:
         # Calculate total scrap
         total_scrap = (self.line_data['Line 1']['scrap']['total'] + 
                       self.line_data['Line 2']['scrap']['total'])
@@ -169,23 +402,27 @@ class ProductionTracker:
                 'delta': self.line_data['Line 1']['production']['delta']
             },
             'line1_scrap': {
-                'total': self.line_data['Line 1']['scrap']['total']
+                'total': self.line_data['Line 1']['scrap']['total'],
+                'rate': self.line_data['Line 1']['scrap']['rate']
             },
             'line2_production': {
                 'quantity': self.line_data['Line 2']['production']['quantity'],
                 'delta': self.line_data['Line 2']['production']['delta']
             },
             'line2_scrap': {
-                'total': self.line_data['Line 2']['scrap']['total']
+                'total': self.line_data['Line 2']['scrap']['total'],
+                'rate': self.line_data['Line 2']['scrap']['rate']
             },
             'total_quantity': self.total_quantity,
             'total_delta': (self.line_data['Line 1']['production']['delta'] + 
                           self.line_data['Line 2']['production']['delta']),
             'total_scrap': total_scrap,
+            'average_scrap_rate': self.average_scrap_rate,
             'tbp_line1': self.tbp['Line 1'],
             'tbp_line2': self.tbp['Line 2'],
             'total_tbp_line1': self.total_tbp['Line 1'],
-            'total_tbp_line2': self.total_tbp['Line 2']
+            'total_tbp_line2': self.total_tbp['Line 2'],
+            'class_counts': copy.deepcopy(self.class_counts)
         }
 
         return data
\ No newline at end of file
@@ -0,0 +1,175 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from .shift_calendar import ShiftCalendar
+
+
+class _Bucket:
+    """Counters of one shift or one clock hour"""
+
+    def __init__(self, key: str, start: datetime, end: datetime, planned: bool, shift: Optional[str] = None):
+        self.key = key
+        self.start = start
+        self.end = end
+        self.planned = planned  # False for off-shift time, which has no target
+        self.shift = shift
+        self.lines: Dict[str, Dict] = {}
+
+    def to_state(self) -> Dict:
+        return {
+            'key': self.key, 'start': self.start.isoformat(), 'end': self.end.isoformat(),
+            'planned': self.planned, 'shift': self.shift,
+            'lines': {line: dict(counters, parts=dict(counters['parts']),
+                                 marked=counters['marked'].isoformat())
+                      for line, counters in self.lines.items()}
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> '_Bucket':
+        bucket = cls(state['key'], datetime.fromisoformat(state['start']), datetime.fromisoformat(state['end']),
+                     state['planned'], state['shift'])
+        bucket.lines = {line: dict(counters, parts=dict(counters['parts']),
+                                   marked=datetime.fromisoformat(counters['marked']))
+                        for line, counters in state['lines'].items()}
+        return bucket
+
+
+class ProductionRollups:
+    """Per-shift and per-hour production counters, updated as each crossing arrives.
+
+    Every crossing increments its line's and part's counters in the
+    current shift bucket and clock-hour bucket. Targets are parts per
+    hour of the part being run and are prorated by scheduled working time
+    from the shift calendar, so breaks and off-shift time add no target.
+    Target already earned is accumulated whenever the running part
+    changes; a summary adds the time since then with the calendar's
+    prefix sums. Reads never rescan the crossing log.
+    """
+
+    def __init__(self, calendar: Optional[ShiftCalendar] = None, keep_shifts: int = 21, keep_hours: int = 168):
+        self.calendar = calendar or ShiftCalendar.all_day()
+        self.keep_shifts = max(1, keep_shifts)
+        self.keep_hours = max(1, keep_hours)
+        self._lock = threading.Lock()
+        self._shifts: OrderedDict = OrderedDict()
+        self._hours: OrderedDict = OrderedDict()
+
+    def _shift_bucket(self, moment: datetime) -> _Bucket:
+        key = self.calendar.shift_key(moment)
+        bucket = self._shifts.get(key)
+        if bucket is None:
+            shift, start = self.calendar.shift_at(moment)
+            if shift:
+                bucket = _Bucket(key, start, start + timedelta(minutes=shift.length), True, shift.name)
+            else:
+                day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+                bucket = _Bucket(key, day, day + timedelta(days=1), False)
+            self._shifts[key] = bucket
+            while len(self._shifts) > self.keep_shifts:
+                self._shifts.popitem(last=False)
+        return bucket
+
+    def _hour_bucket(self, moment: datetime) -> _Bucket:
+        start = moment.replace(minute=0, second=0, microsecond=0)
+        key = f"{start:%Y-%m-%d %H}:00"
+        bucket = self._hours.get(key)
+        if bucket is None:
+            bucket = _Bucket(key, start, start + timedelta(hours=1), True)
+            self._hours[key] = bucket
+            while len(self._hours) > self.keep_hours:
+                self._hours.popitem(last=False)
+        return bucket
+
+    def _earned(self, bucket: _Bucket, counters: Dict, until: datetime) -> float:
+        """Target earned since the counters' last mark at the running part's rate"""
+        if not bucket.planned:
+            return 0.0
+        until = min(until, bucket.end)
+        return counters['rate'] * self.calendar.working_minutes(counters['marked'], until) / 60.0
+
+    def _count(self, bucket: _Bucket, line: str, part_number: str, target: float, moment: datetime) -> None:
+        counters = bucket.lines.get(line)
+        if counters is None:
+            # The first part of the bucket is taken as planned from the bucket's start
+            counters = bucket.lines[line] = {'quantity': 0, 'parts': {}, 'rate': target,
+                                             'earned': 0.0, 'marked': bucket.start}
+        counters['earned'] += self._earned(bucket, counters, moment)
+        counters['marked'] = max(moment, bucket.start)
+        counters['rate'] = target
+        counters['quantity'] += 1
+        counters['parts'][part_number] = counters['parts'].get(part_number, 0) + 1
+
+    def record_crossing(self, line: str, part_number: str, target: float, moment: datetime) -> None:
+        """Count one part for its line in the shift and hour containing moment"""
+        with self._lock:
+            self._count(self._shift_bucket(moment), line, part_number, target, moment)
+            self._count(self._hour_bucket(moment), line, part_number, target, moment)
+
+    def shift_delta(self, line: str, moment: datetime) -> int:
+        """Parts ahead (+) or behind (-) the prorated target of the shift at moment"""
+        with self._lock:
+            bucket = self._shifts.get(self.calendar.shift_key(moment))
+            counters = bucket.lines.get(line) if bucket else None
+            if counters is None:
+                return 0
+            target = counters['earned'] + self._earned(bucket, counters, moment)
+            return counters['quantity'] - int(target)
+
+    def _summary(self, bucket: Optional[_Bucket], now: datetime) -> Optional[Dict]:
+        if bucket is None:
+            return None
+        scheduled = self.calendar.working_minutes(bucket.start, bucket.end) if bucket.planned else 0.0
+        worked = self.calendar.working_minutes(bucket.start, min(now, bucket.end)) if bucket.planned else 0.0
+        lines = {}
+        for line, counters in bucket.lines.items():
+            target = counters['earned'] + self._earned(bucket, counters, now)
+            planned_total = target + self._earned(bucket, dict(counters, marked=max(now, counters['marked'])),
+                                                  bucket.end)
+            lines[line] = {
+                'quantity': counters['quantity'],
+                'target': int(target),
+                'delta': counters['quantity'] - int(target),
+                'planned_total': int(planned_total),
+                'parts': dict(counters['parts'])
+            }
+        return {
+            'key': bucket.key,
+            'shift': bucket.shift,
+            'start': bucket.start.isoformat(),
+            'end': bucket.end.isoformat(),
+            'scheduled_minutes': round(scheduled, 1),
+            'worked_minutes': round(worked, 1),
+            'quantity': sum(line['quantity'] for line in lines.values()),
+            'lines': lines
+        }
+
+    def get_shift_summary(self, key: Optional[str] = None, now: Optional[datetime] = None) -> Optional[Dict]:
+        """Counters and prorated targets of a shift (the current one by default)"""
+        now = now or datetime.now()
+        with self._lock:
+            return self._summary(self._shifts.get(key or self.calendar.shift_key(now)), now)
+
+    def get_hour_summary(self, key: Optional[str] = None, now: Optional[datetime] = None) -> Optional[Dict]:
+        """Counters and prorated targets of a clock hour, keyed 'YYYY-MM-DD HH:00' (the current one by default)"""
+        now = now or datetime.now()
+        with self._lock:
+            return self._summary(self._hours.get(key or f"{now:%Y-%m-%d %H}:00"), now)
+
+    def shift_keys(self) -> List[str]:
+        with self._lock:
+            return list(self._shifts)
+
+    def hour_keys(self) -> List[str]:
+        with self._lock:
+            return list(self._hours)
+
+    def get_state(self) -> Dict:
+        with self._lock:
+            return {'shifts': [bucket.to_state() for bucket in self._shifts.values()],
+                    'hours': [bucket.to_state() for bucket in self._hours.values()]}
+
+    def restore_state(self, state: Dict) -> None:
+        with self._lock:
+            self._shifts = OrderedDict((s['key'], _Bucket.from_state(s)) for s in state.get('shifts', []))
+            self._hours = OrderedDict((s['key'], _Bucket.from_state(s)) for s in state.get('hours', []))
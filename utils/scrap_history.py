@@ -0,0 +1,40 @@
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from .scrap_journal import ScrapJournal
+
+
+class ScrapHistory:
+    """Scrap history for the scrap page.
+
+    The newest cache_size entries are kept in memory for the live table.
+    The cache is warmed from the journal at startup, so a reboot no longer
+    empties it. Older pages and filtered views are cursor-paginated
+    queries against the journal's indexes.
+    """
+
+    def __init__(self, journal: ScrapJournal, cache_size: int = 100):
+        self.journal = journal
+        self._lock = threading.Lock()
+        self._recent: deque = deque(maxlen=cache_size)
+        entries, _ = journal.history(limit=cache_size)
+        self._recent.extend(entries)  # Newest first, like the journal returns them
+
+    def record_persisted(self, ids: List[int]) -> None:
+        """Add entries the write-behind queue just wrote to the front of the live history.
+
+        They are read back from the journal, so live and warmed-up entries
+        have the same shape, ids included, and can seed cursor pagination.
+        """
+        entries = self.journal.entries_by_id(ids)
+        with self._lock:
+            for entry in reversed(entries):  # Oldest first, so the newest ends up in front
+                self._recent.appendleft(entry)
+
+    def recent(self) -> List[Dict]:
+        with self._lock:
+            return list(self._recent)
+
+    def page(self, limit: int = 50, cursor: Optional[int] = None, **filters) -> Tuple[List[Dict], Optional[int]]:
+        """Newest-first page of the persisted history and the cursor of the next one"""
+        return self.journal.history(limit=limit, before_id=cursor, **filters)
@@ -0,0 +1,300 @@
+import argparse
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import xlsxwriter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# Journal column -> header of the weekly scrap workbook
+EXPORT_COLUMNS = [
+    ('timestamp', 'Timestamp'),
+    ('line', 'Line'),
+    ('program', 'Program'),
+    ('part_number', 'Part Number'),
+    ('defect_code', 'Defect Code'),
+    ('defect_description', 'Description'),
+    ('comments', 'Comments')
+]
+
+
+# Columns the history can be filtered on by equality
+HISTORY_FILTERS = ('line', 'program', 'part_number', 'defect_code')
+
+
+def calendar_week(moment: datetime) -> str:
+    return f"cw{moment.isocalendar()[1]:02d}"
+
+
+class ScrapJournal:
+    """Append-only scrap log in SQLite (WAL mode).
+
+    A submission is one indexed INSERT and a WAL append, so its cost does
+    not depend on how many entries the week already has. The formatted
+    weekly workbook is produced separately by export_week().
+    """
+
+    def __init__(self, db_path: str = "scrap_journal.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")  # Every commit is on disk before we return
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS scrap_entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                iso_year INTEGER NOT NULL,
+                calendar_week TEXT NOT NULL,
+                line TEXT NOT NULL,
+                program TEXT,
+                part_number TEXT,
+                defect_code TEXT NOT NULL,
+                defect_description TEXT,
+                comments TEXT,
+                spool_id TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_scrap_week ON scrap_entries (iso_year, calendar_week);
+        """)
+        columns = [row['name'] for row in self._conn.execute("PRAGMA table_info(scrap_entries)")]
+        if 'spool_id' not in columns:
+            self._conn.execute("ALTER TABLE scrap_entries ADD COLUMN spool_id TEXT")
+        # Replaying the write-behind spool after a crash must not record an entry twice
+        self._conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_scrap_spool_id ON scrap_entries (spool_id)")
+        # History filters; SQLite orders each index by (column, rowid), so newest-first pages stay indexed
+        for column in HISTORY_FILTERS:
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_scrap_{column} ON scrap_entries ({column})")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_scrap_timestamp ON scrap_entries (timestamp)")
+        self._conn.commit()
+
+    def _row(self, entry: Dict, moment: Optional[datetime], spool_id: Optional[str]) -> tuple:
+        moment = moment or datetime.now()
+        return (moment.strftime('%Y-%m-%d %H:%M:%S'), moment.isocalendar()[0], calendar_week(moment),
+                str(entry['line']), entry.get('program', ''), entry.get('part_number', ''),
+                entry['defect_code'], entry.get('defect_description', ''), entry.get('comments', ''),
+                spool_id)
+
+    def append(self, entry: Dict, moment: Optional[datetime] = None) -> int:
+        """Durably record one scrap entry and return its id"""
+        return self.append_many([entry], [moment])[0]
+
+    def append_many(self, entries: List[Dict], moments: Optional[List[Optional[datetime]]] = None,
+                    spool_ids: Optional[List[Optional[str]]] = None) -> List[Optional[int]]:
+        """Record several entries in a single transaction and return their ids.
+
+        Entries with a spool_id that is already in the journal are skipped,
+        so a batch can safely be written again; their id is None.
+        """
+        moments = moments or [None] * len(entries)
+        spool_ids = spool_ids or [None] * len(entries)
+        rows = [self._row(entry, moment, spool_id) for entry, moment, spool_id in zip(entries, moments, spool_ids)]
+        with self._lock:
+            with self._conn:
+                ids = []
+                for row in rows:
+                    cursor = self._conn.execute(
+                        "INSERT OR IGNORE INTO scrap_entries (timestamp, iso_year, calendar_week, line, program, "
+                        "part_number, defect_code, defect_description, comments, spool_id) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+                    ids.append(cursor.lastrowid if cursor.rowcount else None)
+        return ids
+
+    def history(self, limit: int = 50, before_id: Optional[int] = None, since: Optional[str] = None,
+                until: Optional[str] = None, **filters) -> Tuple[List[Dict], Optional[int]]:
+        """Newest-first page of entries and the cursor of the next page (None on the last page).
+
+        before_id is the cursor from the previous page; since/until bound the
+        timestamp ('YYYY-MM-DD HH:MM:SS' or a prefix of it, until is exclusive).
+        Keyword filters match HISTORY_FILTERS columns exactly.
+        """
+        clauses, params = [], []
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(before_id)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        for column in HISTORY_FILTERS:
+            if filters.get(column) not in (None, ''):
+                clauses.append(f"{column} = ?")
+                params.append(str(filters[column]))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, timestamp, line, program, part_number, defect_code, defect_description, comments "
+                f"FROM scrap_entries {where} ORDER BY id DESC LIMIT ?", params + [limit + 1]).fetchall()
+        entries = [self._history_entry(row) for row in rows[:limit]]
+        next_cursor = entries[-1]['id'] if len(rows) > limit else None
+        return entries, next_cursor
+
+    def entries_by_id(self, ids: List[int]) -> List[Dict]:
+        """Entries with the given ids in the shape history() returns, newest first"""
+        if not ids:
+            return []
+        placeholders = ', '.join('?' * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, timestamp, line, program, part_number, defect_code, defect_description, comments "
+                f"FROM scrap_entries WHERE id IN ({placeholders}) ORDER BY id DESC", list(ids)).fetchall()
+        return [self._history_entry(row) for row in rows]
+
+    @staticmethod
+    def _history_entry(row: sqlite3.Row) -> Dict:
+        """Journal row in the shape the scrap page shows"""
+        moment = datetime.strptime(row['timestamp'], '%Y-%m-%d %H:%M:%S')
+        return {
+            'id': row['id'],
+            'time': moment.strftime('%m/%d/%Y %I:%M:%S %p'),
+            'timestamp': row['timestamp'],
+            'line': row['line'],
+            'program': row['program'],
+            'part_number': row['part_number'],
+            'defect_code': row['defect_code'],
+            'defect_description': row['defect_description'],
+            'comments': row['comments']
+        }
+
+    def entries_after(self, entry_id: int = 0, limit: int = 10000) -> List[Dict]:
+        """Entries with an id above entry_id, oldest first, for incremental export"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, timestamp, line, program, part_number, defect_code, defect_description "
+                "FROM scrap_entries WHERE id > ? ORDER BY id LIMIT ?", (entry_id, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM scrap_entries").fetchone()[0]
+
+    def export_week(self, week: Optional[str] = None, iso_year: Optional[int] = None,
+                    filename: Optional[str] = None, directory: str = "scrap_exports",
+                    overwrite: bool = False) -> str:
+        """Write the formatted scrap workbook of a week, newest entry first.
+
+        By default it goes to directory/flock_scrap_data_{year}_{week}.xlsx,
+        which only ever holds exports. An explicit filename is never
+        overwritten unless overwrite is set: it may be a legacy weekly
+        workbook whose rows are not in the journal.
+        """
+        now = datetime.now()
+        week = week or calendar_week(now)
+        if not re.fullmatch(r'cw\d{2}', week):
+            raise ValueError(f"Invalid calendar week: {week}")
+        iso_year = iso_year or now.isocalendar()[0]
+        if filename is None:
+            os.makedirs(directory, exist_ok=True)
+            filename = os.path.join(directory, f"flock_scrap_data_{iso_year}_{week}.xlsx")
+        elif os.path.exists(filename) and not overwrite:
+            raise FileExistsError(f"{filename} already exists; export elsewhere or pass overwrite")
+
+        columns = ', '.join(column for column, _ in EXPORT_COLUMNS)
+        widths = ', '.join(f"MAX(LENGTH({column}))" for column, _ in EXPORT_COLUMNS)
+        with self._lock:
+            max_lengths = self._conn.execute(
+                f"SELECT {widths} FROM scrap_entries WHERE iso_year = ? AND calendar_week = ?",
+                (iso_year, week)).fetchone()
+            rows = self._conn.execute(
+                f"SELECT {columns} FROM scrap_entries WHERE iso_year = ? AND calendar_week = ? ORDER BY id DESC",
+                (iso_year, week)).fetchall()
+
+        # Write next to the target and rename, so readers never see a half-written workbook
+        directory = os.path.dirname(os.path.abspath(filename))
+        temp_fd, temp_path = tempfile.mkstemp(suffix='.xlsx', dir=directory)
+        os.close(temp_fd)
+        try:
+            workbook = xlsxwriter.Workbook(temp_path, {'constant_memory': True})
+            worksheet = workbook.add_worksheet('Sheet1')
+            header_format = workbook.add_format({
+                'bold': True,
+                'align': 'center',
+                'valign': 'vcenter',
+                'bg_color': '#D3D3D3'
+            })
+            cell_format = workbook.add_format({
+                'align': 'center',
+                'valign': 'vcenter',
+                'text_wrap': True
+            })
+            for col_num, ((_, header), max_length) in enumerate(zip(EXPORT_COLUMNS, max_lengths)):
+                worksheet.set_column(col_num, col_num, max(max_length or 0, len(header)) + 2)
+                worksheet.write(0, col_num, header, header_format)
+            for row_num, row in enumerate(rows, start=1):
+                for col_num, value in enumerate(row):
+                    worksheet.write(row_num, col_num, value, cell_format)
+            workbook.close()
+            os.replace(temp_path, filename)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        print(f"Scrap data for {week} exported to {filename} ({len(rows)} entries)")
+        return filename
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def benchmark(entries: int = 10000, samples: int = 200) -> Dict[str, float]:
+    """Submit latency of the journal at the start and the end of a long week"""
+    sample = {'line': '1', 'program': 'TESLA M3', 'part_number': '4296625XXX', 'defect_code': 'R04',
+              'defect_description': 'Mascara rota / dañada', 'comments': ''}
+    with tempfile.TemporaryDirectory() as directory:
+        journal = ScrapJournal(os.path.join(directory, 'bench.db'))
+        timings = []
+        for _ in range(entries):
+            start = time.perf_counter()
+            journal.append(sample)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        journal.export_week(filename=os.path.join(directory, 'bench.xlsx'))
+        export_ms = (time.perf_counter() - start) * 1000
+        journal.close()
+
+    def median(values):
+        values = sorted(values)
+        return values[len(values) // 2]
+
+    return {
+        'entries': entries,
+        'first_median_ms': round(median(timings[:samples]), 3),
+        'last_median_ms': round(median(timings[-samples:]), 3),
+        'max_ms': round(max(timings), 3),
+        'export_ms': round(export_ms, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrap journal export and benchmark")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="Write the weekly scrap workbook")
+    export_parser.add_argument('--db', default="scrap_journal.db")
+    export_parser.add_argument('--week', help="Calendar week like cw07, defaults to the current week")
+    export_parser.add_argument('--year', type=int, help="ISO year, defaults to the current year")
+    export_parser.add_argument('--output', help="Workbook to write, defaults to scrap_exports/")
+    export_parser.add_argument('--overwrite', action='store_true', help="Replace an existing --output file")
+
+    bench_parser = subparsers.add_parser('benchmark', help="Measure submit latency as the journal grows")
+    bench_parser.add_argument('--entries', type=int, default=10000)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        ScrapJournal(args.db).export_week(args.week, args.year, args.output, overwrite=args.overwrite)
+    else:
+        result = benchmark(args.entries)
+        print(f"Submit latency over {result['entries']} entries: first {result['first_median_ms']} ms, "
+              f"last {result['last_median_ms']} ms (median), max {result['max_ms']} ms")
+        print(f"Weekly export: {result['export_ms']} ms")
+
+
+if __name__ == '__main__':
+    main()
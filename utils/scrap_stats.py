@@ -0,0 +1,168 @@
+import copy
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+from .shift_calendar import ShiftCalendar
+
+
+def scrap_rate(scrap: int, produced: int) -> float:
+    """Scrap as a percentage of all parts made (good + scrap), like the dashboard shows it"""
+    total = produced + scrap
+    return round(scrap * 100.0 / total, 1) if total else 0.0
+
+
+class _Counters:
+    """Produced and scrapped counts of one scope (all time or one shift)"""
+
+    def __init__(self):
+        self.produced: Dict[str, Dict[str, int]] = {}  # line -> part number -> good parts
+        self.scrap: Dict[str, Dict[str, Dict[str, int]]] = {}  # line -> part number -> defect code -> scrap
+        self.produced_by_line: Dict[str, int] = {}
+        self.scrap_by_line: Dict[str, int] = {}
+        self.defects_by_line: Dict[str, Dict[str, int]] = {}  # line -> defect code -> scrap
+        self.defects: Dict[str, int] = {}
+        self.produced_total = 0
+        self.scrap_total = 0
+
+    def add_produced(self, line: str, part_number: str, quantity: int) -> None:
+        parts = self.produced.setdefault(line, {})
+        parts[part_number] = parts.get(part_number, 0) + quantity
+        self.produced_by_line[line] = self.produced_by_line.get(line, 0) + quantity
+        self.produced_total += quantity
+
+    def add_scrap(self, line: str, part_number: str, defect_code: str, quantity: int) -> None:
+        defects = self.scrap.setdefault(line, {}).setdefault(part_number, {})
+        defects[defect_code] = defects.get(defect_code, 0) + quantity
+        self.scrap_by_line[line] = self.scrap_by_line.get(line, 0) + quantity
+        self.scrap_total += quantity
+        line_defects = self.defects_by_line.setdefault(line, {})
+        line_defects[defect_code] = line_defects.get(defect_code, 0) + quantity
+        self.defects[defect_code] = self.defects.get(defect_code, 0) + quantity
+
+    def to_state(self) -> Dict:
+        return copy.deepcopy({'produced': self.produced, 'scrap': self.scrap})
+
+    @classmethod
+    def from_state(cls, state: Dict) -> '_Counters':
+        counters = cls()
+        for line, parts in state.get('produced', {}).items():
+            for part_number, quantity in parts.items():
+                counters.add_produced(line, part_number, quantity)
+        for line, parts in state.get('scrap', {}).items():
+            for part_number, defects in parts.items():
+                for defect_code, quantity in defects.items():
+                    counters.add_scrap(line, part_number, defect_code, quantity)
+        return counters
+
+
+class ScrapStats:
+    """Live scrap rates and defect Paretos, kept up to date per event.
+
+    Every crossing and scrap event adds to counters keyed by line, part
+    number and defect code, both for all time and for the shift it falls
+    in. Each update is a few dictionary increments, and the per-line
+    totals are kept alongside, so a rate is a single lookup. A Pareto
+    sorts the defect codes of one shift. Nothing is read back from the
+    journal or the workbooks.
+    """
+
+    def __init__(self, calendar: Optional[ShiftCalendar] = None, keep_shifts: int = 21):
+        self.calendar = calendar or ShiftCalendar.all_day()
+        self.keep_shifts = max(1, keep_shifts)
+        self._lock = threading.Lock()
+        self._total = _Counters()
+        self._shifts: OrderedDict = OrderedDict()
+
+    def _shift(self, moment: datetime) -> _Counters:
+        key = self.calendar.shift_key(moment)
+        counters = self._shifts.get(key)
+        if counters is None:
+            counters = self._shifts[key] = _Counters()
+            while len(self._shifts) > self.keep_shifts:
+                self._shifts.popitem(last=False)
+        return counters
+
+    def record_crossing(self, line: str, part_number: str, moment: datetime, quantity: int = 1) -> None:
+        with self._lock:
+            self._total.add_produced(line, part_number, quantity)
+            self._shift(moment).add_produced(line, part_number, quantity)
+
+    def record_scrap(self, line: str, part_number: str, defect_code: str, moment: datetime,
+                     quantity: int = 1) -> None:
+        with self._lock:
+            self._total.add_scrap(line, part_number, defect_code, quantity)
+            self._shift(moment).add_scrap(line, part_number, defect_code, quantity)
+
+    def _counters(self, shift_key: Optional[str]) -> _Counters:
+        if shift_key is None:
+            return self._total
+        return self._shifts.get(shift_key) or _Counters()
+
+    def line_rate(self, line: str, shift_key: Optional[str] = None) -> float:
+        """Scrap rate of a line for all time or for one shift"""
+        with self._lock:
+            counters = self._counters(shift_key)
+            return scrap_rate(counters.scrap_by_line.get(line, 0), counters.produced_by_line.get(line, 0))
+
+    def average_rate(self, shift_key: Optional[str] = None) -> float:
+        """Scrap rate over all lines, for all time or for one shift"""
+        with self._lock:
+            counters = self._counters(shift_key)
+            return scrap_rate(counters.scrap_total, counters.produced_total)
+
+    def _rates(self, counters: _Counters) -> Dict:
+        lines = {}
+        for line in sorted(set(counters.produced_by_line) | set(counters.scrap_by_line)):
+            produced, scrap = counters.produced.get(line, {}), counters.scrap.get(line, {})
+            parts = {}
+            for part_number in sorted(set(produced) | set(scrap)):
+                part_scrap = sum(scrap.get(part_number, {}).values())
+                parts[part_number] = {'produced': produced.get(part_number, 0), 'scrap': part_scrap,
+                                      'rate': scrap_rate(part_scrap, produced.get(part_number, 0))}
+            lines[line] = {'produced': counters.produced_by_line.get(line, 0),
+                           'scrap': counters.scrap_by_line.get(line, 0),
+                           'rate': scrap_rate(counters.scrap_by_line.get(line, 0),
+                                              counters.produced_by_line.get(line, 0)),
+                           'parts': parts}
+        return lines
+
+    def get_rates(self, shift_key: Optional[str] = None) -> Optional[Dict]:
+        """Scrap rates per line and part, for all time or for one shift"""
+        with self._lock:
+            if shift_key is None:
+                return self._rates(self._total)
+            counters = self._shifts.get(shift_key)
+            return self._rates(counters) if counters else None
+
+    def get_pareto(self, shift_key: Optional[str] = None, line: Optional[str] = None, top: int = 10,
+                   now: Optional[datetime] = None) -> Dict:
+        """Most frequent defect codes of a shift (the current one by default), with cumulative share"""
+        shift_key = shift_key or self.calendar.shift_key(now or datetime.now())
+        with self._lock:
+            counters = self._shifts.get(shift_key) or _Counters()
+            defects = counters.defects_by_line.get(line, {}) if line else counters.defects
+            total = sum(defects.values())
+            ranked = sorted(defects.items(), key=lambda item: (-item[1], item[0]))[:max(1, top)]
+        rows, cumulative = [], 0
+        for defect_code, count in ranked:
+            cumulative += count
+            rows.append({'defect_code': defect_code, 'count': count,
+                         'percent': round(count * 100.0 / total, 1),
+                         'cumulative_percent': round(cumulative * 100.0 / total, 1)})
+        return {'shift': shift_key, 'line': line, 'total_scrap': total, 'defects': rows}
+
+    def shift_keys(self) -> List[str]:
+        with self._lock:
+            return list(self._shifts)
+
+    def get_state(self) -> Dict:
+        with self._lock:
+            return {'total': self._total.to_state(),
+                    'shifts': [[key, counters.to_state()] for key, counters in self._shifts.items()]}
+
+    def restore_state(self, state: Dict) -> None:
+        with self._lock:
+            self._total = _Counters.from_state(state.get('total', {}))
+            self._shifts = OrderedDict((key, _Counters.from_state(counters))
+                                       for key, counters in state.get('shifts', []))
@@ -0,0 +1,159 @@
+import os
+import re
+import threading
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from .config import Config
+
+MINUTES_PER_DAY = 24 * 60
+EPOCH = datetime(2000, 1, 1)  # Origin of the working-minute counts
+
+
+def parse_clock(text) -> int:
+    """Minute of the day for '6am', '2pm', '11:30pm' or 24-hour '18pm'/'18:00'"""
+    match = re.fullmatch(r'\s*(\d{1,2})(?::(\d{2}))?\s*([ap]m)?\s*', str(text).lower())
+    if not match:
+        raise ValueError(f"Unrecognized time: {text!r}")
+    hour, minute, suffix = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if suffix and hour <= 12:
+        hour = hour % 12 + (12 if suffix == 'pm' else 0)
+    if hour > 23 or minute > 59:
+        raise ValueError(f"Unrecognized time: {text!r}")
+    return hour * 60 + minute
+
+
+class Shift:
+    def __init__(self, name: str, start: int, end: int, break_start: Optional[int], break_minutes: int):
+        self.name = name
+        self.start = start  # Minutes of the day
+        self.end = end
+        self.break_start = break_start
+        self.break_minutes = break_minutes if break_start is not None else 0
+        self.length = (end - start) % MINUTES_PER_DAY or MINUTES_PER_DAY
+
+    def minutes(self) -> List[int]:
+        """Minutes of the day covered by the shift, in order"""
+        return [(self.start + offset) % MINUTES_PER_DAY for offset in range(self.length)]
+
+    def break_minutes_of_day(self) -> set:
+        if self.break_start is None:
+            return set()
+        return {(self.break_start + offset) % MINUTES_PER_DAY for offset in range(self.break_minutes)}
+
+
+class ShiftCalendar:
+    """Daily shift plan with breaks, answering shift and working-time questions in O(1).
+
+    Each minute of the day is mapped to its shift, and a prefix sum holds
+    the scheduled working minutes. Working time between any two moments
+    is therefore a subtraction, even across midnight or several days.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, shifts: List[Shift]):
+        self.shifts = shifts
+        self._shift_of_minute: List[Optional[int]] = [None] * MINUTES_PER_DAY
+        working = [0] * MINUTES_PER_DAY
+        for index, shift in enumerate(shifts):
+            breaks = shift.break_minutes_of_day()
+            for minute in shift.minutes():
+                self._shift_of_minute[minute] = index
+                working[minute] = 0 if minute in breaks else 1
+        self._working = working
+        self._prefix = [0] * (MINUTES_PER_DAY + 1)
+        for minute, value in enumerate(working):
+            self._prefix[minute + 1] = self._prefix[minute] + value
+        self.daily_working_minutes = self._prefix[-1]
+        self._working_array = np.array(working, dtype=np.float64)
+        self._prefix_array = np.array(self._prefix, dtype=np.float64)
+
+    @classmethod
+    def from_excel(cls, path: str = "Flock_Shifts.xlsx", break_minutes: int = 30) -> 'ShiftCalendar':
+        """Load the shift plan; only the first 'Number of Shift' shifts of the Hours sheet are worked"""
+        hours = pd.read_excel(path, sheet_name='Hours')
+        try:
+            active = int(pd.read_excel(path, sheet_name='Shifts')['Number of Shift'].dropna().iloc[0])
+        except Exception:
+            active = len(hours)
+        shifts = []
+        for row in hours.head(active).itertuples(index=False):
+            name, start, break_start, end = row[:4]
+            shifts.append(Shift(str(name), parse_clock(start), parse_clock(end),
+                                None if pd.isna(break_start) else parse_clock(break_start), break_minutes))
+        return cls(shifts)
+
+    @classmethod
+    def load(cls, path: str, break_minutes: int = 30) -> Optional['ShiftCalendar']:
+        """Calendar from the shift workbook, or None if it is missing or unreadable"""
+        if not os.path.exists(path):
+            print(f"Warning: Shift calendar not found: {path}")
+            return None
+        try:
+            calendar = cls.from_excel(path, break_minutes)
+            print(f"Successfully loaded {len(calendar.shifts)} shifts from {path}")
+            return calendar
+        except Exception as e:
+            print(f"Error loading shift calendar: {e}")
+            return None
+
+    @classmethod
+    def all_day(cls) -> 'ShiftCalendar':
+        """One break-free shift covering the whole day, used when no shift plan is available"""
+        return cls([Shift('Day', 0, 0, None, 0)])
+
+    @classmethod
+    def get_instance(cls) -> 'ShiftCalendar':
+        with cls._instance_lock:
+            if cls._instance is None:
+                config = Config()
+                cls._instance = (cls.load(config.shift_calendar_file, config.shift_break_minutes)
+                                 or cls.all_day())
+            return cls._instance
+
+    def shift_at(self, moment: datetime) -> Tuple[Optional[Shift], datetime]:
+        """Shift running at moment (None off shift) and when that shift started"""
+        minute = moment.hour * 60 + moment.minute
+        index = self._shift_of_minute[minute]
+        if index is None:
+            return None, moment.replace(minute=0, second=0, microsecond=0)
+        shift = self.shifts[index]
+        start = moment.replace(hour=shift.start // 60, minute=shift.start % 60, second=0, microsecond=0)
+        if start > moment:
+            start -= timedelta(days=1)  # Shift began before midnight
+        return shift, start
+
+    def shift_key(self, moment: datetime) -> str:
+        shift, start = self.shift_at(moment)
+        return f"{start:%Y-%m-%d} {shift.name}" if shift else f"{moment:%Y-%m-%d} Off shift"
+
+    def period_key(self, moment: datetime) -> str:
+        """File-name safe shift key, for per-shift log rollover"""
+        return re.sub(r'[^\w-]+', '_', self.shift_key(moment))
+
+    def _working_since_epoch(self, moment: datetime) -> float:
+        """Scheduled working minutes from a fixed epoch up to moment"""
+        elapsed = moment - EPOCH
+        minute = elapsed.seconds // 60
+        partial = (elapsed.seconds % 60 + elapsed.microseconds / 1e6) / 60.0
+        return (elapsed.days * self.daily_working_minutes + self._prefix[minute]
+                + self._working[minute] * partial)
+
+    def working_minutes_at(self, seconds: np.ndarray) -> np.ndarray:
+        """Vectorized working minutes from EPOCH up to each of the given seconds after EPOCH"""
+        days, rest = np.divmod(np.asarray(seconds, dtype=np.int64), 86400)
+        minute = rest // 60
+        return (days * self.daily_working_minutes + self._prefix_array[minute]
+                + self._working_array[minute] * (rest % 60) / 60.0)
+
+    def working_minutes(self, start: datetime, end: datetime) -> float:
+        """Scheduled working minutes (breaks and off-shift time excluded) between two moments"""
+        if end <= start:
+            return 0.0
+        return self._working_since_epoch(end) - self._working_since_epoch(start)
+
+    def is_working(self, moment: datetime) -> bool:
+        return bool(self._working[moment.hour * 60 + moment.minute])
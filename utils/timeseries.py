@@ -0,0 +1,327 @@
+import base64
+import math
+import threading
+import time
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+from .shift_calendar import EPOCH, ShiftCalendar
+
+# Upper edges (seconds) of the time-between-parts histogram bins; the last bin is open-ended
+TBP_BIN_EDGES = np.array([5, 10, 15, 20, 30, 45, 60, 90, 120, 180, 300, 600], dtype=np.float64)
+
+
+# Arrays of a ring, in the order they are snapshotted
+RING_ARRAYS = ('count', 'expected', 'tbp_sum', 'tbp_count', 'tbp_min', 'tbp_max', 'tbp_hist')
+
+
+def _encode(values: np.ndarray) -> str:
+    return base64.b64encode(values.tobytes()).decode('ascii')
+
+
+def _decode(data: str, like: np.ndarray) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype=like.dtype).reshape(like.shape).copy()
+
+
+class RingSeries:
+    """Fixed-size ring of time slots of one resolution, held in NumPy arrays.
+
+    Slot n covers [n * step, (n + 1) * step) seconds after the epoch and
+    lives at index n % slots. Moving the head forward clears the slots it
+    passes and fills in their target, so memory never grows and the
+    newest slots * step seconds are always available.
+    """
+
+    def __init__(self, step: int, slots: int, calendar: ShiftCalendar):
+        self.step = step
+        self.slots = slots
+        self.calendar = calendar
+        self.head: Optional[int] = None
+        self.rate = 0.0  # Rate the head slot is planned at
+        self.count = np.zeros(slots, dtype=np.int32)
+        self.expected = np.zeros(slots, dtype=np.float64)  # Target parts for the slot
+        self.tbp_sum = np.zeros(slots, dtype=np.float64)
+        self.tbp_count = np.zeros(slots, dtype=np.int32)
+        self.tbp_min = np.full(slots, np.inf, dtype=np.float64)
+        self.tbp_max = np.zeros(slots, dtype=np.float64)
+        self.tbp_hist = np.zeros((slots, len(TBP_BIN_EDGES) + 1), dtype=np.int32)
+
+    def slot_of(self, moment: datetime) -> int:
+        return int((moment - EPOCH).total_seconds() // self.step)
+
+    def slot_start(self, slot: int) -> datetime:
+        return EPOCH + timedelta(seconds=slot * self.step)
+
+    def _slot_targets(self, first: int, last: int, rate: float) -> np.ndarray:
+        """Target parts of slots first..last at rate, prorated by scheduled working time"""
+        edges = self.calendar.working_minutes_at(np.arange(first, last + 2) * self.step)
+        return rate * np.diff(edges) / 60.0
+
+    def advance(self, slot: int, rate: float) -> None:
+        """Move the head to slot, clearing the slots in between; they are planned at rate"""
+        if self.head is not None and slot <= self.head:
+            return
+        # A new ring starts at its first part instead of back-filling targets before it
+        first = slot if self.head is None else max(self.head + 1, slot - self.slots + 1)
+        indices = np.arange(first, slot + 1) % self.slots
+        self.count[indices] = 0
+        self.tbp_sum[indices] = 0.0
+        self.tbp_count[indices] = 0
+        self.tbp_min[indices] = np.inf
+        self.tbp_max[indices] = 0.0
+        self.tbp_hist[indices] = 0
+        self.expected[indices] = self._slot_targets(first, slot, rate) if rate else 0.0
+        self.head = slot
+        self.rate = rate
+
+    def add(self, slot: int, tbp: Optional[float], rate: float) -> None:
+        """Count one part in slot; parts older than the ring are dropped.
+
+        The idle slots before a part were still running the previous part,
+        so they are planned at the head's rate and only slot itself at rate.
+        """
+        if self.head is None or slot > self.head:
+            if self.head is not None and slot - 1 > self.head:
+                self.advance(slot - 1, self.rate)
+            self.advance(slot, rate)
+        elif slot <= self.head - self.slots:
+            return
+        index = slot % self.slots
+        self.count[index] += 1
+        if slot == self.head and rate != self.rate:
+            # A part change re-plans the head slot at the new part's rate
+            self.expected[index] = self._slot_targets(slot, slot, rate)[0]
+            self.rate = rate
+        if tbp is not None:
+            self.tbp_sum[index] += tbp
+            self.tbp_count[index] += 1
+            self.tbp_min[index] = min(self.tbp_min[index], tbp)
+            self.tbp_max[index] = max(self.tbp_max[index], tbp)
+            self.tbp_hist[index, np.searchsorted(TBP_BIN_EDGES, tbp, side='right')] += 1
+
+    def get_state(self) -> Dict:
+        """Head, rate and arrays, the arrays as base64 so a snapshot stays compact"""
+        state = {'head': self.head, 'rate': self.rate}
+        state.update((name, _encode(getattr(self, name))) for name in RING_ARRAYS)
+        return state
+
+    def restore_state(self, state: Dict) -> None:
+        for name in RING_ARRAYS:
+            values = getattr(self, name)
+            if len(state[name]) != len(_encode(values)):
+                return  # Snapshot of a ring of another size: start this one empty
+        for name in RING_ARRAYS:
+            setattr(self, name, _decode(state[name], getattr(self, name)))
+        self.head = state['head']
+        self.rate = state['rate']
+
+    def window(self, span: int, step: int) -> Dict:
+        """The newest span seconds summed into points of step seconds (multiples of this ring's step)"""
+        per_point = min(max(1, int(round(step / self.step))), self.slots)  # A point can't span more than the ring
+        points = max(1, min(math.ceil(span / (per_point * self.step)), self.slots // per_point))
+        n = points * per_point
+        first = self.head - n + 1
+        indices = np.arange(first, self.head + 1) % self.slots
+
+        def grouped(values):
+            return values[indices].reshape(points, per_point)
+
+        count = grouped(self.count).sum(axis=1)
+        expected = grouped(self.expected).sum(axis=1)
+        tbp_count = grouped(self.tbp_count).sum(axis=1)
+        tbp_sum = grouped(self.tbp_sum).sum(axis=1)
+        tbp_min = grouped(self.tbp_min).min(axis=1)
+        tbp_max = grouped(self.tbp_max).max(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            tbp_mean = tbp_sum / tbp_count
+        return {
+            'start': self.slot_start(first),
+            'step': per_point * self.step,
+            'count': count,
+            'expected': expected,
+            'tbp_mean': np.where(tbp_count > 0, tbp_mean, np.nan),
+            'tbp_min': np.where(tbp_count > 0, tbp_min, np.nan),
+            'tbp_max': np.where(tbp_count > 0, tbp_max, np.nan),
+            'tbp_histogram': self.tbp_hist[indices].sum(axis=0)
+        }
+
+
+class LineTimeSeries:
+    """Second, minute and hour rings of one line"""
+
+    def __init__(self, calendar: ShiftCalendar, second_slots: int = 3600, minute_slots: int = 1440,
+                 hour_slots: int = 336):
+        self.rings = [RingSeries(1, second_slots, calendar),
+                      RingSeries(60, minute_slots, calendar),
+                      RingSeries(3600, hour_slots, calendar)]
+        self.last_crossing: Optional[datetime] = None
+        self.rate = 0.0  # Target parts per hour of the part being run
+
+    def record(self, moment: datetime, target: float) -> None:
+        tbp = None
+        if self.last_crossing is not None and moment >= self.last_crossing:
+            tbp = (moment - self.last_crossing).total_seconds()
+        self.last_crossing = moment if self.last_crossing is None else max(moment, self.last_crossing)
+        self.rate = float(target)
+        for ring in self.rings:
+            ring.add(ring.slot_of(moment), tbp, self.rate)
+
+    def refill(self, crossings: Iterable[Tuple[datetime, float]]) -> None:
+        """Replay earlier crossings into the second ring only; the coarser rings come from the snapshot"""
+        ring, previous = self.rings[0], None
+        for moment, target in crossings:
+            tbp = (moment - previous).total_seconds() if previous is not None and moment >= previous else None
+            previous = moment if previous is None else max(moment, previous)
+            ring.add(ring.slot_of(moment), tbp, float(target))
+
+    def get_state(self) -> Dict:
+        return {'last_crossing': self.last_crossing.isoformat() if self.last_crossing else None,
+                'rate': self.rate,
+                'rings': [ring.get_state() for ring in self.rings[1:]]}
+
+    def restore_state(self, state: Dict) -> None:
+        self.last_crossing = datetime.fromisoformat(state['last_crossing']) if state['last_crossing'] else None
+        self.rate = state['rate']
+        for ring, ring_state in zip(self.rings[1:], state['rings']):
+            ring.restore_state(ring_state)
+
+    def advance(self, moment: datetime) -> None:
+        for ring in self.rings:
+            ring.advance(ring.slot_of(moment), self.rate)
+
+    def ring_for(self, span: int, step: int) -> RingSeries:
+        """Coarsest ring fine enough for step that still covers span, else the longest ring"""
+        covering = [ring for ring in self.rings if ring.step <= step and ring.step * ring.slots >= span]
+        if covering:
+            return covering[-1]
+        fine_enough = [ring for ring in self.rings if ring.step <= step]
+        return max(fine_enough or self.rings[:1], key=lambda ring: ring.step * ring.slots)
+
+
+class TimeSeriesStore:
+    """Fixed-memory production time series per line for the dashboard charts.
+
+    Each counted crossing costs one slot update per resolution. A query
+    reads at most one ring's worth of slots, so its cost depends on the
+    ring size and not on how long the line has been running.
+    """
+
+    def __init__(self, calendar: Optional[ShiftCalendar] = None, second_slots: int = 3600,
+                 minute_slots: int = 1440, hour_slots: int = 336):
+        self.calendar = calendar or ShiftCalendar.all_day()
+        self.sizes = (second_slots, minute_slots, hour_slots)
+        self._lock = threading.Lock()
+        self._lines: Dict[str, LineTimeSeries] = {}
+
+    def record_crossing(self, line: str, moment: datetime, target: float) -> None:
+        with self._lock:
+            series = self._lines.get(line)
+            if series is None:
+                series = self._lines[line] = LineTimeSeries(self.calendar, *self.sizes)
+            series.record(moment, target)
+
+    @property
+    def span_seconds(self) -> int:
+        """How far back the longest ring reaches"""
+        return max(step * slots for step, slots in zip((1, 60, 3600), self.sizes))
+
+    @property
+    def refill_seconds(self) -> int:
+        """How far back the second ring reaches; only it is refilled from events on recovery"""
+        return self.sizes[0]
+
+    def refill(self, crossings: Iterable[Dict]) -> None:
+        """Rebuild the second rings from crossing events of the last refill_seconds (plus the one before), oldest first"""
+        by_line: Dict[str, list] = {}
+        for event in crossings:
+            by_line.setdefault(event['line'], []).append(
+                (datetime.fromisoformat(event['time']), int(event.get('target', 0))))
+        with self._lock:
+            for line, line_crossings in by_line.items():
+                series = self._lines.get(line)
+                if series is None:
+                    series = self._lines[line] = LineTimeSeries(self.calendar, *self.sizes)
+                series.refill(line_crossings)
+
+    def get_state(self) -> Dict:
+        """Minute and hour rings of every line; the second rings are left to refill()"""
+        with self._lock:
+            return {line: series.get_state() for line, series in self._lines.items()}
+
+    def restore_state(self, state: Dict) -> None:
+        with self._lock:
+            self._lines = {}
+            for line, line_state in state.items():
+                series = self._lines[line] = LineTimeSeries(self.calendar, *self.sizes)
+                series.restore_state(line_state)
+
+    def lines(self):
+        with self._lock:
+            return list(self._lines)
+
+    def query(self, line: str, span: int = 8 * 3600, step: int = 60, rolling: int = 900,
+              now: Optional[datetime] = None) -> Optional[Dict]:
+        """Last span seconds of a line at step resolution, ending now.
+
+        rolling is the trailing window, in seconds, of the rolling PPH.
+        Empty TBP points are None so the result is JSON-safe.
+        """
+        now = now or datetime.now()
+        with self._lock:
+            series = self._lines.get(line)
+            if series is None:
+                return None
+            series.advance(now)
+            window = series.ring_for(span, step).window(span, step)
+
+        count = window['count']
+        expected = window['expected']
+        point_seconds = window['step']
+        per_rolling = max(1, int(round(rolling / point_seconds)))
+        cumulative = np.concatenate(([0], np.cumsum(count)))
+        trailing = cumulative[1:] - cumulative[np.maximum(np.arange(1, len(count) + 1) - per_rolling, 0)]
+        trailing_points = np.minimum(np.arange(1, len(count) + 1), per_rolling)
+
+        def json_list(values, digits=1):
+            values = np.round(values, digits)
+            return [None if value != value else value for value in values.tolist()]  # NaN -> None
+
+        return {
+            'line': line,
+            'start': window['start'].isoformat(),
+            'step': point_seconds,
+            'count': count.tolist(),
+            'pph': json_list(count * 3600.0 / point_seconds),
+            'rolling_pph': json_list(trailing * 3600.0 / (trailing_points * point_seconds)),
+            'target': json_list(expected, 2),
+            'delta': json_list(count - expected, 2),
+            'cumulative_delta': json_list(np.cumsum(count - expected), 2),
+            'tbp_mean': json_list(window['tbp_mean']),
+            'tbp_min': json_list(window['tbp_min']),
+            'tbp_max': json_list(window['tbp_max']),
+            'tbp_histogram': {
+                'edges': TBP_BIN_EDGES.tolist(),
+                'counts': window['tbp_histogram'].tolist()
+            }
+        }
+
+
+def benchmark(hours: int = 24, parts_per_hour: int = 120, queries: int = 200) -> Dict[str, float]:
+    """Per-crossing record cost and per-query cost of an 8 hour, 1 minute window"""
+    store = TimeSeriesStore()
+    start_time = datetime(2024, 1, 1, 6, 0)
+    crossings = hours * parts_per_hour
+    start = time.perf_counter()
+    for i in range(crossings):
+        store.record_crossing('Line 1', start_time + timedelta(seconds=i * 3600 / parts_per_hour), 80)
+    record_us = (time.perf_counter() - start) * 1e6 / crossings
+    now = start_time + timedelta(hours=hours)
+    start = time.perf_counter()
+    for _ in range(queries):
+        store.query('Line 1', 8 * 3600, 60, now=now)
+    query_ms = (time.perf_counter() - start) * 1000 / queries
+    return {'crossings': crossings, 'record_us': round(record_us, 1), 'query_ms': round(query_ms, 2)}
+
+
+if __name__ == '__main__':
+    print(benchmark())
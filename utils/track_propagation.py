@@ -0,0 +1,149 @@
+import numpy as np
+from typing import Dict
+from .detections import Detections
+
+# Constant-velocity model over (cx, cy, vx, vy), one step per frame
+_F = np.array([[1, 0, 1, 0],
+               [0, 1, 0, 1],
+               [0, 0, 1, 0],
+               [0, 0, 0, 1]], dtype=float)
+_H = np.array([[1, 0, 0, 0],
+               [0, 1, 0, 0]], dtype=float)
+
+
+class _KalmanTrack:
+    """Kalman filter for the centre of one tracked box"""
+
+    def __init__(self, box: np.ndarray, class_id: int, process_noise: float, measurement_noise: float):
+        cx, cy = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+        self.state = np.array([cx, cy, 0.0, 0.0])
+        self.covariance = np.diag([measurement_noise, measurement_noise, 100.0, 100.0])
+        self.process_noise = np.eye(4) * process_noise
+        self.measurement_noise = np.eye(2) * measurement_noise
+        self.hits = 1
+        self._keep(box, class_id)
+
+    def _keep(self, box: np.ndarray, class_id: int) -> None:
+        self.width = float(box[2] - box[0])
+        self.height = float(box[3] - box[1])
+        self.class_id = class_id
+
+    def predict(self) -> None:
+        self.state = _F @ self.state
+        self.covariance = _F @ self.covariance @ _F.T + self.process_noise
+
+    def update(self, box: np.ndarray, class_id: int) -> None:
+        measurement = np.array([(box[0] + box[2]) / 2, (box[1] + box[3]) / 2], dtype=float)
+        innovation = measurement - _H @ self.state
+        innovation_cov = _H @ self.covariance @ _H.T + self.measurement_noise
+        gain = self.covariance @ _H.T @ np.linalg.inv(innovation_cov)
+        self.state = self.state + gain @ innovation
+        self.covariance = (np.eye(4) - gain @ _H) @ self.covariance
+        self.hits += 1
+        self._keep(box, class_id)
+
+    @property
+    def speed(self) -> float:
+        return float(np.hypot(self.state[2], self.state[3]))
+
+    @property
+    def position_sigma(self) -> float:
+        return float(np.sqrt(max(self.covariance[0, 0], self.covariance[1, 1])))
+
+
+class KeyframeScheduler:
+    """Decides which frames get full detection and fills in the rest by prediction.
+
+    After each detection the interval to the next keyframe is chosen so the
+    fastest track moves at most max_displacement pixels before it is measured
+    again. A keyframe is also forced as soon as any prediction becomes too
+    uncertain.
+    """
+
+    def __init__(self, max_interval: int = 4, max_displacement: float = 30.0,
+                 uncertainty_px: float = 10.0, process_noise: float = 1.0, measurement_noise: float = 4.0):
+        self.max_interval = max(1, max_interval)
+        self.max_displacement = max_displacement
+        self.uncertainty_px = uncertainty_px
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.tracks: Dict[int, _KalmanTrack] = {}
+        self.interval = 1
+        self._frames_since_keyframe = 0
+        self._last_speed = 0.0
+        self.keyframes = 0
+        self.propagated = 0
+        self._names: Dict[int, str] = {}
+
+    def needs_detection(self) -> bool:
+        """True if the next frame must go through the detector"""
+        if self._frames_since_keyframe + 1 >= self.interval:
+            return True
+        return any(track.position_sigma > self.uncertainty_px for track in self.tracks.values())
+
+    def on_detections(self, detections: Detections) -> None:
+        """Correct the tracks with a keyframe's detections"""
+        self.keyframes += 1
+        self._frames_since_keyframe = 0
+        self._names = detections.names
+        seen = set()
+        for box, class_id, track_id in zip(detections.boxes, detections.class_ids.tolist(),
+                                           detections.track_ids.tolist()):
+            seen.add(track_id)
+            track = self.tracks.get(track_id)
+            if track is None:
+                self.tracks[track_id] = _KalmanTrack(box, class_id, self.process_noise, self.measurement_noise)
+            else:
+                track.predict()
+                track.update(box, class_id)
+
+        # The detector's tracker owns track lifetimes
+        for track_id in list(self.tracks):
+            if track_id not in seen:
+                del self.tracks[track_id]
+
+        if any(track.hits < 2 for track in self.tracks.values()):
+            # A new track has no velocity estimate yet, so measure it again next frame
+            self.interval = 1
+            return
+        if self.tracks:
+            self._last_speed = max(track.speed for track in self.tracks.values())
+        self.interval = self._interval_for_speed(self._last_speed)
+
+    def propagate(self) -> Detections:
+        """Predict every track one frame ahead and return them as detections"""
+        self.propagated += 1
+        self._frames_since_keyframe += 1
+        if not self.tracks:
+            return Detections.empty(self._names)
+        boxes = np.empty((len(self.tracks), 4))
+        for row, track in enumerate(self.tracks.values()):
+            track.predict()
+            cx, cy = track.state[0], track.state[1]
+            boxes[row] = (cx - track.width / 2, cy - track.height / 2,
+                          cx + track.width / 2, cy + track.height / 2)
+        return Detections(boxes.round().astype(np.int32),
+                          np.array([track.class_id for track in self.tracks.values()], dtype=np.int64),
+                          np.fromiter(self.tracks.keys(), dtype=np.int64, count=len(self.tracks)),
+                          self._names, propagated=True)
+
+    def _interval_for_speed(self, speed: float) -> int:
+        if speed <= 0:
+            return self.max_interval
+        return int(max(1, min(self.max_interval, self.max_displacement // speed)))
+
+    def reset(self) -> None:
+        self.tracks.clear()
+        self.interval = 1
+        self._frames_since_keyframe = 0
+
+    def get_stats(self) -> Dict:
+        frames = self.keyframes + self.propagated
+        return {
+            'interval': self.interval,
+            'keyframes': self.keyframes,
+            'propagated': self.propagated,
+            'keyframe_ratio': round(self.keyframes / frames, 3) if frames else 0.0,
+            'tracks': len(self.tracks),
+            'max_speed_px': round(self._last_speed, 1)
+        }
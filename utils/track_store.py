@@ -0,0 +1,146 @@
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Iterable, Iterator, Tuple
+
+
+class TrackStore:
+    """Bounded track id -> value map with generation-bucketed expiry.
+
+    Entries live in the generation they were last written in. Generations
+    are ttl / generations seconds long and whole generations are dropped
+    once they are older than the ttl, so expiry costs nothing per lookup.
+    If max_entries is reached the oldest generations are evicted early.
+
+    Evicted ids are remembered exactly, with the time they were evicted,
+    for recount_window seconds (at most max_guarded of them), and still
+    test as present, so an evicted id cannot be counted again inside the
+    window. Ids that were never stored are never guarded. touch() brings
+    an id seen again back into the current generation, so the ttl runs
+    from its last sighting rather than from when it was stored.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 10000, recount_window: float = 600.0,
+                 generations: int = 4, clock: Callable[[], float] = time.monotonic, max_guarded: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.recount_window = recount_window
+        self.generation_span = ttl / max(1, generations)
+        self.clock = clock
+        self._entries: Dict[int, Any] = {}
+        self._generation_of: Dict[int, int] = {}
+        self._generations: deque = deque()  # (generation number, ids written in it)
+        self.max_guarded = max(1, max_guarded)
+        self._evicted: OrderedDict = OrderedDict()  # Evicted id -> (evicted at, value), oldest first
+        self.ttl_evictions = 0
+        self.cap_evictions = 0
+        self.guard_hits = 0
+        self.guard_overflows = 0
+
+    def _current_generation(self) -> int:
+        return int(self.clock() // self.generation_span) if self.generation_span > 0 else 0
+
+    def __contains__(self, track_id: int) -> bool:
+        if track_id in self._entries:
+            return True
+        if self._recently_evicted(track_id):
+            self.guard_hits += 1
+            return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __bool__(self) -> bool:
+        return bool(self._entries)
+
+    def get(self, track_id: int, default: Any = None) -> Any:
+        return self._entries.get(track_id, default)
+
+    def set(self, track_id: int, value: Any = True) -> None:
+        """Store or refresh an entry in the current generation"""
+        generation = self._current_generation()
+        if not self._generations or self._generations[-1][0] != generation:
+            self._generations.append((generation, set()))
+            self._expire(generation)
+        self._generations[-1][1].add(track_id)
+        self._generation_of[track_id] = generation
+        self._entries[track_id] = value
+        self._evicted.pop(track_id, None)
+        while len(self._entries) > self.max_entries and self._generations:
+            self.cap_evictions += self._evict_generation()
+
+    __setitem__ = set
+
+    def add(self, track_id: int) -> None:
+        self.set(track_id, True)
+
+    def touch(self, track_ids: Iterable[int]) -> None:
+        """Refresh the ids among track_ids that are stored (or recently evicted) in the current generation"""
+        for track_id in track_ids:
+            if track_id in self._entries:
+                if self._generation_of[track_id] != self._current_generation():
+                    self.set(track_id, self._entries[track_id])
+            elif self._recently_evicted(track_id):
+                # Still in view after its eviction: keep guarding it for as long as it is seen
+                self.set(track_id, self._evicted[track_id][1])
+
+    def pop(self, track_id: int, default: Any = None) -> Any:
+        self._generation_of.pop(track_id, None)
+        return self._entries.pop(track_id, default)
+
+    def discard(self, track_id: int) -> None:
+        self.pop(track_id)
+
+    def items(self) -> Iterator[Tuple[int, Any]]:
+        return iter(list(self._entries.items()))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._generation_of.clear()
+        self._generations.clear()
+        self._evicted.clear()
+
+    def _expire(self, generation: int) -> None:
+        oldest_kept = generation - int(self.ttl // self.generation_span) if self.generation_span > 0 else generation
+        while self._generations and self._generations[0][0] < oldest_kept:
+            self.ttl_evictions += self._evict_generation()
+
+    def _evict_generation(self) -> int:
+        """Drop the oldest generation and remember the ids it held"""
+        generation, ids = self._generations.popleft()
+        evicted = [track_id for track_id in ids if self._generation_of.get(track_id) == generation]
+        guard = self.recount_window > 0
+        now = self.clock()
+        for track_id in evicted:
+            del self._generation_of[track_id]
+            value = self._entries.pop(track_id)
+            if guard:
+                self._evicted[track_id] = (now, value)
+                self._evicted.move_to_end(track_id)
+        while len(self._evicted) > self.max_guarded:
+            self._evicted.popitem(last=False)
+            self.guard_overflows += 1
+        return len(evicted)
+
+    def _recently_evicted(self, track_id: int) -> bool:
+        if not self._evicted:
+            return False
+        cutoff = self.clock() - self.recount_window
+        while self._evicted:
+            oldest = next(iter(self._evicted))
+            if self._evicted[oldest][0] >= cutoff:
+                break
+            del self._evicted[oldest]
+        return track_id in self._evicted
+
+    def get_stats(self) -> Dict:
+        return {
+            'size': len(self._entries),
+            'max_entries': self.max_entries,
+            'generations': len(self._generations),
+            'ttl_evictions': self.ttl_evictions,
+            'cap_evictions': self.cap_evictions,
+            'guarded_ids': len(self._evicted),
+            'guard_hits': self.guard_hits,
+            'guard_overflows': self.guard_overflows
+        }
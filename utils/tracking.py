@@ -1,29 +1,98 @@
-from typing import Dict, Optional
+import time
+import numpy as np
+from typing import Callable, Dict, Optional, Tuple
 from .geometry import Point
 
 class TrackingState:
-    def __init__(self):
-        self._positions: Dict[int, Point] = {}
+    """Last known centre of every track, kept as sorted NumPy arrays for batch lookups.
+
+    Tracks not seen for ttl seconds are pruned, and the store never holds
+    more than max_entries tracks (the least recently seen go first).
+    """
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        self._ids = np.empty(0, dtype=np.int64)
+        self._positions = np.empty((0, 2), dtype=float)
+        self._last_seen = np.empty(0, dtype=float)
         self.frame_width = 0
         self.frame_height = 0
-    
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.clock = clock
+        self.evictions = 0
+        self._next_prune = 0.0
+
     def update_frame_dimensions(self, width: int, height: int) -> None:
         """Update frame dimensions"""
         self.frame_width = width
         self.frame_height = height
-    
+
+    def _locate(self, track_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Index of each id in the store and whether it is present"""
+        index = np.searchsorted(self._ids, track_ids)
+        if len(self._ids) == 0:
+            return index, np.zeros(len(track_ids), dtype=bool)
+        clipped = np.minimum(index, len(self._ids) - 1)
+        return clipped, self._ids[clipped] == track_ids
+
+    def get_previous_positions(self, track_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Previous centres (NaN where unknown) and a mask of which ids have one"""
+        index, found = self._locate(track_ids)
+        positions = np.full((len(track_ids), 2), np.nan)
+        positions[found] = self._positions[index[found]]
+        return positions, found
+
+    def update_positions(self, track_ids: np.ndarray, positions: np.ndarray) -> None:
+        """Store the current centres of a batch of tracks"""
+        now = self.clock()
+        index, found = self._locate(track_ids)
+        self._positions[index[found]] = positions[found]
+        self._last_seen[index[found]] = now
+        if not found.all():
+            ids = np.concatenate((self._ids, track_ids[~found]))
+            stored = np.concatenate((self._positions, positions[~found]))
+            seen = np.concatenate((self._last_seen, np.full((~found).sum(), now)))
+            order = np.argsort(ids, kind='stable')
+            self._ids = ids[order]
+            self._positions = stored[order]
+            self._last_seen = seen[order]
+
+        if len(self._ids) > self.max_entries or now >= self._next_prune:
+            self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        """Drop expired tracks, then the least recently seen ones beyond the cap"""
+        keep = self._last_seen >= now - self.ttl
+        if keep.sum() > self.max_entries:
+            newest = np.argsort(self._last_seen, kind='stable')[-self.max_entries:]
+            keep = np.zeros(len(self._ids), dtype=bool)
+            keep[newest] = True
+        if not keep.all():
+            self.evictions += int((~keep).sum())
+            self._ids = self._ids[keep]
+            self._positions = self._positions[keep]
+            self._last_seen = self._last_seen[keep]
+        self._next_prune = now + self.ttl / 4
+
     def has_previous_position(self, track_id: int) -> bool:
         """Check if we have a previous position for this track ID"""
-        return track_id in self._positions
-    
+        return bool(self._locate(np.array([track_id]))[1][0])
+
     def get_previous_position(self, track_id: int) -> Optional[Point]:
         """Get the previous position for a track ID"""
-        return self._positions.get(track_id)
-    
+        positions, found = self.get_previous_positions(np.array([track_id]))
+        return Point(*positions[0]) if found[0] else None
+
     def update_position(self, track_id: int, position: Point) -> None:
         """Update the position for a track ID"""
-        self._positions[track_id] = position
-    
+        self.update_positions(np.array([track_id]), np.array([[position.x, position.y]]))
+
+    def get_stats(self) -> Dict:
+        return {'size': len(self._ids), 'max_entries': self.max_entries, 'evictions': self.evictions}
+
     def reset(self) -> None:
         """Clear all tracking data"""
-        self._positions.clear()
\ No newline at end of file
+        self._ids = np.empty(0, dtype=np.int64)
+        self._positions = np.empty((0, 2), dtype=float)
+        self._last_seen = np.empty(0, dtype=float)
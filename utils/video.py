@@ -1,9 +1,48 @@
 import cv2
+import threading
 import time
-from typing import Generator, Optional, Tuple
+from typing import Dict, Generator, Optional, Tuple
 from werkzeug.datastructures import FileStorage
 import os
 import tempfile
+from .config import Config
+from .pipeline import FramePipeline
+
+class FrameSlot:
+    """Single-entry slot holding only the newest captured frame"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self.frame = None
+        self.frame_id = 0
+        self.timestamp = 0.0
+        self.overwritten = 0  # Frames replaced before anyone read them
+        self._last_taken_id = 0
+
+    def put(self, frame: cv2.Mat) -> int:
+        with self._condition:
+            if self.frame_id > self._last_taken_id:
+                self.overwritten += 1
+            self.frame = frame
+            self.frame_id += 1
+            self.timestamp = time.time()
+            self._condition.notify_all()
+            return self.frame_id
+
+    def wait_for_frame(self, last_id: int, timeout: float = 1.0) -> Tuple[int, float, Optional[cv2.Mat]]:
+        """Wait for a frame newer than last_id; frame is None on timeout"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.frame_id > last_id, timeout)
+            if self.frame_id <= last_id:
+                return last_id, 0.0, None
+            self._last_taken_id = self.frame_id
+            return self.frame_id, self.timestamp, self.frame
+
+    def wake(self) -> None:
+        """Wake up waiting consumers, e.g. when the capture thread stops"""
+        with self._condition:
+            self._condition.notify_all()
+
 
 class VideoStream:
     def __init__(self):
@@ -15,6 +54,13 @@ class VideoStream:
         self.frame_count = 0
         self.last_frame = None
         self.temp_video_path = None
+        self.config = Config()
+        self.pipeline = None
+        self.frame_slot = FrameSlot()
+        self.last_frame_id = 0  # Last frame id handed out by read_frame
+        self._capture_thread = None
+        self._capture_stop = threading.Event()
+        self._capture_failed = False
 
     def start_camera(self):
         if self.cap is None:
@@ -23,8 +69,64 @@ class VideoStream:
             self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
             self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
 
+    def start_capture(self) -> None:
+        """Start the background capture thread if it isn't running"""
+        if self._capture_thread is not None and self._capture_thread.is_alive():
+            return
+        self._capture_stop.clear()
+        self._capture_failed = False
+        self._capture_thread = threading.Thread(target=self._capture_loop, name="video-capture", daemon=True)
+        self._capture_thread.start()
+
+    def stop_capture(self) -> None:
+        """Stop the background capture thread"""
+        self._capture_stop.set()
+        if self._capture_thread is not None and self._capture_thread.is_alive():
+            self._capture_thread.join(timeout=2.0)
+        self._capture_thread = None
+
+    def _capture_loop(self) -> None:
+        """Read frames as fast as the source delivers them, keeping only the newest"""
+        next_frame_time = time.time()
+        while not self._capture_stop.is_set():
+            if self.test_video is not None:
+                # Play uploaded clips back in real time
+                delay = next_frame_time - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                next_frame_time = max(next_frame_time + self.frame_interval, time.time())
+
+                ret, frame = self.test_video.read()
+                if not ret:
+                    # Reset video to beginning
+                    self.test_video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    ret, frame = self.test_video.read()
+                    self.frame_count = 0
+            else:
+                if self.cap is None:
+                    self.start_camera()
+                # grab() blocks until the device has a new frame, which keeps
+                # the V4L2 buffer drained
+                ret = self.cap.grab()
+                frame = None
+                if ret:
+                    ret, frame = self.cap.retrieve()
+
+            if not ret:
+                print("Error: capture source returned no frame, stopping capture")
+                self._capture_failed = True
+                break
+
+            self.frame_count += 1
+            self.frame_slot.put(frame)
+        self.frame_slot.wake()
+
     def set_test_video(self, video_file: FileStorage) -> None:
         """Set up test video with proper frame rate control"""
+        # Nothing may read from the stream while the source is being swapped
+        if self.pipeline is not None:
+            self.pipeline.stop()
+        self.stop_capture()
         try:
             # Create a temporary file with a proper extension
             temp_fd, temp_path = tempfile.mkstemp(suffix='.mp4')
@@ -54,6 +156,8 @@ class VideoStream:
                 raise ValueError("Failed to open the video file")
                 
             self.frame_count = 0
+            fps = self.test_video.get(cv2.CAP_PROP_FPS)
+            self.frame_interval = 1.0 / fps if fps and fps > 0 else 1.0 / 25
             self.last_frame_time = time.time()
             self.last_frame = None
             
@@ -108,65 +212,77 @@ class VideoStream:
         return padded
 
     def read_frame(self) -> Tuple[bool, Optional[cv2.Mat]]:
-        """Read frame with consistent frame rate for both live and test video"""
-        current_time = time.time()
-        elapsed = current_time - self.last_frame_time
-        
-        # Enforce frame rate
-        if elapsed < self.frame_interval:
-            if self.last_frame is not None:
-                return True, self.last_frame.copy()
-            # Use a shorter sleep to allow other requests
-            time.sleep(min(0.01, self.frame_interval - elapsed))
-        
-        if self.test_video is not None:
-            ret, frame = self.test_video.read()
-            if not ret:
-                # Reset video to beginning
-                self.test_video.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                ret, frame = self.test_video.read()
-                self.frame_count = 0
-            
-            if ret:
-                self.frame_count += 1
-                self.last_frame = frame.copy()
-                self.last_frame_time = current_time
-            return ret, frame
-        
-        if self.cap is None:
-            self.start_camera()
-            
-        ret, frame = self.cap.read()
-        if ret:
-            self.last_frame = frame.copy()
-            self.last_frame_time = current_time
-        return ret, frame
+        """Wait for the next frame from the capture thread.
 
-    def generate_frames(self, detector) -> Generator[bytes, None, None]:
-        """Generate video frames without blocking other requests"""
+        Each captured frame is returned at most once; frames captured while
+        the caller was busy are skipped in favour of the newest one.
+        """
+        self.start_capture()
         while True:
+            frame_id, timestamp, frame = self.frame_slot.wait_for_frame(self.last_frame_id)
+            if frame is not None:
+                self.last_frame_id = frame_id
+                self.last_frame_time = timestamp
+                self.last_frame = frame
+                return True, frame
+            if (self._capture_failed or self._capture_stop.is_set() or
+                    self._capture_thread is None or not self._capture_thread.is_alive()):
+                return False, None
+
+    def generate_frames(self, detector) -> Generator[bytes, None, None]:
+        """Generate video frames through the staged capture/inference/annotate/encode pipeline"""
+        # Only one pipeline may read from this stream at a time
+        if self.pipeline is not None:
+            self.pipeline.stop()
+
+        def capture():
             ret, frame = self.read_frame()
             if not ret:
-                break
-                
+                raise StopIteration
             # Maintain aspect ratio while resizing
-            frame = self.maintain_aspect_ratio(frame, 1020, 600)
-            frame = detector.process_frame(frame)
-            
-            try:
-                _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-                frame = buffer.tobytes()
-                # Yield the frame and allow other requests to process
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-                # Small delay after yielding
-                time.sleep(0.001)
-            except Exception as e:
-                print(f"Error encoding frame: {e}")
-                continue
+            return self.maintain_aspect_ratio(frame, self.config.frame_width, self.config.frame_height)
+
+        def inference(frame):
+            return detector.detect(frame)
+
+        def annotate(item):
+            frame, detections = item
+            return detector.annotate(frame, detections)
+
+        def encode(frame):
+            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.config.jpeg_quality])
+            return (b'--frame\r\n'
+                    b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+
+        pipeline = FramePipeline(
+            [('capture', capture), ('inference', inference), ('annotate', annotate), ('encode', encode)],
+            queue_size=self.config.pipeline_queue_size,
+            drop_policy=self.config.pipeline_drop_policy
+        )
+        self.pipeline = pipeline
+        pipeline.start()
+        try:
+            yield from pipeline.frames()
+        finally:
+            pipeline.stop()
+
+    def get_pipeline_stats(self) -> Dict:
+        """Queue depths and throughput of each pipeline stage"""
+        if self.pipeline is None:
+            stats = {'running': False, 'stages': [], 'output_depth': 0, 'bottleneck': None}
+        else:
+            stats = self.pipeline.get_stats()
+        stats['capture'] = {
+            'frame_id': self.frame_slot.frame_id,
+            'last_read_id': self.last_frame_id,
+            'overwritten': self.frame_slot.overwritten,
+            'frame_age_ms': round((time.time() - self.last_frame_time) * 1000, 1) if self.last_frame_time else None
+        }
+        return stats
 
     def release(self):
         """Release resources and clean up temporary files"""
+        self.stop_capture()
         if self.cap is not None:
             self.cap.release()
         if self.test_video is not None: